@@ -90,6 +90,12 @@ export default function DashboardPage() {
     if (urlParams.get("auth") === "success") {
       setConnected(true);
       localStorage.setItem("googleAccountConnected", "true");
+      // The first sync runs in the background; refresh once it's done
+      const syncJobId = urlParams.get("sync_job");
+      if (syncJobId) {
+        setSyncing(true);
+        waitForSyncJob(syncJobId).finally(() => setSyncing(false));
+      }
       // Clean up URL params
       window.history.replaceState({}, document.title, window.location.pathname);
     } else if (urlParams.get("auth") === "error") {
@@ -174,6 +180,35 @@ export default function DashboardPage() {
     setJobs([]);
   };
 
+  // Poll a background sync job until it finishes, then refresh the jobs list
+  const waitForSyncJob = async (jobId: string) => {
+    const {
+      data: { user },
+    } = await supabase.auth.getUser();
+    if (!user) return;
+
+    while (true) {
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+
+      const response = await fetch(
+        `https://maestro-production-0a0f.up.railway.app/api/sync-jobs/${jobId}?user_email=${encodeURIComponent(
+          user.email || ""
+        )}`
+      );
+      if (!response.ok) {
+        console.error("Failed to fetch sync status");
+        return;
+      }
+
+      const job = await response.json();
+      console.log("Sync status:", job);
+      if (job.status === "succeeded" || job.status === "failed") {
+        fetchJobs();
+        return;
+      }
+    }
+  };
+
   const syncEmails = async () => {
     try {
       setSyncing(true);
@@ -201,9 +236,9 @@ export default function DashboardPage() {
 
       if (response.ok) {
         const data = await response.json();
-        console.log("Sync result:", data);
-        // Refresh jobs after sync
-        fetchJobs();
+        console.log("Sync started:", data);
+        // Refresh jobs once the background sync finishes
+        await waitForSyncJob(data.job_id);
       } else {
         const errorText = await response.text();
         console.error("Sync failed:", errorText);
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+class WeeklyCount(BaseModel):
+    week: str  # Monday of the week, YYYY-MM-DD
+    count: int
+
+class Insights(BaseModel):
+    total: int
+    status_counts: Dict[str, int]
+    response_rate: Optional[float] = None
+    weekly_applications: List[WeeklyCount] = []
+    median_days_to_response: Optional[float] = None
+    median_days_to_rejection: Optional[float] = None
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import Dict, Optional
+from datetime import datetime
+from enum import Enum
+
+class SyncJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class SyncJob(BaseModel):
+    id: str
+    user_id: str
+    kind: str = "sync"
+    status: SyncJobStatus = SyncJobStatus.QUEUED
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    messages_processed: int = 0
+    messages_total: Optional[int] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
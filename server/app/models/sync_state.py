@@ -0,0 +1,12 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SyncCheckpoint(BaseModel):
+    user_id: str
+    history_id: Optional[str] = None
+    synced_at: Optional[datetime] = None
+    processed_message_ids: List[str] = []
+    failed_message_ids: List[str] = []
+    backfill_page_token: Optional[str] = None
+    backfill_complete: bool = False
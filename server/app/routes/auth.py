@@ -3,10 +3,15 @@ from fastapi.responses import RedirectResponse
 from google.auth.transport.requests import Request as GoogleRequest
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+import logging
 import os
 from app.db.supabase import supabase
-from app.services.email_parser import parse_and_classify_emails
+from app.services.google_services import build_service
+from app.services.credentials import get_credentials_manager
+from app.services.sync_jobs import get_sync_job_manager
+from app.services.users import invalidate_user
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -55,16 +60,14 @@ async def google_login():
 async def google_callback(request: Request):
     """Handle Google OAuth2 callback"""
     try:
-        print("OAuth callback received")
+        logger.debug("OAuth callback received")
         
         # Get the authorization code from query parameters
         code = request.query_params.get('code')
         if not code:
-            print("No authorization code found in callback")
+            logger.warning("No authorization code found in OAuth callback")
             raise HTTPException(status_code=400, detail="Authorization code not found")
         
-        print(f"Authorization code received: {code[:20]}...")
-        
         # Exchange code for tokens
         flow = Flow.from_client_config(
             {
@@ -80,16 +83,12 @@ async def google_callback(request: Request):
         )
         flow.redirect_uri = REDIRECT_URI
         
-        print("Exchanging code for tokens...")
         flow.fetch_token(code=code)
         credentials = flow.credentials
-        print("Tokens received successfully")
         
         # Get user info
-        print("Fetching user info from Google...")
-        user_info_service = build('oauth2', 'v2', credentials=credentials)
+        user_info_service = build_service('oauth2', 'v2', credentials=credentials)
         user_info = user_info_service.userinfo().get().execute()
-        print(f"User info received for: {user_info['email']}")
         
         # Store user and tokens in Supabase
         user_data = {
@@ -101,41 +100,38 @@ async def google_callback(request: Request):
             "token_expiry": credentials.expiry.isoformat() if credentials.expiry else None
         }
         
-        print("Storing user data in Supabase...")
-        
         # Check if user exists, if not create new user
         existing_user = supabase.table("users").select("*").eq("email", user_info['email']).execute()
         
         if existing_user.data:
             # Update existing user
-            print("Updating existing user...")
             user_response = supabase.table("users").update(user_data).eq("email", user_info['email']).execute()
             user_id = existing_user.data[0]['id']
         else:
             # Create new user
-            print("Creating new user...")
             user_response = supabase.table("users").insert(user_data).execute()
             user_id = user_response.data[0]['id']
         
-        print(f"User stored successfully with ID: {user_id}")
+        # Requests must see the new tokens, not the cached row
+        invalidate_user(user_info['email'])
+        get_credentials_manager().remember(user_id, credentials)
+        logger.info("Stored Google tokens for user %s", user_id)
         
-        # Try to parse emails, but don't let it block the OAuth flow
+        # Queue the first sync in the background so it never holds up the redirect
+        redirect_url = f"{FRONTEND_URL}/dashboard?auth=success"
         try:
-            print("Attempting to parse emails...")
-            await parse_and_classify_emails(credentials, user_id)
-            print("Email parsing completed successfully")
-        except Exception as email_error:
-            print(f"Email parsing failed (non-blocking): {str(email_error)}")
-            # Continue with OAuth flow even if email parsing fails
+            sync_job = get_sync_job_manager().submit_sync(credentials, user_id)
+            redirect_url += f"&sync_job={sync_job.id}"
+            logger.info("Queued first email sync for user %s as job %s", user_id, sync_job.id)
+        except Exception:
+            logger.warning("Could not queue email sync for user %s", user_id, exc_info=True)
+            # Continue with OAuth flow even if the sync can't be queued
         
         # Redirect to frontend dashboard
-        print(f"Redirecting to frontend: {FRONTEND_URL}/dashboard?auth=success")
-        return RedirectResponse(url=f"{FRONTEND_URL}/dashboard?auth=success")
+        return RedirectResponse(url=redirect_url)
         
     except Exception as e:
-        print(f"OAuth callback error: {str(e)}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("OAuth callback error")
         
         # Redirect to frontend with error instead of throwing HTTP exception
         error_message = str(e).replace(" ", "%20")
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import List, Optional
 from datetime import datetime
 from app.db.supabase import supabase
-from app.models.job import Job, JobCreate, JobUpdate
-from app.services.email_parser import parse_and_classify_emails
+from app.models.insights import Insights
+from app.models.job import ApplicationStatus, Job, JobCreate, JobUpdate
+from app.models.sync_job import SyncJob
+from app.services.credentials import get_credentials_manager
+from app.services.insights import get_insights_store
+from app.services.job_queries import MAX_PAGE_SIZE, list_jobs, parse_fields
+from app.services.job_versions import etag_matches, make_etag
+from app.services.job_writer import publish_changes
+from app.services.response_cache import get_response_cache
+from app.services.sync_jobs import get_sync_job_manager
+from app.services.sync_scheduler import get_sync_scheduler
+from app.services.users import get_user_by_email
 from google.oauth2.credentials import Credentials
-import traceback
-import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -18,43 +29,84 @@ async def get_current_user(request: Request):
         if not user_email:
             raise HTTPException(status_code=401, detail="User email is required")
         
-        # Find user by email in Supabase
-        users_response = supabase.table("users").select("id, email").eq("email", user_email).execute()
+        # Find user by email, usually without a Supabase round trip
+        user = get_user_by_email(user_email)
         
-        if not users_response.data:
+        if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user = users_response.data[0]
-        print(f"Authenticated user: {user['email']} (ID: {user['id']})")
+        # Keep the row for the rest of the request so handlers don't look it up again
+        request.state.user = user
+        # Users who are looking at their dashboard get synced more often
+        get_sync_scheduler().mark_active(user['id'])
+        logger.debug("Authenticated user %s", user['id'])
         return user['id']
         
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Error in get_current_user: {e}")
+    except Exception:
+        logger.exception("Error in get_current_user")
         raise HTTPException(status_code=500, detail="Authentication error")
 
-@router.get("/jobs", response_model=List[Job])
-async def get_jobs(request: Request, user_id: str = Depends(get_current_user)):
-    """Get all job applications for the authenticated user"""
+@router.get("/jobs", response_model=None, responses={200: {"model": List[Job]}})
+async def get_jobs(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[List[ApplicationStatus]] = Query(None),
+    company: Optional[str] = Query(None, description="Company name prefix, case-insensitive"),
+    applied_after: Optional[datetime] = None,
+    applied_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated job fields to return"),
+    user_id: str = Depends(get_current_user)
+):
+    """Get the authenticated user's job applications, newest first
+
+    Without ``limit`` every matching job is returned. With it, the
+    ``X-Next-Cursor`` response header carries the ``cursor`` for the next
+    page and is absent on the last one. Responses carry an ``ETag``; a
+    matching ``If-None-Match`` gets a 304 without querying the database.
+    """
+    # Taken before the query so the tag is never newer than the rows
+    etag = make_etag(user_id, str(request.url.query))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    
     try:
-        print(f"Fetching jobs for user: {user_id}")
-        
-        response = supabase.table("jobs").select("*").eq("user_id", user_id).execute()
-        print(f"Found {len(response.data) if response.data else 0} jobs for user")
-        
-        return response.data if response.data else []
+        logger.debug("Fetching jobs for user %s", user_id)
+        
+        projection = parse_fields(fields)
+        jobs, next_cursor = get_response_cache().get_or_load("jobs", user_id, str(request.url.query), lambda: list_jobs(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            statuses=[s.value for s in status] if status else None,
+            company_prefix=company,
+            applied_after=applied_after,
+            applied_before=applied_before,
+            fields=projection,
+            client=supabase
+        ))
+        logger.debug("Found %d jobs for user %s", len(jobs), user_id)
+        
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        # no-cache makes browsers revalidate with If-None-Match on every load
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return jobs
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error in get_jobs: {str(e)}")
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("Error in get_jobs")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.post("/jobs", response_model=Job)
 async def create_job(job: JobCreate, request: Request, user_id: str = Depends(get_current_user)):
     """Create a job record for the authenticated user"""
     try:
-        print(f"Creating job for user: {user_id}")
-        print(f"Job data: {job}")
+        logger.debug("Creating job for user %s", user_id)
         
         job_data = job.dict()
         job_data["user_id"] = user_id
@@ -64,74 +116,105 @@ async def create_job(job: JobCreate, request: Request, user_id: str = Depends(ge
             job_data["applied_date"] = datetime.now().isoformat()
         else:
             job_data["applied_date"] = job_data["applied_date"].isoformat()
-        
-        print(f"Final job data: {job_data}")
+        job_data["first_applied_date"] = job_data["applied_date"]
         
         response = supabase.table("jobs").insert(job_data).execute()
-        print(f"Insert response: {response}")
+        publish_changes(user_id, [(None, response.data[0])], get_insights_store())
         
         return response.data[0]
     except Exception as e:
-        print(f"Error in create_job: {str(e)}")
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("Error in create_job")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-@router.post("/sync-emails")
-async def sync_emails(request: Request, user_id: str = Depends(get_current_user)):
-    """Manually trigger email parsing and sync for the authenticated user"""
+@router.get("/insights", response_model=Insights)
+async def get_insights(user_id: str = Depends(get_current_user)):
+    """Status counts, weekly applications and response times for the authenticated user"""
     try:
-        print(f"Manual email sync requested for user: {user_id}")
-        
-        # Get user's credentials from database
+        return get_response_cache().get_or_load(
+            "insights", user_id, "", lambda: get_insights_store().get(user_id).model_dump(mode="json")
+        )
+    except Exception as e:
+        logger.exception("Error in get_insights")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+def load_user_credentials(request: Request, user_id: str) -> Credentials:
+    """Build Google credentials from the tokens stored for a user"""
+    # get_current_user already loaded the row for this request
+    user_data = getattr(request.state, "user", None)
+    if not user_data or user_data['id'] != user_id:
         user_response = supabase.table("users").select("*").eq("id", user_id).execute()
         
         if not user_response.data:
             raise HTTPException(status_code=404, detail="User not found")
         
         user_data = user_response.data[0]
-        
-        if not user_data.get('access_token'):
-            raise HTTPException(status_code=400, detail="User has not connected Google account")
-        
-        # Debug: Check what credentials data we have
-        print(f"User credentials data:")
-        print(f"  - access_token: {'***' if user_data.get('access_token') else 'MISSING'}")
-        print(f"  - refresh_token: {'***' if user_data.get('refresh_token') else 'MISSING'}")
-        print(f"  - token_expiry: {user_data.get('token_expiry')}")
-        
-        # Check if refresh token is missing
-        if not user_data.get('refresh_token'):
-            raise HTTPException(
-                status_code=400, 
-                detail="Refresh token missing. Please reconnect your Google account by clicking 'Connect Google' again."
-            )
-        
-        # Create credentials object with all required fields
-        credentials = Credentials(
-            token=user_data['access_token'],
-            refresh_token=user_data['refresh_token'],
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=os.getenv("GOOGLE_CLIENT_ID"),
-            client_secret=os.getenv("GOOGLE_CLIENT_SECRET")
+    
+    if not user_data.get('access_token'):
+        raise HTTPException(status_code=400, detail="User has not connected Google account")
+    
+    # Check if refresh token is missing
+    if not user_data.get('refresh_token'):
+        raise HTTPException(
+            status_code=400, 
+            detail="Refresh token missing. Please reconnect your Google account by clicking 'Connect Google' again."
         )
+    
+    # Reuse the user's live credentials, expiry included, so a sync only
+    # refreshes the token when it is actually about to expire
+    return get_credentials_manager().get(user_data)
+
+@router.post("/sync-emails", status_code=202)
+async def sync_emails(request: Request, user_id: str = Depends(get_current_user)):
+    """Queue an email sync for the authenticated user
+
+    The sync runs in the background; poll ``/sync-jobs/{job_id}`` for progress.
+    """
+    try:
+        logger.info("Manual email sync requested for user %s", user_id)
         
-        print(f"Created credentials object with:")
-        print(f"  - token: {'***' if credentials.token else 'MISSING'}")
-        print(f"  - refresh_token: {'***' if credentials.refresh_token else 'MISSING'}")
-        print(f"  - token_uri: {credentials.token_uri}")
-        print(f"  - client_id: {credentials.client_id}")
-        print(f"  - client_secret: {'***' if credentials.client_secret else 'MISSING'}")
+        credentials = load_user_credentials(request, user_id)
+        job = get_sync_job_manager().submit_sync(credentials, user_id)
+        
+        return {
+            "message": "Email sync started",
+            "job_id": job.id,
+            "status": job.status
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error in sync_emails")
+        raise HTTPException(status_code=500, detail=f"Email sync error: {str(e)}")
+
+@router.post("/backfill-emails", status_code=202)
+async def backfill_user_emails(request: Request, restart: bool = False, user_id: str = Depends(get_current_user)):
+    """Queue a backfill of the user's whole mailbox, resuming any interrupted one"""
+    try:
+        logger.info("Email backfill requested for user %s", user_id)
         
-        # Parse and classify emails
-        processed_jobs = await parse_and_classify_emails(credentials, user_id)
+        credentials = load_user_credentials(request, user_id)
+        job = get_sync_job_manager().submit_backfill(credentials, user_id, restart=restart)
         
         return {
-            "message": f"Email sync completed successfully",
-            "jobs_processed": len(processed_jobs),
-            "jobs": processed_jobs
+            "message": "Email backfill started",
+            "job_id": job.id,
+            "status": job.status
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in sync_emails: {str(e)}")
-        print(f"Full traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Email sync error: {str(e)}") 
\ No newline at end of file
+        logger.exception("Error in backfill_user_emails")
+        raise HTTPException(status_code=500, detail=f"Email backfill error: {str(e)}")
+
+@router.get("/sync-jobs/{job_id}", response_model=SyncJob)
+async def get_sync_job(job_id: str, request: Request, user_id: str = Depends(get_current_user)):
+    """Report the status and progress of one of the user's sync jobs"""
+    job = get_sync_job_manager().get(job_id)
+    
+    # Don't reveal whether another user's job exists
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    
+    return job
@@ -0,0 +1,142 @@
+"""Classifier verdicts remembered per message, so no email is judged twice.
+
+Verdicts live in the ``email_classifications`` table:
+
+    user_id             text references users(id)
+    message_id          text     -- Gmail message ID
+    classifier_version  text
+    verdict             jsonb    -- classify_email output, null when it isn't an application email
+    classified_at       timestamptz
+    primary key (user_id, message_id)
+
+A sync looks up its candidates here before fetching any message; a
+message with a verdict from the current ``CLASSIFIER_VERSION`` is
+neither fetched nor classified again. Rows from older versions count as
+misses and are overwritten or evicted. Each user keeps at most
+``MAX_VERDICTS_PER_USER`` rows, the most recently classified.
+
+The cache only saves work, so its failures are logged and treated as
+misses rather than failing the sync.
+"""
+from app.db.supabase import supabase
+from app.services.email_classifier import CLASSIFIER_VERSION
+from app.services.metrics import stage_timer
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+MAX_VERDICTS_PER_USER = int(os.getenv("CLASSIFICATION_CACHE_MAX_PER_USER", "20000"))
+
+# Message IDs per lookup, keeping the request URL a sensible length
+LOOKUP_CHUNK_SIZE = 200
+# Rows deleted per eviction request
+EVICTION_BATCH_SIZE = 500
+
+class ClassificationCache:
+    """Reads and writes classifier verdicts for one classifier version"""
+
+    def __init__(self, client=supabase, version: str = CLASSIFIER_VERSION, max_per_user: int = MAX_VERDICTS_PER_USER):
+        self.client = client
+        self.version = version
+        self.max_per_user = max_per_user
+
+    def lookup(self, user_id: str, message_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Return ``{message_id: verdict}`` for the messages with a current verdict.
+
+        A verdict of ``None`` means the message was judged not to be an
+        application email; messages missing from the result were never
+        judged by this version.
+        """
+        verdicts = {}
+        try:
+            with stage_timer("db_read"):
+                for start in range(0, len(message_ids), LOOKUP_CHUNK_SIZE):
+                    response = (
+                        self.client.table("email_classifications")
+                        .select("message_id,verdict")
+                        .eq("user_id", user_id)
+                        .eq("classifier_version", self.version)
+                        .in_("message_id", message_ids[start:start + LOOKUP_CHUNK_SIZE])
+                        .execute()
+                    )
+                    for row in response.data or []:
+                        verdicts[row['message_id']] = row['verdict']
+        except Exception:
+            logger.warning("Could not read cached verdicts for user %s", user_id, exc_info=True)
+            return {}
+        return verdicts
+
+    def store(self, user_id: str, verdicts: Dict[str, Optional[Dict]]):
+        """Remember ``{message_id: verdict}``, replacing verdicts from any version"""
+        if not verdicts:
+            return
+        classified_at = datetime.now().isoformat()
+        rows = [
+            {
+                "user_id": user_id,
+                "message_id": message_id,
+                "classifier_version": self.version,
+                "verdict": _plain(verdict),
+                "classified_at": classified_at
+            }
+            for message_id, verdict in verdicts.items()
+        ]
+        try:
+            with stage_timer("db_write"):
+                self.client.table("email_classifications").upsert(rows, on_conflict="user_id,message_id").execute()
+        except Exception:
+            logger.warning("Could not cache verdicts for user %s", user_id, exc_info=True)
+
+    def evict(self, user_id: str):
+        """Drop the user's verdicts from older versions and any beyond the size bound"""
+        try:
+            with stage_timer("db_write"):
+                (
+                    self.client.table("email_classifications")
+                    .delete()
+                    .eq("user_id", user_id)
+                    .neq("classifier_version", self.version)
+                    .execute()
+                )
+                while True:
+                    response = (
+                        self.client.table("email_classifications")
+                        .select("message_id")
+                        .eq("user_id", user_id)
+                        .order("classified_at", desc=True)
+                        .range(self.max_per_user, self.max_per_user + EVICTION_BATCH_SIZE - 1)
+                        .execute()
+                    )
+                    overflow = [row['message_id'] for row in response.data or []]
+                    if not overflow:
+                        return
+                    (
+                        self.client.table("email_classifications")
+                        .delete()
+                        .eq("user_id", user_id)
+                        .in_("message_id", overflow)
+                        .execute()
+                    )
+        except Exception:
+            logger.warning("Could not evict cached verdicts for user %s", user_id, exc_info=True)
+
+def _plain(verdict: Optional[Dict]) -> Optional[Dict]:
+    # ApplicationStatus is a str enum; store its plain value
+    if verdict is None:
+        return None
+    return {key: getattr(value, 'value', value) for key, value in verdict.items()}
+
+classification_cache = None
+_cache_lock = threading.Lock()
+
+def get_classification_cache() -> ClassificationCache:
+    global classification_cache
+    # Called from the sync loop thread
+    with _cache_lock:
+        if classification_cache is None:
+            classification_cache = ClassificationCache()
+        return classification_cache
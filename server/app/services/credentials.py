@@ -0,0 +1,127 @@
+"""Live Google credentials per user.
+
+Building ``Credentials`` from the ``users`` row on every sync lost the
+token's expiry, so google-auth refreshed on the first call of each sync
+and the new token was thrown away. The manager keeps one ``Credentials``
+object per user, with its expiry, and reuses it across syncs. Refreshes
+happen under a per-user lock so concurrent syncs share a single refresh,
+and new tokens are written back to ``users`` in the background.
+"""
+from app.db.supabase import supabase
+from app.utils.ttl_cache import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from google.auth.transport.requests import Request as GoogleRequest
+from google.oauth2.credentials import Credentials
+from typing import Dict, Optional
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+# Idle users' credentials are dropped after a day; they are rebuilt from
+# the stored tokens on their next sync
+CREDENTIALS_CACHE_TTL_SECONDS = 24 * 60 * 60
+CREDENTIALS_CACHE_SIZE = 10000
+
+# Refreshes for different users run in parallel, but users hashing to the
+# same stripe wait for each other; plenty of stripes keeps that rare
+LOCK_STRIPES = 64
+
+class CredentialsManager:
+    """Hands out shared, self-refreshing credentials for each user"""
+
+    def __init__(self, client=supabase):
+        self.client = client
+        self._credentials = TTLCache(maxsize=CREDENTIALS_CACHE_SIZE, ttl=CREDENTIALS_CACHE_TTL_SECONDS)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="token-writeback")
+
+    def get(self, user: Dict) -> Credentials:
+        """Return live credentials for a ``users`` row.
+
+        The cached object wins over the row as long as it holds the same
+        refresh token, since its access token is at least as new. A new
+        refresh token means the user reconnected, so the row wins.
+        """
+        user_id = user['id']
+        with self._lock_for(user_id):
+            credentials = self._credentials.get(user_id)
+            if credentials is None or credentials.refresh_token != user.get('refresh_token'):
+                credentials = Credentials(
+                    token=user.get('access_token'),
+                    refresh_token=user.get('refresh_token'),
+                    token_uri=TOKEN_URI,
+                    client_id=os.getenv("GOOGLE_CLIENT_ID"),
+                    client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+                    expiry=parse_expiry(user.get('token_expiry'))
+                )
+            self._credentials.set(user_id, credentials)
+            return credentials
+
+    def remember(self, user_id: str, credentials: Credentials):
+        """Adopt credentials that were just issued, e.g. by the OAuth callback"""
+        with self._lock_for(user_id):
+            self._credentials.set(user_id, credentials)
+
+    def refresh(self, user_id: str, credentials: Credentials, stale_token: Optional[str] = None) -> Credentials:
+        """Refresh ``credentials`` unless another caller already replaced ``stale_token``.
+
+        Blocks on the token endpoint, so async callers should run it in a
+        thread. The new tokens are persisted in the background.
+        """
+        with self._lock_for(user_id):
+            if credentials.token != stale_token and credentials.valid:
+                return credentials
+
+            previous_refresh_token = credentials.refresh_token
+            credentials.refresh(GoogleRequest())
+            logger.debug("Refreshed Google access token for user %s", user_id)
+
+            self._credentials.set(user_id, credentials)
+            update = {
+                "access_token": credentials.token,
+                "token_expiry": credentials.expiry.isoformat() if credentials.expiry else None
+            }
+            # Google occasionally rotates the refresh token too
+            if credentials.refresh_token != previous_refresh_token:
+                update["refresh_token"] = credentials.refresh_token
+            self._writer.submit(self._write_back, user_id, update)
+            return credentials
+
+    def close(self):
+        """Wait for pending token writes to finish"""
+        self._writer.shutdown(wait=True)
+
+    def _write_back(self, user_id: str, update: Dict):
+        try:
+            self.client.table("users").update(update).eq("id", user_id).execute()
+        except Exception:
+            # The in-memory credentials still work; the next refresh retries the write
+            logger.exception("Could not store refreshed token for user %s", user_id)
+
+    def _lock_for(self, user_id: str) -> threading.Lock:
+        return self._locks[hash(user_id) % LOCK_STRIPES]
+
+def parse_expiry(value) -> Optional[datetime]:
+    """Parse a stored token expiry into the naive UTC datetime google-auth expects"""
+    if not value:
+        return None
+    expiry = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if expiry.tzinfo is not None:
+        expiry = expiry.astimezone(timezone.utc).replace(tzinfo=None)
+    return expiry
+
+credentials_manager = None
+_manager_lock = threading.Lock()
+
+def get_credentials_manager() -> CredentialsManager:
+    global credentials_manager
+    # Called from sync worker threads as well as request handlers
+    with _manager_lock:
+        if credentials_manager is None:
+            credentials_manager = CredentialsManager()
+        return credentials_manager
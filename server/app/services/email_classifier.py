@@ -1,276 +1,520 @@
 import re
-from typing import Dict, Optional
+import html
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Mapping, Optional, Set, Tuple
 # from transformers import pipeline  # Commented out to avoid loading heavy model
 from app.models.job import ApplicationStatus
+from app.services.metrics import stage_timer
+from app.services.phrase_matcher import PhraseMatcher
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change to the prefilter or classifier could change the
+# verdict on an email; cached verdicts from older versions are then ignored
+CLASSIFIER_VERSION = "2"
+
+# Phrase lists are plain lowercase substrings of "subject body"
+APPLICATION_INDICATORS = [
+    "your application for", "position you applied", "role you applied", 
+    "we received your application", "application status", 
+    "selected to move forward", "move forward in the recruitment",
+    "invite you to interview", "invite you to an interview", "invite you to the next step",
+    "would like to schedule an interview", "would like to discuss your application",
+    "interview for the position", "next steps in the hiring process", "next step of our recruitment",
+    "schedule a time to discuss", "interview with our team", "schedule a technical interview",
+    "excited to offer", "pleased to offer", "happy to offer", "offer you the position",
+    "job offer", "offer of employment", "confirm your acceptance", "welcoming you to the team",
+    "thank you for applying to", "we've reviewed your application",
+    # Additional patterns for rejection emails
+    "thank you for taking the time to apply", "apply for the", "applied for the",
+    "time to apply for", "for applying for", "for your application",
+    "regarding your application", "concerning your application", "about your application",
+    "will not be moving forward", "regret to inform", "unfortunately", "not selected",
+    "after careful consideration", "competitive selection process",
+    "thank you for your interest in", "appreciate your interest in"
+]
+
+TECHNICAL_INDICATORS = [
+    "software engineer", "developer", "data scientist", "machine learning",
+    "artificial intelligence", "python", "java", "javascript", "react",
+    "node", "backend", "frontend", "fullstack", "devops", "cloud", "aws",
+    "azure", "database", "api", "web developer", "mobile developer",
+    "internship", "technical role", "engineering role", "product manager",
+    "ux designer", "data analyst", "research scientist",
+    # Additional technical role patterns
+    "software engineering", "engineering intern", "technical intern",
+    "intern", "graduate position", "entry level", "new grad"
+]
+
+OUTREACH_INDICATORS = [
+    "we found your resume", "came across your profile", 
+    "great opportunity for you", "thought you might be interested",
+    "perfect fit for you", "share an opportunity", "new openings",
+    "job opportunities", "career opportunities", "hiring now",
+    "job alert", "featured jobs", "unsubscribe"
+]
+
+INTERVIEW_KEYWORDS = [
+    "schedule an interview", "interview invitation", "invite you to interview",
+    "next step is an interview", "interview for the position", 
+    "phone interview", "video interview", "technical interview",
+    "selected to move forward", "discuss your application in an interview",
+    "schedule a time to discuss", "interview with our team",
+    "arrange a convenient time for an interview"
+]
+
+REJECTION_KEYWORDS = [
+    "unfortunately", "regret to inform", "not selected", "not moving forward", 
+    "not the right fit", "other candidates", "will not be proceeding",
+    "thank you for your interest, however", "different direction", "unsuccessful",
+    # Additional rejection patterns
+    "will not be moving forward", "regret to inform you that we will not",
+    "after careful consideration, we regret", "competitive selection process",
+    "not advance to the next stage", "not proceed with your application",
+    "decided not to move forward", "pursue other candidates",
+    "this decision does not reflect negatively", "extremely competitive",
+    "we will not be moving forward with your application"
+]
+
+OFFER_KEYWORDS = [
+    "pleased to offer", "excited to offer", "happy to offer", "offer you the position", 
+    "job offer", "offer of employment", "start date", "stipend", "salary", 
+    "welcome to the team", "congratulations", "accepted for the position",
+    "we believe you would be a great addition", "confirm your acceptance",
+    "signing the attached form", "welcoming you to the team"
+]
+
+# Every list above compiled into one matcher so an email is scanned once
+PHRASE_MATCHER = PhraseMatcher({
+    'application': APPLICATION_INDICATORS,
+    'technical': TECHNICAL_INDICATORS,
+    'outreach': OUTREACH_INDICATORS,
+    'interview': INTERVIEW_KEYWORDS,
+    'rejection': REJECTION_KEYWORDS,
+    'offer': OFFER_KEYWORDS
+})
+
+# The prefilter only sees the subject and Gmail's snippet (the start of the
+# body), both of which ``analyze`` also reads, so an outreach phrase there
+# settles its answer
+PREVIEW_MATCHER = PhraseMatcher({'outreach': OUTREACH_INDICATORS})
+
+# Gmail labels that never hold mail worth classifying
+PREFILTER_SKIP_LABELS = frozenset({"SPAM", "TRASH"})
+
+# Extraction tables are compiled once here rather than on every call.
+# Groups of patterns are tried in priority order and every match of a
+# pattern is validated before moving to the next one, so patterns are only
+# merged into one regex where that cannot change which candidate wins.
+
+SENDER_PREFIX_PATTERN = re.compile(r'^(no-reply|noreply|hr|careers|jobs|talent|recruiting)[@-]')
+SENDER_DOMAIN_PATTERN = re.compile(r'@([a-zA-Z0-9.-]+)\.[a-zA-Z]{2,}')
+COMPANY_SUFFIX_PATTERN = re.compile(r'(corp|inc|llc|ltd|co)$', re.IGNORECASE)
+
+SKIP_DOMAINS = (
+    'gmail', 'yahoo', 'outlook', 'hotmail', 'icloud', 'aol', 'mail',
+    'recruiting', 'staffing', 'jobvite', 'workday', 'greenhouse', 
+    'lever', 'bamboohr', 'indeed', 'linkedin', 'glassdoor', 'monster',
+    'ziprecruiter', 'careerbuilder', 'dice', 'talent.com'
+)
+
+# Pattern 1: "at Company" - most reliable, with word boundaries. This used to
+# be followed by "internship at", "position at", "role at" and "working at"
+# variants, but every company those capture is also captured, earlier, by
+# the plain "at Company" pattern, so they could never change the result.
+AT_COMPANY_PATTERNS = (
+    re.compile(r'\bat\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])'),  # "at Amazon", "at Google", etc.
+)
+
+# Pattern 2: Company signatures - "Sincerely, Amazon Team"
+SIGNATURE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'sincerely,?\s*(?:the\s+)?([A-Z][a-zA-Z]{2,15})(?:\s+team|\s+recruiting|\s*,)',
+    r'best\s+regards,?\s*(?:the\s+)?([A-Z][a-zA-Z]{2,15})(?:\s+team|\s+recruiting|\s*,)',
+    r'([A-Z][a-zA-Z]{2,15})\s+recruiting\s+team',
+    r'([A-Z][a-zA-Z]{2,15})\s+talent\s+team',
+    r'([A-Z][a-zA-Z]{2,15})\s+hr\s+team',
+    r'on\s+behalf\s+of\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])'
+))
+
+# Pattern 3: Subject line patterns - more restrictive
+SUBJECT_COMPANY_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'^([A-Z][a-zA-Z]{2,15})\s+(?:software|engineering|internship|position|role)(?:\s|$)',
+    r'([A-Z][a-zA-Z]{2,15})\s+(?:software\s+engineering|internship)\s*[-–]',
+    r'from\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
+    r'([A-Z][a-zA-Z]{2,15})\s*[-–]\s*(?:software|engineering|internship|position)',
+    # "Company Software Engineering" format
+    r'^([A-Z][a-zA-Z]{2,15})\s+Software\s+Engineering',
+    r'^([A-Z][a-zA-Z]{2,15})\s+Data\s+Science',
+    r'^([A-Z][a-zA-Z]{2,15})\s+Machine\s+Learning'
+))
+
+# Pattern 4: Email body context patterns
+BODY_COMPANY_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'thank\s+you\s+for\s+applying\s+to\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
+    r'your\s+application\s+to\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
+    r'opportunity\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
+    r'career\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
+    r'join\s+(?:the\s+)?([A-Z][a-zA-Z]{2,15})\s+team(?:\s|$|[^\w])',
+    r'([A-Z][a-zA-Z]{2,15})\s+is\s+excited\s+to',
+    r'we\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])'
+))
+
+# Words that are never company names, compared lowercase
+COMPANY_BLACKLIST = frozenset({
+    # Common words
+    'thank', 'you', 'for', 'your', 'the', 'and', 'with', 'from', 'team',
+    'recruiting', 'we', 'our', 'this', 'that', 'next', 'step', 'process',
+    'application', 'position', 'role', 'internship', 'job', 'opportunity',
+    'interview', 'technical', 'phone', 'video', 'online', 'best', 'regards',
+    'sincerely', 'yours', 'kind', 'looking', 'forward', 'please', 'software',
+    'engineering', 'engineer', 'developer', 'data', 'science', 'machine',
+    # Action words that often get captured
+    'apply', 'applying', 'applied', 'contact', 'email', 'send', 'sent',
+    'receive', 'received', 'review', 'reviewed', 'consider', 'decision',
+    'thank you', 'thanks', 'hello', 'dear', 'hi',
+    # Time/status words
+    'update', 'status', 'current', 'future', 'recent', 'new', 'old',
+    'first', 'second', 'third', 'final', 'last', 'next', 'previous',
+    # Generic business words
+    'company', 'business', 'organization', 'group', 'department', 'division',
+    'office', 'headquarters', 'location', 'building', 'campus',
+    # Common false positive patterns
+    'subject', 'regarding', 'concerning', 'about', 'related', 'respect',
+    # Job titles that are clearly not company names
+    'manager', 'director', 'representative', 'coordinator', 'specialist'
+})
+
+COMPANY_NAME_PATTERN = re.compile(r'[A-Z][a-zA-Z]*')
+
+# Exact, well-defined position titles, most specific first. None of these
+# can start inside another's match, so one combined scan finds the same
+# candidates as trying each title in turn; the group index keeps the order.
+EXACT_POSITION_TITLES = (
+    # Most specific patterns first
+    r'software\s+engineering?\s+intern(?:ship)?',
+    r'data\s+science?\s+intern(?:ship)?',
+    r'machine\s+learning\s+intern(?:ship)?',
+    r'web\s+development\s+intern(?:ship)?',
+    r'frontend\s+(?:engineer|developer)\s+intern(?:ship)?',
+    r'backend\s+(?:engineer|developer)\s+intern(?:ship)?',
+    r'fullstack\s+(?:engineer|developer)\s+intern(?:ship)?',
+    r'mobile\s+(?:engineer|developer)\s+intern(?:ship)?',
+    r'devops\s+intern(?:ship)?',
+    r'cloud\s+engineer\s+intern(?:ship)?',
+    r'product\s+manager\s+intern(?:ship)?',
+    r'ux\s+designer\s+intern(?:ship)?',
+    r'data\s+analyst\s+intern(?:ship)?',
+    r'research\s+intern(?:ship)?',
+    
+    # General role patterns
+    r'software\s+engineer',
+    r'data\s+scientist',
+    r'machine\s+learning\s+engineer',
+    r'frontend\s+(?:engineer|developer)',
+    r'backend\s+(?:engineer|developer)',
+    r'fullstack\s+(?:engineer|developer)',
+    r'web\s+developer',
+    r'mobile\s+developer',
+    r'devops\s+engineer',
+    r'cloud\s+engineer',
+    r'product\s+manager',
+    r'ux\s+designer',
+    r'data\s+analyst',
+    r'research\s+scientist'
+)
+EXACT_POSITION_PATTERN = re.compile(
+    '|'.join(f'\\b(?P<title{i}>{title})\\b' for i, title in enumerate(EXACT_POSITION_TITLES)),
+    re.IGNORECASE
+)
+
+_ROLE = r'(?:intern(?:ship)?|engineer|developer|scientist|manager|designer|analyst)'
+
+# Position context patterns (more complex extraction), tried in order.
+# Patterns that begin with an open-ended run of letters are anchored to the
+# start of that run: the leftmost match always starts there anyway, and
+# without the anchor every later position in the run is retried too, which
+# is quadratic in the length of the email.
+CONTEXT_POSITION_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    # "for the X position" - extract just X
+    rf'for\s+the\s+([a-zA-Z\s]+{_ROLE})\s+(?:position|role)',
+    
+    # "X position at" - extract just X  
+    rf'(?<![a-zA-Z\s])([a-zA-Z\s]+{_ROLE})\s+(?:position|role)\s+at',
+    
+    # Subject line position extraction
+    rf'^[^-]*?[-–]\s*([A-Za-z\s]+{_ROLE})',
+    rf'(?<![A-Za-z\s])([A-Za-z\s]+{_ROLE})\s*[-–]',
+    
+    # "apply for X" patterns
+    rf'apply(?:ing)?\s+for\s+(?:the\s+|a\s+)?([a-zA-Z\s]+{_ROLE})',
+    
+    # "thank you for applying to/for X"
+    rf'thank\s+you\s+for\s+applying\s+(?:to|for)\s+(?:the\s+|a\s+)?([a-zA-Z\s]+{_ROLE})'
+))
+
+INTERNSHIP_TYPES = (
+    "software engineering", "software development", "data science",
+    "machine learning", "web development", "frontend", "backend",
+    "fullstack", "mobile", "devops", "cloud", "product", "ux", "research"
+)
+
+POSITION_PREFIX_PATTERN = re.compile(r'^(thank\s+you\s+for\s+applying\s+to\s+the\s+|the\s+|your\s+|our\s+|this\s+|that\s+|a\s+)', re.IGNORECASE)
+POSITION_SUFFIX_PATTERN = re.compile(r'\s+(position|role|job|opportunity)$', re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+POSITION_ROLE_KEYWORDS = (
+    'intern', 'engineer', 'developer', 'scientist', 'manager', 
+    'designer', 'analyst', 'specialist', 'coordinator', 'lead'
+)
+
+POSITION_BLACKLIST = (
+    'thank you', 'thanks', 'please', 'hello', 'dear', 'regards',
+    'sincerely', 'best', 'looking forward', 'we are', 'you are',
+    'this is', 'that is', 'it is', 'there is', 'here is'
+)
+
+# Why an email failed the relevance checks
+REJECT_NO_APPLICATION_INDICATORS = "no_application_indicators"
+REJECT_NO_TECHNICAL_INDICATORS = "no_technical_indicators"
+REJECT_OUTREACH = "outreach"
+REJECT_NO_COMPANY = "no_company"
+# ...or failed the prefilter before its body was downloaded
+REJECT_SKIPPED_LABEL = "skipped_label"
+
+@dataclass(frozen=True)
+class EmailAnalysis:
+    """Everything the classifier concluded about one email"""
+    is_application: bool
+    rejection_reason: Optional[str] = None
+    company: Optional[str] = None
+    position: Optional[str] = None
+    status: Optional[ApplicationStatus] = None
+    # Matched phrases per keyword list, e.g. {"rejection": {"unfortunately"}}
+    evidence: Mapping[str, FrozenSet[str]] = field(default_factory=lambda: MappingProxyType({}))
+
 class EmailClassifier:
     """Lightweight email classifier using regex patterns and keywords only"""
     
     def __init__(self):
-        print("🤖 Initializing lightweight email classifier...")
         # Commented out heavy model loading
         # self.classifier = pipeline(
         #     "zero-shot-classification",
         #     model="facebook/bart-large-mnli",
         #     device=-1
         # )
-        print("✅ Lightweight classifier ready!")
+        logger.info("Lightweight email classifier ready")
+
+    def prefilter(self, subject: str, snippet: str, label_ids: Iterable[str] = ()) -> Optional[str]:
+        """Cheap check on a message's metadata before its body is downloaded.
+
+        Returns the rejection reason, or ``None`` if the message should be
+        fetched in full and classified. Rejections are final - they are
+        cached and never looked at again - so only metadata that settles
+        ``analyze``'s answer rejects: spam or trash, or outreach in the
+        subject or snippet. Anything subtler needs the body.
+        """
+        if PREFILTER_SKIP_LABELS.intersection(label_ids):
+            return REJECT_SKIPPED_LABEL
+        
+        # Snippets come HTML-escaped, e.g. "we&#39;ve reviewed your application"
+        preview_hits = PREVIEW_MATCHER.scan(f"{subject} {html.unescape(snippet)}".lower())
+        if preview_hits.get('outreach'):
+            return REJECT_OUTREACH
+        return None
+
+    def match_phrases(self, subject: str, body: str) -> Dict[str, Set[str]]:
+        """Find every keyword-list hit in the email with a single scan"""
+        return PHRASE_MATCHER.scan(f"{subject} {body}".lower())
+
+    def analyze(self, subject: str, body: str, sender: str) -> EmailAnalysis:
+        """Classify an email in one pass.
+
+        The text is combined and lowercased once, the keyword lists are
+        scanned once, and company, position and status are each worked out
+        at most once. Position and status are only computed for emails that
+        pass the relevance checks.
+        """
+        full_text = f"{subject} {body}"
+        text_lower = full_text.lower()
+        with stage_timer("classify_relevance"):
+            phrase_hits = PHRASE_MATCHER.scan(text_lower)
+            rejection_reason = self._check_indicators(phrase_hits)
+        evidence = MappingProxyType({
+            category: frozenset(phrases) for category, phrases in phrase_hits.items()
+        })
+        
+        company = None
+        if not rejection_reason:
+            with stage_timer("classify_company"):
+                rejection_reason, company = self._check_company(subject, full_text, sender)
+        if rejection_reason:
+            return EmailAnalysis(is_application=False, rejection_reason=rejection_reason, evidence=evidence)
+        
+        with stage_timer("classify_position"):
+            position = self._extract_position(full_text, text_lower)
+        with stage_timer("classify_status"):
+            status = self.classify_application_status(subject, body, phrase_hits)
+        
+        return EmailAnalysis(
+            is_application=True,
+            company=company,
+            position=position,
+            status=status,
+            evidence=evidence
+        )
 
-    def is_actual_application(self, subject: str, body: str, sender: str) -> bool:
+    def is_actual_application(self, subject: str, body: str, sender: str, phrase_hits: Optional[Dict[str, Set[str]]] = None) -> bool:
         """Determine if email is an application response using lightweight methods"""
+        if phrase_hits is None:
+            phrase_hits = self.match_phrases(subject, body)
         
-        text_combined = f"{subject} {body}".lower()
+        rejection_reason, _ = self._check_relevance(subject, f"{subject} {body}", sender, phrase_hits)
+        return rejection_reason is None
+
+    def _check_relevance(self, subject: str, full_text: str, sender: str, phrase_hits: Dict[str, Set[str]]) -> Tuple[Optional[str], Optional[str]]:
+        """Run the application checks, returning ``(rejection_reason, company)``"""
+        rejection_reason = self._check_indicators(phrase_hits)
+        if rejection_reason:
+            return rejection_reason, None
+        return self._check_company(subject, full_text, sender)
+
+    def _check_indicators(self, phrase_hits: Dict[str, Set[str]]) -> Optional[str]:
+        """Checks 1-3, on keyword hits alone; returns the rejection reason if any"""
         
         # CHECK 1: Require specific application response indicators
-        application_indicators = [
-            "your application for", "position you applied", "role you applied", 
-            "we received your application", "application status", 
-            "selected to move forward", "move forward in the recruitment",
-            "invite you to interview", "invite you to an interview", "invite you to the next step",
-            "would like to schedule an interview", "would like to discuss your application",
-            "interview for the position", "next steps in the hiring process", "next step of our recruitment",
-            "schedule a time to discuss", "interview with our team", "schedule a technical interview",
-            "excited to offer", "pleased to offer", "happy to offer", "offer you the position",
-            "job offer", "offer of employment", "confirm your acceptance", "welcoming you to the team",
-            "thank you for applying to", "we've reviewed your application",
-            # Additional patterns for rejection emails
-            "thank you for taking the time to apply", "apply for the", "applied for the",
-            "time to apply for", "for applying for", "for your application",
-            "regarding your application", "concerning your application", "about your application",
-            "will not be moving forward", "regret to inform", "unfortunately", "not selected",
-            "after careful consideration", "competitive selection process",
-            "thank you for your interest in", "appreciate your interest in"
-        ]
-        
-        has_application_indicators = any(indicator in text_combined for indicator in application_indicators)
+        has_application_indicators = bool(phrase_hits.get('application'))
         if not has_application_indicators:
-            print(f"   ❌ Missing specific application indicators")
-            return False
+            logger.debug("Missing specific application indicators")
+            return REJECT_NO_APPLICATION_INDICATORS
         
         # CHECK 2: Require technical or role-specific indicators
-        technical_indicators = [
-            "software engineer", "developer", "data scientist", "machine learning",
-            "artificial intelligence", "python", "java", "javascript", "react",
-            "node", "backend", "frontend", "fullstack", "devops", "cloud", "aws",
-            "azure", "database", "api", "web developer", "mobile developer",
-            "internship", "technical role", "engineering role", "product manager",
-            "ux designer", "data analyst", "research scientist",
-            # Additional technical role patterns
-            "software engineering", "engineering intern", "technical intern",
-            "intern", "graduate position", "entry level", "new grad"
-        ]
-        
-        has_technical_indicators = any(indicator in text_combined for indicator in technical_indicators)
+        has_technical_indicators = bool(phrase_hits.get('technical'))
         if not has_technical_indicators:
-            print(f"   ❌ Missing technical/role-specific indicators")
-            return False
+            logger.debug("Missing technical/role-specific indicators")
+            return REJECT_NO_TECHNICAL_INDICATORS
         
         # CHECK 3: Exclude obvious cold outreach or generic recruitment
-        outreach_indicators = [
-            "we found your resume", "came across your profile", 
-            "great opportunity for you", "thought you might be interested",
-            "perfect fit for you", "share an opportunity", "new openings",
-            "job opportunities", "career opportunities", "hiring now",
-            "job alert", "featured jobs", "unsubscribe"
-        ]
-        
-        has_outreach_indicators = any(phrase in text_combined for phrase in outreach_indicators)
+        has_outreach_indicators = bool(phrase_hits.get('outreach'))
         if has_outreach_indicators:
-            print(f"   ❌ Detected cold outreach or generic recruitment")
-            return False
+            logger.debug("Detected cold outreach or generic recruitment")
+            return REJECT_OUTREACH
+        return None
+
+    def _check_company(self, subject: str, full_text: str, sender: str) -> Tuple[Optional[str], Optional[str]]:
+        """Check 4, returning ``(rejection_reason, company)``"""
         
         # CHECK 4: Validate sender domain (but allow if company is in content)
-        company_from_content = self.extract_company_from_content(subject, body)
-        if company_from_content:
-            print(f"   ✅ Company found in content: {company_from_content} - allowing email from any domain")
+        company = self._extract_company(subject, full_text)
+        if company:
+            logger.debug("Company found in content: %s - allowing email from any domain", company)
         else:
             company = self.extract_company_from_email(sender)
             if not company:
-                print(f"   ❌ Invalid or generic sender domain and no company in content")
-                return False
+                logger.debug("Invalid or generic sender domain and no company in content")
+                return REJECT_NO_COMPANY, None
         
-        print(f"   ✅ Classified as actual application response (lightweight method)")
-        return True
+        logger.debug("Classified as actual application response (lightweight method)")
+        return None, company
 
-    def classify_application_status(self, subject: str, body: str) -> ApplicationStatus:
+    def classify_application_status(self, subject: str, body: str, phrase_hits: Optional[Dict[str, Set[str]]] = None) -> ApplicationStatus:
         """Classify application status using keyword matching only"""
         
-        text_combined = f"{subject} {body}".lower()
+        if phrase_hits is None:
+            phrase_hits = self.match_phrases(subject, body)
         
         # CHECK 1: Interview-specific keywords
-        interview_keywords = [
-            "schedule an interview", "interview invitation", "invite you to interview",
-            "next step is an interview", "interview for the position", 
-            "phone interview", "video interview", "technical interview",
-            "selected to move forward", "discuss your application in an interview",
-            "schedule a time to discuss", "interview with our team",
-            "arrange a convenient time for an interview"
-        ]
-        
-        if any(keyword in text_combined for keyword in interview_keywords):
-            print(f"   📞 Status: INTERVIEWING (keyword match)")
+        if phrase_hits.get('interview'):
+            logger.debug("Status: INTERVIEWING (keyword match)")
             return ApplicationStatus.INTERVIEWING
         
         # CHECK 2: Rejection keywords (enhanced for better detection)
-        rejection_keywords = [
-            "unfortunately", "regret to inform", "not selected", "not moving forward", 
-            "not the right fit", "other candidates", "will not be proceeding",
-            "thank you for your interest, however", "different direction", "unsuccessful",
-            # Additional rejection patterns
-            "will not be moving forward", "regret to inform you that we will not",
-            "after careful consideration, we regret", "competitive selection process",
-            "not advance to the next stage", "not proceed with your application",
-            "decided not to move forward", "pursue other candidates",
-            "this decision does not reflect negatively", "extremely competitive",
-            "we will not be moving forward with your application"
-        ]
-        
-        if any(keyword in text_combined for keyword in rejection_keywords):
-            print(f"   😞 Status: REJECTED (keyword match)")
+        if phrase_hits.get('rejection'):
+            logger.debug("Status: REJECTED (keyword match)")
             return ApplicationStatus.REJECTED
         
         # CHECK 3: Offer keywords
-        offer_keywords = [
-            "pleased to offer", "excited to offer", "happy to offer", "offer you the position", 
-            "job offer", "offer of employment", "start date", "stipend", "salary", 
-            "welcome to the team", "congratulations", "accepted for the position",
-            "we believe you would be a great addition", "confirm your acceptance",
-            "signing the attached form", "welcoming you to the team"
-        ]
-        
-        if any(keyword in text_combined for keyword in offer_keywords):
-            print(f"   🎉 Status: OFFERED (keyword match)")
+        if phrase_hits.get('offer'):
+            logger.debug("Status: OFFERED (keyword match)")
             return ApplicationStatus.OFFERED
         
         # Default to APPLIED
-        print(f"   📝 Status: APPLIED (default)")
+        logger.debug("Status: APPLIED (default)")
         return ApplicationStatus.APPLIED
 
     def extract_company_from_email(self, sender: str) -> Optional[str]:
         """Extract company name from email sender with strict validation"""
         
-        print(f"   🏢 Extracting company from: {sender}")
+        logger.debug("Extracting company from: %s", sender)
         
         sender_clean = sender.lower()
-        sender_clean = re.sub(r'^(no-reply|noreply|hr|careers|jobs|talent|recruiting)[@-]', '', sender_clean)
+        sender_clean = SENDER_PREFIX_PATTERN.sub('', sender_clean)
         
-        domain_match = re.search(r'@([a-zA-Z0-9.-]+)\.[a-zA-Z]{2,}', sender_clean)
+        domain_match = SENDER_DOMAIN_PATTERN.search(sender_clean)
         if not domain_match:
-            print(f"   ❌ No domain found")
+            logger.debug("No domain found")
             return None
             
         domain = domain_match.group(1)
         
-        skip_domains = [
-            'gmail', 'yahoo', 'outlook', 'hotmail', 'icloud', 'aol', 'mail',
-            'recruiting', 'staffing', 'jobvite', 'workday', 'greenhouse', 
-            'lever', 'bamboohr', 'indeed', 'linkedin', 'glassdoor', 'monster',
-            'ziprecruiter', 'careerbuilder', 'dice', 'talent.com'
-        ]
-        
-        if any(skip in domain.lower() for skip in skip_domains):
-            print(f"   ❌ Generic/recruiting platform domain: {domain}")
+        if any(skip in domain.lower() for skip in SKIP_DOMAINS):
+            logger.debug("Generic/recruiting platform domain: %s", domain)
             return None
         
         domain_parts = domain.split('.')
         main_domain = domain_parts[0]
         
         company = main_domain
-        company = re.sub(r'(corp|inc|llc|ltd|co)$', '', company, flags=re.IGNORECASE)
+        company = COMPANY_SUFFIX_PATTERN.sub('', company)
         
         if len(company) < 3:
-            print(f"   ❌ Company name too short: {company}")
+            logger.debug("Company name too short: %s", company)
             return None
         
         company = company.title()
-        print(f"   ✅ Extracted company: {company}")
+        logger.debug("Extracted company: %s", company)
         return company
 
     def extract_company_from_content(self, subject: str, body: str) -> Optional[str]:
         """Extract ONLY the core company name - no extra words"""
-        
-        print(f"   🏢 Attempting to extract company from email content...")
-        
         # Combine subject and body for searching
-        full_text = f"{subject} {body}"
+        return self._extract_company(subject, f"{subject} {body}")
+
+    def _extract_company(self, subject: str, full_text: str) -> Optional[str]:
+        logger.debug("Attempting to extract company from email content...")
         
         # STEP 1: Look for very specific, reliable patterns first
-        # Pattern 1: "at Company" - most reliable, now with word boundaries
-        at_company_patterns = [
-            r'\bat\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',  # "at Amazon", "at Google", etc. with word boundary
-            r'internship\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
-            r'position\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
-            r'role\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
-            r'working\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])'
-        ]
-        
-        for pattern in at_company_patterns:
-            matches = re.findall(pattern, full_text)
-            for company in matches:
+        for pattern in AT_COMPANY_PATTERNS:
+            for company in pattern.findall(full_text):
                 company = company.strip()
                 if self._is_valid_company_name(company):
-                    print(f"   ✅ Found company via 'at Company' pattern: {company}")
+                    logger.debug("Found company via 'at Company' pattern: %s", company)
                     return company
         
-        # Pattern 2: Company signatures - "Sincerely, Amazon Team"
-        signature_patterns = [
-            r'sincerely,?\s*(?:the\s+)?([A-Z][a-zA-Z]{2,15})(?:\s+team|\s+recruiting|\s*,)',
-            r'best\s+regards,?\s*(?:the\s+)?([A-Z][a-zA-Z]{2,15})(?:\s+team|\s+recruiting|\s*,)',
-            r'([A-Z][a-zA-Z]{2,15})\s+recruiting\s+team',
-            r'([A-Z][a-zA-Z]{2,15})\s+talent\s+team',
-            r'([A-Z][a-zA-Z]{2,15})\s+hr\s+team',
-            r'on\s+behalf\s+of\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])'
-        ]
-        
-        for pattern in signature_patterns:
-            matches = re.findall(pattern, full_text, re.IGNORECASE)
-            for company in matches:
+        for pattern in SIGNATURE_PATTERNS:
+            for company in pattern.findall(full_text):
                 company = company.strip()
                 if self._is_valid_company_name(company):
-                    print(f"   ✅ Found company via signature: {company}")
+                    logger.debug("Found company via signature: %s", company)
                     return company
         
-        # Pattern 3: Subject line patterns - more restrictive
-        subject_patterns = [
-            r'^([A-Z][a-zA-Z]{2,15})\s+(?:software|engineering|internship|position|role)(?:\s|$)',
-            r'([A-Z][a-zA-Z]{2,15})\s+(?:software\s+engineering|internship)\s*[-–]',
-            r'from\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
-            r'([A-Z][a-zA-Z]{2,15})\s*[-–]\s*(?:software|engineering|internship|position)',
-            # Add pattern for "Company Software Engineering" format
-            r'^([A-Z][a-zA-Z]{2,15})\s+Software\s+Engineering',
-            r'^([A-Z][a-zA-Z]{2,15})\s+Data\s+Science',
-            r'^([A-Z][a-zA-Z]{2,15})\s+Machine\s+Learning'
-        ]
-        
-        for pattern in subject_patterns:
-            matches = re.findall(pattern, subject)
-            for company in matches:
+        for pattern in SUBJECT_COMPANY_PATTERNS:
+            for company in pattern.findall(subject):
                 company = company.strip()
                 if self._is_valid_company_name(company):
-                    print(f"   ✅ Found company in subject: {company}")
+                    logger.debug("Found company in subject: %s", company)
                     return company
         
-        # Pattern 4: Email body context patterns
-        body_patterns = [
-            r'thank\s+you\s+for\s+applying\s+to\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
-            r'your\s+application\s+to\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
-            r'opportunity\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
-            r'career\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])',
-            r'join\s+(?:the\s+)?([A-Z][a-zA-Z]{2,15})\s+team(?:\s|$|[^\w])',
-            r'([A-Z][a-zA-Z]{2,15})\s+is\s+excited\s+to',
-            r'we\s+at\s+([A-Z][a-zA-Z]{2,15})(?:\s|$|[^\w])'
-        ]
-        
-        for pattern in body_patterns:
-            matches = re.findall(pattern, full_text, re.IGNORECASE)
-            for company in matches:
+        for pattern in BODY_COMPANY_PATTERNS:
+            for company in pattern.findall(full_text):
                 company = company.strip()
                 if self._is_valid_company_name(company):
-                    print(f"   ✅ Found company in body context: {company}")
+                    logger.debug("Found company in body context: %s", company)
                     return company
         
-        print(f"   ❌ No company found in email content")
+        logger.debug("No company found in email content")
         return None
 
     def _is_valid_company_name(self, company: str) -> bool:
@@ -284,155 +528,62 @@ class EmailClassifier:
         if len(company) < 3 or len(company) > 20:
             return False
         
-        # Expanded blacklist of common false positives
-        blacklist = {
-            # Common words
-            'thank', 'you', 'for', 'your', 'the', 'and', 'with', 'from', 'team',
-            'recruiting', 'we', 'our', 'this', 'that', 'next', 'step', 'process',
-            'application', 'position', 'role', 'internship', 'job', 'opportunity',
-            'interview', 'technical', 'phone', 'video', 'online', 'best', 'regards',
-            'sincerely', 'yours', 'kind', 'looking', 'forward', 'please', 'software',
-            'engineering', 'engineer', 'developer', 'data', 'science', 'machine',
-            # Action words that often get captured
-            'apply', 'applying', 'applied', 'contact', 'email', 'send', 'sent',
-            'receive', 'received', 'review', 'reviewed', 'consider', 'decision',
-            'thank you', 'thanks', 'hello', 'dear', 'hi',
-            # Time/status words
-            'update', 'status', 'current', 'future', 'recent', 'new', 'old',
-            'first', 'second', 'third', 'final', 'last', 'next', 'previous',
-            # Generic business words
-            'company', 'business', 'organization', 'group', 'department', 'division',
-            'office', 'headquarters', 'location', 'building', 'campus',
-            # Common false positive patterns
-            'subject', 'regarding', 'concerning', 'about', 'related', 'respect'
-        }
-        
-        if company.lower() in blacklist:
+        if company.lower() in COMPANY_BLACKLIST:
             return False
         
         # Must start with capital letter and contain only letters (no numbers/symbols)
-        if not re.match(r'^[A-Z][a-zA-Z]*$', company):
+        if not COMPANY_NAME_PATTERN.fullmatch(company):
             return False
         
-        # Additional checks for patterns that indicate it's not a company name
-        # Don't allow words that are clearly not company names
-        non_company_patterns = [
-            r'^(Dear|Hello|Hi|Thanks|Thank|Best|Kind|Sincerely|Regards|Please)$',
-            r'^(Software|Engineering|Technical|Interview|Application|Position)$',
-            r'^(Manager|Director|Representative|Coordinator|Specialist)$'
-        ]
-        
-        for pattern in non_company_patterns:
-            if re.match(pattern, company, re.IGNORECASE):
-                return False
-        
         return True
 
     def extract_position_from_content(self, subject: str, body: str) -> str:
         """Extract clean position title - no sentences or extra words"""
-        
-        print(f"   💼 Attempting to extract position from content...")
-        text_combined = f"{subject} {body}".lower()
-        
-        # Look for position patterns in the original case-sensitive text
         original_text = f"{subject} {body}"
+        return self._extract_position(original_text, original_text.lower())
+
+    def _extract_position(self, original_text: str, text_combined: str) -> str:
+        logger.debug("Attempting to extract position from content...")
         
         # STEP 1: Look for exact, well-defined position titles first
-        exact_position_patterns = [
-            # Most specific patterns first
-            r'\b(software\s+engineering?\s+intern(?:ship)?)\b',
-            r'\b(data\s+science?\s+intern(?:ship)?)\b',
-            r'\b(machine\s+learning\s+intern(?:ship)?)\b',
-            r'\b(web\s+development\s+intern(?:ship)?)\b',
-            r'\b(frontend\s+(?:engineer|developer)\s+intern(?:ship)?)\b',
-            r'\b(backend\s+(?:engineer|developer)\s+intern(?:ship)?)\b',
-            r'\b(fullstack\s+(?:engineer|developer)\s+intern(?:ship)?)\b',
-            r'\b(mobile\s+(?:engineer|developer)\s+intern(?:ship)?)\b',
-            r'\b(devops\s+intern(?:ship)?)\b',
-            r'\b(cloud\s+engineer\s+intern(?:ship)?)\b',
-            r'\b(product\s+manager\s+intern(?:ship)?)\b',
-            r'\b(ux\s+designer\s+intern(?:ship)?)\b',
-            r'\b(data\s+analyst\s+intern(?:ship)?)\b',
-            r'\b(research\s+intern(?:ship)?)\b',
-            
-            # General role patterns
-            r'\b(software\s+engineer)\b',
-            r'\b(data\s+scientist)\b',
-            r'\b(machine\s+learning\s+engineer)\b',
-            r'\b(frontend\s+(?:engineer|developer))\b',
-            r'\b(backend\s+(?:engineer|developer))\b',
-            r'\b(fullstack\s+(?:engineer|developer))\b',
-            r'\b(web\s+developer)\b',
-            r'\b(mobile\s+developer)\b',
-            r'\b(devops\s+engineer)\b',
-            r'\b(cloud\s+engineer)\b',
-            r'\b(product\s+manager)\b',
-            r'\b(ux\s+designer)\b',
-            r'\b(data\s+analyst)\b',
-            r'\b(research\s+scientist)\b'
-        ]
-        
-        for pattern in exact_position_patterns:
-            matches = re.finditer(pattern, original_text, re.IGNORECASE)
-            for match in matches:
-                position = match.group(1).strip()
-                
+        # One scan collects every title match, grouped by title priority
+        exact_matches = {}
+        for match in EXACT_POSITION_PATTERN.finditer(original_text):
+            exact_matches.setdefault(match.lastgroup, []).append(match.group())
+        
+        for i in range(len(EXACT_POSITION_TITLES)):
+            for position in exact_matches.get(f"title{i}", ()):
                 # Clean up and validate
-                position = self._clean_position_title(position)
+                position = self._clean_position_title(position.strip())
                 if position and self._is_valid_position_title(position):
-                    print(f"   ✅ Found exact position match: {position}")
+                    logger.debug("Found exact position match: %s", position)
                     return position
         
         # STEP 2: Look for position context patterns (more complex extraction)
-        context_patterns = [
-            # "for the X position" - extract just X
-            r'for\s+the\s+([a-zA-Z\s]+(?:intern(?:ship)?|engineer|developer|scientist|manager|designer|analyst))\s+(?:position|role)',
-            
-            # "X position at" - extract just X  
-            r'([a-zA-Z\s]+(?:intern(?:ship)?|engineer|developer|scientist|manager|designer|analyst))\s+(?:position|role)\s+at',
-            
-            # Subject line position extraction
-            r'^[^-]*?[-–]\s*([A-Za-z\s]+(?:intern(?:ship)?|engineer|developer|scientist|manager|designer|analyst))',
-            r'([A-Za-z\s]+(?:intern(?:ship)?|engineer|developer|scientist|manager|designer|analyst))\s*[-–]',
-            
-            # "apply for X" patterns
-            r'apply(?:ing)?\s+for\s+(?:the\s+|a\s+)?([a-zA-Z\s]+(?:intern(?:ship)?|engineer|developer|scientist|manager|designer|analyst))',
-            
-            # "thank you for applying to/for X"
-            r'thank\s+you\s+for\s+applying\s+(?:to|for)\s+(?:the\s+|a\s+)?([a-zA-Z\s]+(?:intern(?:ship)?|engineer|developer|scientist|manager|designer|analyst))'
-        ]
-        
-        for pattern in context_patterns:
-            matches = re.finditer(pattern, original_text, re.IGNORECASE)
-            for match in matches:
+        for pattern in CONTEXT_POSITION_PATTERNS:
+            for match in pattern.finditer(original_text):
                 position = match.group(1).strip()
                 
                 # Clean up and validate
                 position = self._clean_position_title(position)
                 if position and self._is_valid_position_title(position):
-                    print(f"   ✅ Found contextual position match: {position}")
+                    logger.debug("Found contextual position match: %s", position)
                     return position
         
         # STEP 3: Fallback to keyword matching
         if "internship" in text_combined:
             # Try to find what kind of internship
-            internship_types = [
-                "software engineering", "software development", "data science",
-                "machine learning", "web development", "frontend", "backend",
-                "fullstack", "mobile", "devops", "cloud", "product", "ux", "research"
-            ]
-            
-            for intern_type in internship_types:
+            for intern_type in INTERNSHIP_TYPES:
                 if intern_type in text_combined:
                     position = f"{intern_type.title()} Internship"
-                    print(f"   ✅ Found internship type: {position}")
+                    logger.debug("Found internship type: %s", position)
                     return position
             
-            print(f"   💼 Using generic position: Internship")
+            logger.debug("Using generic position: Internship")
             return "Internship"
         
         # Final fallback
-        print(f"   💼 Using default position: Software Engineer")
+        logger.debug("Using default position: Software Engineer")
         return "Software Engineer"
     
     def _clean_position_title(self, position: str) -> str:
@@ -441,13 +592,13 @@ class EmailClassifier:
             return ""
         
         # Remove common prefixes that get captured
-        position = re.sub(r'^(thank\s+you\s+for\s+applying\s+to\s+the\s+|the\s+|your\s+|our\s+|this\s+|that\s+|a\s+)', '', position, flags=re.IGNORECASE)
+        position = POSITION_PREFIX_PATTERN.sub('', position)
         
         # Remove common suffixes
-        position = re.sub(r'\s+(position|role|job|opportunity)$', '', position, flags=re.IGNORECASE)
+        position = POSITION_SUFFIX_PATTERN.sub('', position)
         
         # Normalize whitespace
-        position = re.sub(r'\s+', ' ', position).strip()
+        position = WHITESPACE_PATTERN.sub(' ', position).strip()
         
         # Title case
         position = position.title()
@@ -464,22 +615,12 @@ class EmailClassifier:
             return False
         
         # Must contain at least one of these role keywords
-        role_keywords = [
-            'intern', 'engineer', 'developer', 'scientist', 'manager', 
-            'designer', 'analyst', 'specialist', 'coordinator', 'lead'
-        ]
-        
-        if not any(keyword in position.lower() for keyword in role_keywords):
+        position_lower = position.lower()
+        if not any(keyword in position_lower for keyword in POSITION_ROLE_KEYWORDS):
             return False
         
         # Blacklist obvious false positives
-        position_blacklist = [
-            'thank you', 'thanks', 'please', 'hello', 'dear', 'regards',
-            'sincerely', 'best', 'looking forward', 'we are', 'you are',
-            'this is', 'that is', 'it is', 'there is', 'here is'
-        ]
-        
-        if any(bad_phrase in position.lower() for bad_phrase in position_blacklist):
+        if any(bad_phrase in position_lower for bad_phrase in POSITION_BLACKLIST):
             return False
         
         return True
@@ -1,213 +1,418 @@
-from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
-from app.db.supabase import supabase
 from app.models.job import ApplicationStatus
+from app.services.classification_cache import ClassificationCache, get_classification_cache
 from app.services.email_classifier import get_email_classifier
+from app.services.gmail_client import GmailClient
+from app.services.gmail_fetcher import (
+    fetch_messages, get_current_history_id, list_added_message_ids, iter_message_pages,
+    DEFAULT_BATCH_SIZE
+)
+from app.services.job_index import JobIndex
+from app.services.job_writer import JobWriter
+from app.services.metrics import MESSAGES_ACCEPTED, MESSAGES_SEEN, record_rejection, stage_timer
+from app.services.mime import extract_body
+from app.services.sync_state import load_checkpoint, save_checkpoint, record_failed, record_processed
+from app.models.sync_state import SyncCheckpoint
 import re
-import base64
-from datetime import datetime
-from typing import List, Dict
-import traceback
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Dict, Optional, Set, Tuple
+from collections import Counter
 from email.utils import parsedate_to_datetime
 
-async def parse_and_classify_emails(credentials: Credentials, user_id: str):
-    """Parse emails and classify job applications"""
+logger = logging.getLogger(__name__)
+
+# Search for job-related emails
+JOB_KEYWORDS = [
+    'application', 'interview', 'position', 'job', 'internship',
+    'career', 'opportunity', 'thank you for applying', 'hiring',
+    'recruitment', 'candidate', 'role'
+]
+JOB_SEARCH_QUERY = ' OR '.join([f'"{keyword}"' for keyword in JOB_KEYWORDS])
+
+BACKFILL_PAGE_SIZE = 100
+
+# An incremental sync searches from this long before the previous one, as
+# a message's date can be a little earlier than its arrival
+SEARCH_LOOKBACK = timedelta(days=1)
+# Gmail's largest messages.list page
+SEARCH_PAGE_SIZE = 500
+
+# Called as progress(messages_processed, messages_total); total is None when unknown
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+# The prefilter phase asks Gmail for only what the prefilter reads
+METADATA_HEADERS = ('Subject', 'From', 'Date')
+METADATA_FIELDS = 'id,labelIds,snippet,payload/headers'
+
+# Prefilter outcomes since startup: "checked", "passed" and one count per
+# rejection reason
+prefilter_counts = Counter()
+
+async def parse_and_classify_emails(credentials: Credentials, user_id: str, batch_size: int = DEFAULT_BATCH_SIZE, full_scan: bool = False, progress: Optional[ProgressCallback] = None):
+    """Parse emails and classify job applications
+
+    Syncs are incremental: only messages added since the user's last Gmail
+    historyId checkpoint that match the job search are classified, along
+    with any the previous sync failed to fetch. A full keyword scan runs on
+    the first sync, when ``full_scan`` is set, or when Gmail has expired the
+    stored history. ``progress`` is told how many messages are done after
+    each one.
+
+    Candidates with a cached verdict from the current classifier are not
+    fetched at all. The rest are fetched in two phases: headers and
+    snippet first, for the classifier's prefilter, then full bodies only
+    for the survivors.
+
+    Gmail is read through the async client; the blocking Supabase calls run
+    in worker threads so the event loop stays free for other syncs.
+
+    Errors are raised to the caller, and a failed sync leaves the
+    checkpoint where it was.
+    """
+    started = time.perf_counter()
     try:
-        print(f"\n=== STARTING EMAIL PARSING FOR USER: {user_id} ===")
+        logger.debug("Starting sync for user %s", user_id)
         
-        # Build Gmail service
-        service = build('gmail', 'v1', credentials=credentials)
-        print("✅ Gmail service built successfully")
+        client = GmailClient(credentials, user_id)
         
-        # Search for job-related emails
-        job_keywords = [
-            'application', 'interview', 'position', 'job', 'internship',
-            'career', 'opportunity', 'thank you for applying', 'hiring',
-            'recruitment', 'candidate', 'role'
-        ]
+        checkpoint = await asyncio.to_thread(load_checkpoint, user_id)
+        synced_at = datetime.now(timezone.utc)
+        message_ids, next_history_id = await list_candidate_message_ids(client, checkpoint, full_scan)
+        # Messages whose fetch failed last time get another go
+        message_ids = list(dict.fromkeys(checkpoint.failed_message_ids + message_ids))
         
-        # Create search query
-        query = ' OR '.join([f'"{keyword}"' for keyword in job_keywords])
-        print(f"\n📧 Search query: {query}")
+        # Skip anything an earlier sync already classified
+        already_processed = set(checkpoint.processed_message_ids)
+        message_ids = [message_id for message_id in message_ids if message_id not in already_processed]
+        logger.debug("%d emails left to classify after skipping processed ones", len(message_ids))
+        if progress:
+            progress(0, len(message_ids))
         
-        # Get messages
-        messages_result = service.users().messages().list(
-            userId='me', 
-            q=query,
-            maxResults=50  # Limit to recent emails
-        ).execute()
+        processed_jobs = []
         
-        messages = messages_result.get('messages', [])
-        print(f"📬 Found {len(messages)} potentially job-related emails")
+        # One read of the user's jobs serves every dedup lookup in this sync,
+        # and job changes are written in bulk once per fetch batch
+        writer = JobWriter(user_id, await asyncio.to_thread(JobIndex.load, user_id))
         
-        processed_jobs = []
+        cache = get_classification_cache()
+        uncached_ids, cached_ids = await apply_cached_verdicts(cache, user_id, message_ids, writer)
         
-        for i, message in enumerate(messages):
-            print(f"\n--- Processing email {i+1}/{len(messages)} ---")
-            
-            msg_detail = service.users().messages().get(
-                userId='me', 
-                id=message['id']
-            ).execute()
+        # Drop candidates whose metadata alone rules them out; rejected messages
+        # count as processed so no later sync looks at them again
+        survivor_ids, rejected_ids = await prefilter_messages(client, uncached_ids, batch_size)
+        newly_processed = cached_ids + rejected_ids
+        verdicts = dict.fromkeys(rejected_ids)
+        if progress:
+            progress(len(newly_processed), len(message_ids))
+        
+        # Fetch message bodies in batched requests instead of one call per message
+        fetched = fetch_messages(client, survivor_ids, batch_size=batch_size)
+        
+        seen = 0
+        failed_ids = []
+        async for message_id, msg_detail, fetch_error in fetched:
+            seen += 1
+            logger.debug("Processing email %d/%d", seen, len(survivor_ids))
             
-            # Extract email content
-            email_data = extract_email_data(msg_detail)
-            print(f"📧 Subject: {email_data['subject']}")
-            print(f"👤 From: {email_data['sender']}")
-            print(f"📅 Date: {email_data['date']}")
-            print(f"📄 Body preview: {email_data['body'][:200]}...")
+            if not fetch_error:
+                newly_processed.append(message_id)
+                verdicts[message_id] = process_message(msg_detail, writer)
+            elif is_deleted(fetch_error):
+                newly_processed.append(message_id)
+            else:
+                logger.warning("Could not fetch message %s, retrying next sync: %s", message_id, fetch_error)
+                failed_ids.append(message_id)
             
-            # Classify and extract job info
-            job_info = classify_email(email_data)
+            if seen % batch_size == 0:
+                processed_jobs.extend(await asyncio.to_thread(writer.flush))
+            if progress:
+                progress(len(message_ids) - len(survivor_ids) + seen, len(message_ids))
+        
+        processed_jobs.extend(await asyncio.to_thread(writer.flush))
+        
+        # Only remember verdicts and advance the checkpoint once every job
+        # write has gone through
+        await asyncio.to_thread(cache.store, user_id, verdicts)
+        record_processed(checkpoint, newly_processed)
+        # Every earlier failure was a candidate, so this sync's are the ones left
+        checkpoint.failed_message_ids = []
+        record_failed(checkpoint, failed_ids)
+        checkpoint.history_id = next_history_id
+        checkpoint.synced_at = synced_at
+        await asyncio.to_thread(save_checkpoint, checkpoint)
+        await asyncio.to_thread(cache.evict, user_id)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            for job in processed_jobs:
+                logger.debug("Saved job: %s - %s (%s)", job['company'], job['position'], job['status'])
+        
+        # The one record per sync at INFO
+        summary = {
+            "user_id": user_id,
+            "candidates": len(message_ids),
+            "cached": len(cached_ids),
+            "prefilter_rejected": len(rejected_ids),
+            "emails_processed": len(newly_processed),
+            "fetch_failed": len(failed_ids),
+            "jobs_processed": len(processed_jobs),
+            "duration_seconds": round(time.perf_counter() - started, 3),
+        }
+        logger.info(
+            "Sync finished for user %(user_id)s: %(candidates)d candidates, %(cached)d already judged, %(prefilter_rejected)d dropped "
+            "by the prefilter, %(emails_processed)d processed, %(fetch_failed)d left to retry, %(jobs_processed)d jobs saved in "
+            "%(duration_seconds).1fs", summary, extra=summary
+        )
+        
+        return processed_jobs
+        
+    except Exception:
+        # The caller records the failure with its traceback
+        logger.error("Sync failed for user %s", user_id)
+        raise
+
+async def backfill_emails(credentials: Credentials, user_id: str, page_size: int = BACKFILL_PAGE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE, restart: bool = False, progress: Optional[ProgressCallback] = None) -> Dict:
+    """Classify every matching email in the mailbox, not just the newest 50.
+
+    Pages flow through list -> fetch -> classify -> persist as lazy
+    generators, with one bulk job write per page, so only one list page and
+    one fetch batch are held in memory however large the inbox is. The page
+    token is checkpointed after each page, so a backfill that gets killed
+    resumes where it stopped. ``progress`` is told the running total of
+    emails after each page. Messages that can't be fetched are left for
+    the next incremental sync to retry. Errors are raised to the caller.
+    """
+    stats = {"pages": 0, "emails_processed": 0, "cached": 0, "prefilter_rejected": 0, "jobs_processed": 0, "complete": False}
+    started = time.perf_counter()
+    try:
+        logger.debug("Starting backfill for user %s", user_id)
+        
+        client = GmailClient(credentials, user_id)
+        checkpoint = await asyncio.to_thread(load_checkpoint, user_id)
+        
+        if restart:
+            checkpoint.backfill_page_token = None
+            checkpoint.backfill_complete = False
+        elif checkpoint.backfill_complete:
+            logger.info("Backfill for user %s already complete - nothing to do", user_id)
+            stats["complete"] = True
+            return stats
+        elif checkpoint.backfill_page_token:
+            logger.debug("Resuming backfill from page token %s", checkpoint.backfill_page_token)
+        
+        pages = iter_message_pages(client, JOB_SEARCH_QUERY, checkpoint.backfill_page_token, page_size)
+        writer = JobWriter(user_id, await asyncio.to_thread(JobIndex.load, user_id))
+        cache = get_classification_cache()
+        
+        async for message_ids, next_page_token in pages:
+            already_processed = set(checkpoint.processed_message_ids)
+            message_ids = [message_id for message_id in message_ids if message_id not in already_processed]
+            uncached_ids, cached_ids = await apply_cached_verdicts(cache, user_id, message_ids, writer)
+            survivor_ids, rejected_ids = await prefilter_messages(client, uncached_ids, batch_size)
+            newly_processed = cached_ids + rejected_ids
+            verdicts = dict.fromkeys(rejected_ids)
+            stats["cached"] += len(cached_ids)
+            stats["prefilter_rejected"] += len(rejected_ids)
             
-            if job_info:
-                print(f"✅ CLASSIFIED AS JOB APPLICATION:")
-                print(f"   🏢 Company: {job_info['company']}")
-                print(f"   💼 Position: {job_info['position']}")
-                print(f"   📊 Status: {job_info['status']}")
-                print(f"   📅 Applied: {job_info['applied_date']}")
+            failed_ids = []
+            async for message_id, msg_detail, fetch_error in fetch_messages(client, survivor_ids, batch_size=batch_size):
+                if fetch_error and not is_deleted(fetch_error):
+                    logger.warning("Could not fetch message %s, retrying next sync: %s", message_id, fetch_error)
+                    failed_ids.append(message_id)
+                    continue
                 
-                # Check if job already exists - try multiple matching strategies
-                existing_job = None
-                
-                # Strategy 1: Exact match on company and position
-                exact_match = supabase.table("jobs").select("*").eq(
-                    "user_id", user_id
-                ).eq(
-                    "company", job_info['company']
-                ).eq(
-                    "position", job_info['position']
-                ).execute()
-                
-                if exact_match.data:
-                    existing_job = exact_match.data[0]
-                    print(f"   📋 Found exact match: {job_info['company']} - {job_info['position']}")
-                else:
-                    # Strategy 2: Match on company only (for cases where position might vary slightly)
-                    company_match = supabase.table("jobs").select("*").eq(
-                        "user_id", user_id
-                    ).eq(
-                        "company", job_info['company']
-                    ).execute()
-                    
-                    if company_match.data:
-                        # If there's only one application at this company, update it
-                        if len(company_match.data) == 1:
-                            existing_job = company_match.data[0]
-                            print(f"   📋 Found company match: {job_info['company']} (updating position from '{existing_job['position']}' to '{job_info['position']}')")
-                        else:
-                            # Multiple applications at same company - look for similar positions
-                            for job in company_match.data:
-                                if (job['position'].lower() in job_info['position'].lower() or 
-                                    job_info['position'].lower() in job['position'].lower() or
-                                    'intern' in job['position'].lower() and 'intern' in job_info['position'].lower()):
-                                    existing_job = job
-                                    print(f"   📋 Found similar position match: {existing_job['position']} ≈ {job_info['position']}")
-                                    break
-                
-                if existing_job:
-                    # Job exists - check if we should update the status
-                    existing_status = existing_job['status']
-                    new_status = job_info['status']
-                    
-                    print(f"   📋 Existing job found:")
-                    print(f"      Current status: {existing_status}")
-                    print(f"      New email status: {new_status}")
-                    
-                    # Define status priority and valid transitions
-                    status_priority = {
-                        'applied': 1,
-                        'interviewing': 2,
-                        'offered': 3,
-                        'rejected': 2  # Rejection can happen from any stage
-                    }
-                    
-                    current_priority = status_priority.get(existing_status.lower(), 1)
-                    new_priority = status_priority.get(new_status.lower(), 1)
-                    
-                    # Update if new status has higher priority OR if it's a meaningful change
-                    should_update = (
-                        new_priority > current_priority or 
-                        (new_status.lower() == 'rejected' and existing_status.lower() != 'rejected') or
-                        (new_status.lower() == 'interviewing' and existing_status.lower() == 'applied') or
-                        (new_status.lower() == 'offered' and existing_status.lower() in ['applied', 'interviewing'])
-                    )
-                    
-                    if should_update:
-                        # Update existing record with new status and latest email date
-                        update_data = {
-                            "status": new_status,
-                            "applied_date": job_info['applied_date'],  # Update to latest email date
-                            "position": job_info['position']  # Update position if it was refined
-                        }
-                        
-                        updated_result = supabase.table("jobs").update(update_data).eq(
-                            "id", existing_job['id']
-                        ).execute()
-                        
-                        print(f"   ✅ UPDATED existing job status: {existing_status} → {new_status}")
-                        processed_jobs.append(updated_result.data[0])
-                    else:
-                        print(f"   ⚠️  No status update needed (current: {existing_status}, new: {new_status})")
-                else:
-                    # Create new job entry
-                    job_data = {
-                        "user_id": user_id,
-                        "company": job_info['company'],
-                        "position": job_info['position'],
-                        "status": job_info['status'],
-                        "applied_date": job_info['applied_date']
-                    }
-                    
-                    result = supabase.table("jobs").insert(job_data).execute()
-                    processed_jobs.append(result.data[0])
-                    print(f"   ✅ Successfully added NEW job to database!")
-            else:
-                print(f"❌ Not classified as job application (no company found or other criteria not met)")
+                newly_processed.append(message_id)
+                if not fetch_error:
+                    verdicts[message_id] = process_message(msg_detail, writer)
+            
+            # Persist the page's job changes before checkpointing past it
+            stats["jobs_processed"] += len(await asyncio.to_thread(writer.flush))
+            await asyncio.to_thread(cache.store, user_id, verdicts)
+            record_processed(checkpoint, newly_processed)
+            record_failed(checkpoint, failed_ids)
+            checkpoint.backfill_page_token = next_page_token
+            checkpoint.backfill_complete = next_page_token is None
+            await asyncio.to_thread(save_checkpoint, checkpoint)
+            
+            stats["pages"] += 1
+            stats["emails_processed"] += len(newly_processed)
+            logger.debug(
+                "Backfill page %d done: %d emails, %d jobs so far",
+                stats['pages'], len(newly_processed), stats['jobs_processed']
+            )
+            if progress:
+                progress(stats["emails_processed"], None)
         
-        print(f"\n=== EMAIL PARSING COMPLETE ===")
-        print(f"📊 Total emails processed: {len(messages)}")
-        print(f"💼 Jobs processed (new + updated): {len(processed_jobs)}")
-        print(f"🎯 Jobs processed details:")
-        for job in processed_jobs:
-            action = "UPDATED" if job.get('updated_at') else "ADDED"
-            print(f"   {action}: {job['company']} - {job['position']} ({job['status']})")
+        stats["complete"] = True
+        await asyncio.to_thread(cache.evict, user_id)
+        summary = dict(stats, user_id=user_id, duration_seconds=round(time.perf_counter() - started, 3))
+        logger.info(
+            "Backfill finished for user %(user_id)s: %(pages)d pages, %(emails_processed)d emails, "
+            "%(jobs_processed)d jobs saved in %(duration_seconds).1fs", summary, extra=summary
+        )
+        return stats
         
-        return processed_jobs
+    except Exception:
+        # Finished pages are checkpointed; the caller records the failure
+        logger.error("Backfill failed for user %s after %d pages", user_id, stats["pages"])
+        raise
+
+async def apply_cached_verdicts(cache: ClassificationCache, user_id: str, message_ids: List[str], writer: JobWriter) -> Tuple[List[str], List[str]]:
+    """Stage the job changes of messages the classifier has already judged.
+
+    Returns ``(uncached_ids, cached_ids)``; only the uncached messages need
+    fetching and classifying.
+    """
+    if not message_ids:
+        return [], []
+    
+    cached = await asyncio.to_thread(cache.lookup, user_id, message_ids)
+    for message_id, verdict in cached.items():
+        if verdict is not None:
+            stage_job(verdict, writer)
+    
+    if cached:
+        logger.debug("%d of %d emails already judged by this classifier", len(cached), len(message_ids))
+    return [message_id for message_id in message_ids if message_id not in cached], list(cached)
+
+async def prefilter_messages(client: GmailClient, message_ids: List[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[List[str], List[str]]:
+    """Phase one of a fetch: run the classifier's prefilter on message metadata.
+
+    Only the Subject/From/Date headers, labels and snippet are downloaded.
+    Returns ``(survivor_ids, rejected_ids)``, survivors in their original
+    order. Messages whose metadata can't be fetched survive, so the full
+    fetch gets another go at them.
+    """
+    classifier = get_email_classifier()
+    survivors = []
+    rejected = []
+    counts = Counter()
+    
+    fetched = fetch_messages(
+        client, message_ids, batch_size=batch_size, message_format='metadata',
+        metadata_headers=METADATA_HEADERS, fields=METADATA_FIELDS
+    )
+    async for message_id, metadata, fetch_error in fetched:
+        if fetch_error:
+            survivors.append(message_id)
+            continue
         
-    except Exception as e:
-        print(f"❌ ERROR parsing emails: {str(e)}")
-        print(f"Full traceback: {traceback.format_exc()}")
-        return []
+        headers = get_headers(metadata)
+        reason = classifier.prefilter(headers.get('Subject', ''), metadata.get('snippet', ''), metadata.get('labelIds', []))
+        counts["checked"] += 1
+        MESSAGES_SEEN.labels(check="prefilter").inc()
+        if reason:
+            counts[reason] += 1
+            record_rejection("prefilter", reason)
+            rejected.append(message_id)
+        else:
+            counts["passed"] += 1
+            survivors.append(message_id)
+    
+    prefilter_counts.update(counts)
+    if counts["checked"] and logger.isEnabledFor(logging.DEBUG):
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in counts.items() if reason not in ("checked", "passed"))
+        logger.debug("Prefilter kept %d of %d emails (%s)", len(survivors), len(message_ids), reasons or "none rejected")
+    return survivors, rejected
+
+def process_message(msg_detail: Dict, writer: JobWriter) -> Optional[Dict]:
+    """Classify one fetched message and stage the resulting job change.
+
+    Returns the classification, or ``None`` when the message is not an
+    application email.
+    """
+    # Extract email content
+    email_data = extract_email_data(msg_detail)
+    # Never the body: it is the user's private mail
+    logger.debug("Email %r from %r dated %s", email_data['subject'], email_data['sender'], email_data['date'])
+    
+    # Classify and extract job info
+    job_info = classify_email(email_data)
+    
+    if job_info:
+        stage_job(job_info, writer)
+    return job_info
+
+def stage_job(job_info: Dict, writer: JobWriter) -> Optional[Dict]:
+    """Stage the job change a classified email calls for.
+
+    The change is matched against ``writer``'s in-memory job index and
+    buffered; nothing is written until ``writer.flush()``.
+
+    Returns the staged job row, or ``None`` when the email changes nothing.
+    """
+    # Check if job already exists and stage the insert or status update
+    job, match_kind = writer.stage(job_info)
+    
+    if job is None:
+        logger.debug("No status update needed for %s (%s match, email says %s)", job_info['company'], match_kind, job_info['status'])
+    elif match_kind:
+        logger.debug("Staged status update for %s (%s match) -> %s", job_info['company'], match_kind, job['status'])
+    else:
+        logger.debug("Staged new job: %s - %s (%s)", job_info['company'], job_info['position'], job_info['status'])
+    return job
+
+async def list_candidate_message_ids(client: GmailClient, checkpoint: SyncCheckpoint, full_scan: bool = False) -> Tuple[List[str], str]:
+    """Return the message IDs this sync should look at and the next historyId"""
+    # Checkpoints from before synced_at was kept get one full scan
+    if checkpoint.history_id and checkpoint.synced_at and not full_scan:
+        added = await list_added_message_ids(client, checkpoint.history_id)
+        if added is not None:
+            added_ids, history_id = added
+            # History can't be searched, so keep the new messages the job search also finds
+            matching = await list_matching_message_ids(client, checkpoint.synced_at) if added_ids else set()
+            message_ids = [message_id for message_id in added_ids if message_id in matching]
+            logger.debug(
+                "Found %d new emails since history %s, %d of them job-related",
+                len(added_ids), checkpoint.history_id, len(message_ids)
+            )
+            return message_ids, history_id
+        logger.info("Gmail history %s has expired - falling back to a full scan", checkpoint.history_id)
+    
+    # Take the checkpoint before listing so mail arriving mid-sync is picked up next time
+    history_id = await get_current_history_id(client)
+    
+    with stage_timer('gmail_list'):
+        messages_result = await client.list_messages(
+            JOB_SEARCH_QUERY,
+            max_results=50  # Limit to recent emails
+        )
+    
+    messages = messages_result.get('messages', [])
+    logger.debug("Found %d potentially job-related emails", len(messages))
+    
+    return [message['id'] for message in messages], history_id
+
+async def list_matching_message_ids(client: GmailClient, since: datetime) -> Set[str]:
+    """IDs of messages matching the job search, dated from ``since`` less the lookback"""
+    after = int((since - SEARCH_LOOKBACK).timestamp())
+    matching = set()
+    async for message_ids, _ in iter_message_pages(client, f"({JOB_SEARCH_QUERY}) after:{after}", page_size=SEARCH_PAGE_SIZE):
+        matching.update(message_ids)
+    return matching
+
+def is_deleted(fetch_error: Exception) -> bool:
+    """Whether a fetch failed because the message no longer exists; retrying can't help"""
+    return getattr(fetch_error, 'status', None) == 404
+
+def get_headers(message) -> Dict[str, str]:
+    """Map header names to values for a Gmail message; later duplicates win"""
+    return {header['name']: header['value'] for header in message.get('payload', {}).get('headers', [])}
 
 def extract_email_data(message) -> Dict:
     """Extract relevant data from Gmail message"""
-    headers = message['payload'].get('headers', [])
+    headers = get_headers(message)
     
     # Get subject and sender
-    subject = ""
-    sender = ""
-    date = ""
-    
-    for header in headers:
-        if header['name'] == 'Subject':
-            subject = header['value']
-        elif header['name'] == 'From':
-            sender = header['value']
-        elif header['name'] == 'Date':
-            date = header['value']
+    subject = headers.get('Subject', "")
+    sender = headers.get('From', "")
+    date = headers.get('Date', "")
     
-    # Get email body
-    body = ""
-    if 'parts' in message['payload']:
-        for part in message['payload']['parts']:
-            if part['mimeType'] == 'text/plain':
-                if 'data' in part['body']:
-                    body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-                    break
-    else:
-        if message['payload']['body'].get('data'):
-            body = base64.urlsafe_b64decode(message['payload']['body']['data']).decode('utf-8')
+    # Get email body, from nested or HTML-only parts too, up to the byte budget
+    with stage_timer('body_decode'):
+        body = extract_body(message['payload'])
     
     return {
         'subject': subject,
@@ -224,7 +429,7 @@ def parse_email_date(date_string: str) -> str:
             parsed_date = parsedate_to_datetime(date_string)
             return parsed_date.isoformat()
     except Exception as e:
-        print(f"   ⚠️ Could not parse email date '{date_string}': {e}")
+        logger.warning("Could not parse email date %r: %s", date_string, e)
     
     # Fallback to current time
     return datetime.now().isoformat()
@@ -236,36 +441,23 @@ def classify_email(email_data: Dict) -> Dict:
     sender = email_data['sender']
     date = email_data['date']
     
-    print(f"   🔍 Starting NLP-based classification...")
-    
-    # First check: Is this actually an application response?
-    if not get_email_classifier().is_actual_application(subject, body, sender):
-        print(f"   ❌ Not an actual application response - skipping")
+    # Normalise, scan and extract everything in a single pass
+    analysis = get_email_classifier().analyze(subject, body, sender)
+    MESSAGES_SEEN.labels(check="classifier").inc()
+    if not analysis.is_application:
+        logger.debug("Not an application response (%s) - skipping", analysis.rejection_reason)
+        record_rejection("classifier", analysis.rejection_reason)
         return None
+    MESSAGES_ACCEPTED.inc()
     
-    # Extract company using improved logic
-    company = get_email_classifier().extract_company_from_content(subject, body)
-    if not company:
-        # Fall back to extracting from sender domain
-        company = get_email_classifier().extract_company_from_email(sender)
-        if not company:
-            print(f"   ❌ Could not extract valid company name from content or sender")
-            return None
-    
-    # Extract position using improved patterns
-    position = get_email_classifier().extract_position_from_content(subject, body)
-    
-    # Classify status using NLP sentiment analysis
-    status = get_email_classifier().classify_application_status(subject, body)
+    company = analysis.company
+    position = analysis.position
+    status = analysis.status
     
     # Parse the actual email date
     applied_date = parse_email_date(date)
     
-    print(f"   ✅ NLP Classification complete!")
-    print(f"   🏢 Final company: {company}")
-    print(f"   💼 Final position: {position}")
-    print(f"   📊 Final status: {status}")
-    print(f"   📅 Email date: {applied_date}")
+    logger.debug("Classified as %s: %s - %s, dated %s", status, company, position, applied_date)
     
     return {
         'company': company,
@@ -0,0 +1,254 @@
+"""Asyncio Gmail REST client.
+
+Talks to the Gmail API over a shared ``httpx.AsyncClient`` instead of
+googleapiclient, whose ``.execute()`` calls block the event loop. Every
+request waits for a per-user and a global concurrency slot, so many users'
+syncs can share one worker without tripping Gmail's per-user limits or
+opening unbounded connections. Rate limits and server errors are retried
+with exponential backoff.
+"""
+from app.services.credentials import get_credentials_manager
+from google.oauth2.credentials import Credentials
+from collections import Counter
+from email import message_from_string
+from email.parser import FeedParser
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+import asyncio
+import httpx
+import json
+import os
+import random
+import uuid
+import weakref
+
+GMAIL_API_URL = os.getenv("GMAIL_API_URL", "https://gmail.googleapis.com")
+
+# Gmail allows a handful of concurrent requests per user before answering
+# 429; the global cap bounds open connections for the whole process.
+GMAIL_MAX_CONCURRENCY = int(os.getenv("GMAIL_MAX_CONCURRENCY", "32"))
+GMAIL_MAX_CONCURRENCY_PER_USER = int(os.getenv("GMAIL_MAX_CONCURRENCY_PER_USER", "4"))
+
+REQUEST_TIMEOUT_SECONDS = 30
+MAX_BACKOFF_SECONDS = 32
+
+# Status codes worth retrying, for whole requests and for items in a batch
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# 429s seen across every user, by where they came from; the sync scheduler
+# watches the total to back off before Gmail's project-wide quota runs out
+rate_limit_counts = Counter()
+
+class GmailApiError(Exception):
+    """A Gmail API call, or one item of a batch, failed with an HTTP error"""
+
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(f"Gmail API error {status}: {message}")
+        self.status = status
+
+    @classmethod
+    def from_payload(cls, status: int, payload) -> "GmailApiError":
+        message = ""
+        if isinstance(payload, dict):
+            message = payload.get("error", {}).get("message", "")
+        return cls(status, message)
+
+class GmailPool:
+    """Connections and concurrency limits shared by every client on one event loop"""
+
+    def __init__(
+        self,
+        max_concurrency: int = GMAIL_MAX_CONCURRENCY,
+        max_concurrency_per_user: int = GMAIL_MAX_CONCURRENCY_PER_USER,
+        base_url: str = GMAIL_API_URL,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.max_concurrency_per_user = max_concurrency_per_user
+        # Keep-alive connections are reused across requests and users
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            transport=transport
+        )
+        self.global_limit = asyncio.Semaphore(max_concurrency)
+        # A user's semaphore lives as long as some client still holds it
+        self._user_limits: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+    def user_limit(self, user_id: str) -> asyncio.Semaphore:
+        limit = self._user_limits.get(user_id)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_concurrency_per_user)
+            self._user_limits[user_id] = limit
+        return limit
+
+    async def aclose(self):
+        await self.http.aclose()
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, GmailPool]" = weakref.WeakKeyDictionary()
+
+def get_gmail_pool() -> GmailPool:
+    """Return the pool for the running event loop, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = GmailPool()
+    return pool
+
+class GmailClient:
+    """One user's view of the Gmail API"""
+
+    def __init__(
+        self,
+        credentials: Credentials,
+        user_id: str,
+        pool: Optional[GmailPool] = None,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0
+    ):
+        self.credentials = credentials
+        self.user_id = user_id
+        self.pool = pool or get_gmail_pool()
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._user_limit = self.pool.user_limit(user_id)
+        self._refresh_lock = asyncio.Lock()
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send one request, refreshing the token and retrying transient failures"""
+        headers = kwargs.pop("headers", {})
+        attempt = 0
+        refreshed = False
+
+        while True:
+            if not self.credentials.valid:
+                await self._refresh_token(self.credentials.token)
+
+            token = self.credentials.token
+            response = None
+            error = None
+            async with self._user_limit, self.pool.global_limit:
+                try:
+                    response = await self.pool.http.request(
+                        method, path,
+                        headers={**headers, "Authorization": f"Bearer {token}"},
+                        **kwargs
+                    )
+                except httpx.TransportError as e:
+                    error = e
+
+            if response is not None:
+                if response.status_code == 401 and not refreshed:
+                    # The stored token was revoked or expired early
+                    await self._refresh_token(token)
+                    refreshed = True
+                    continue
+                if response.status_code < 400:
+                    return response
+                if response.status_code == 429:
+                    rate_limit_counts['requests'] += 1
+                if response.status_code not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+                    raise GmailApiError.from_payload(response.status_code, _json_or_none(response))
+            elif attempt >= self.max_retries:
+                raise error
+
+            await asyncio.sleep(self._backoff_delay(attempt, response))
+            attempt += 1
+
+    async def get_json(self, path: str, **params) -> Dict:
+        params = {key: value for key, value in params.items() if value is not None}
+        response = await self.request("GET", f"/gmail/v1/users/me{path}", params=params)
+        return response.json()
+
+    async def get_profile(self) -> Dict:
+        return await self.get_json("/profile")
+
+    async def list_history(self, start_history_id: str, page_token: Optional[str] = None, **params) -> Dict:
+        return await self.get_json("/history", startHistoryId=start_history_id, pageToken=page_token, **params)
+
+    async def list_messages(self, query: str, max_results: int = 100, page_token: Optional[str] = None) -> Dict:
+        return await self.get_json("/messages", q=query, maxResults=max_results, pageToken=page_token)
+
+    async def get_message(self, message_id: str, format: str = 'full') -> Dict:
+        return await self.get_json(f"/messages/{quote(message_id, safe='')}", format=format)
+
+    async def batch_get_messages(
+        self,
+        message_ids: List[str],
+        format: str = 'full',
+        metadata_headers: Optional[Iterable[str]] = None,
+        fields: Optional[str] = None
+    ) -> Dict[str, Tuple[int, Dict]]:
+        """Get several messages in one batch request.
+
+        ``metadata_headers`` limits which headers ``format='metadata'``
+        returns and ``fields`` is a partial-response mask, so callers can ask
+        for only what they read. Returns ``{message_id: (status, payload)}``;
+        items fail independently, so callers must check each status.
+        """
+        boundary = f"batch_{uuid.uuid4().hex}"
+        params = {"format": format}
+        if metadata_headers:
+            params["metadataHeaders"] = list(metadata_headers)
+        if fields:
+            params["fields"] = fields
+        query = urlencode(params, doseq=True)
+        parts = [
+            f"--{boundary}\r\n"
+            f"Content-Type: application/http\r\n"
+            f"Content-ID: <{index}>\r\n\r\n"
+            f"GET /gmail/v1/users/me/messages/{quote(message_id, safe='')}?{query}\r\n\r\n"
+            for index, message_id in enumerate(message_ids)
+        ]
+        parts.append(f"--{boundary}--")
+
+        response = await self.request(
+            "POST", "/batch/gmail/v1",
+            content="".join(parts).encode("utf-8"),
+            headers={"Content-Type": f"multipart/mixed; boundary={boundary}"}
+        )
+
+        results = {}
+        for content_id, status, payload in _parse_batch_response(response):
+            index = int(content_id.strip("<>").replace("response-", "", 1))
+            results[message_ids[index]] = (status, payload)
+        return results
+
+    async def _refresh_token(self, stale_token: Optional[str]):
+        async with self._refresh_lock:
+            # Another request may have refreshed while we waited for the lock
+            if self.credentials.token != stale_token and self.credentials.valid:
+                return
+            # The manager serialises refreshes across every sync of this user
+            # and stores the new token
+            await asyncio.to_thread(
+                get_credentials_manager().refresh, self.user_id, self.credentials, stale_token
+            )
+
+    def _backoff_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_BACKOFF_SECONDS)
+        # Full jitter keeps concurrent syncs from retrying in lockstep
+        return random.uniform(0, min(self.backoff_seconds * (2 ** attempt), MAX_BACKOFF_SECONDS))
+
+def _parse_batch_response(response: httpx.Response):
+    """Yield ``(content_id, status, payload)`` for each part of a batch response"""
+    envelope = message_from_string(f"Content-Type: {response.headers['content-type']}\r\n\r\n{response.text}")
+    for part in envelope.get_payload():
+        # Each part is a complete HTTP response: status line, headers, body
+        status_line, rest = part.get_payload().split("\n", 1)
+        parser = FeedParser()
+        parser.feed(rest)
+        body = parser.close().get_payload()
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = None
+        yield part["Content-ID"], int(status_line.split(" ", 2)[1]), payload
+
+def _json_or_none(response: httpx.Response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
@@ -0,0 +1,187 @@
+from app.services.gmail_client import GmailApiError, GmailClient, RETRYABLE_STATUSES, rate_limit_counts
+from app.services.metrics import stage_timer
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import os
+
+# Gmail accepts up to 100 calls per batch, but large batches trip the per-user
+# rate limit much sooner, so we default to Google's recommended 50.
+MAX_BATCH_SIZE = 100
+DEFAULT_BATCH_SIZE = int(os.getenv("GMAIL_BATCH_SIZE", "50"))
+
+# Batches fetched ahead of the one being classified
+DEFAULT_PREFETCH = 2
+
+FetchResult = Tuple[str, Optional[Dict], Optional[Exception]]
+
+async def fetch_messages(
+    client: GmailClient,
+    message_ids: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    message_format: str = 'full',
+    max_retries: int = 2,
+    backoff_seconds: float = 1.0,
+    prefetch: int = DEFAULT_PREFETCH,
+    metadata_headers: Optional[Sequence[str]] = None,
+    fields: Optional[str] = None
+) -> AsyncIterator[FetchResult]:
+    """Fetch Gmail messages using batch HTTP requests.
+
+    Yields ``(message_id, message, error)`` in the order the IDs were given.
+    Exactly one of ``message`` and ``error`` is set, so one bad message never
+    aborts the rest of its batch. Items that fail with a rate limit or server
+    error are retried in a follow-up batch with exponential backoff. Up to
+    ``prefetch`` batches are in flight while the caller works through the
+    current one. ``metadata_headers`` and ``fields`` are passed through to
+    every request to trim what Gmail sends back.
+    """
+    if not 1 <= batch_size <= MAX_BATCH_SIZE:
+        raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+
+    id_iter = iter(message_ids)
+    in_flight = deque()
+
+    def schedule():
+        chunk = list(islice(id_iter, batch_size))
+        if chunk:
+            task = asyncio.ensure_future(_fetch_batch(
+                client, chunk, message_format, max_retries, backoff_seconds, metadata_headers, fields
+            ))
+            in_flight.append((chunk, task))
+
+    try:
+        for _ in range(max(1, prefetch)):
+            schedule()
+
+        while in_flight:
+            chunk, task = in_flight.popleft()
+            results = await task
+            schedule()
+            for message_id in chunk:
+                message, error = results[message_id]
+                yield message_id, message, error
+    finally:
+        # The caller stopped early; don't leave batches running behind it
+        for _, task in in_flight:
+            task.cancel()
+
+async def _fetch_batch(
+    client: GmailClient,
+    message_ids: List[str],
+    message_format: str,
+    max_retries: int,
+    backoff_seconds: float,
+    metadata_headers: Optional[Sequence[str]] = None,
+    fields: Optional[str] = None
+) -> Dict[str, Tuple[Optional[Dict], Optional[Exception]]]:
+    """Fetch one chunk of messages, retrying transient per-item failures"""
+    results = {}
+    # Batch request IDs must be unique within a batch
+    pending = list(dict.fromkeys(message_ids))
+    attempt = 0
+    stage = 'metadata_fetch' if message_format == 'metadata' else 'message_fetch'
+
+    while pending:
+        failed = {}
+        try:
+            with stage_timer(stage):
+                responses = await client.batch_get_messages(
+                    pending, format=message_format, metadata_headers=metadata_headers, fields=fields
+                )
+        except GmailApiError as e:
+            # The whole batch was refused even after the client's own
+            # retries - treat it as a final failure of every item
+            for message_id in pending:
+                results[message_id] = (None, e)
+            break
+
+        for message_id in pending:
+            status, payload = responses.get(message_id, (500, None))
+            if status == 200:
+                results[message_id] = (payload, None)
+            else:
+                failed[message_id] = GmailApiError.from_payload(status, payload)
+                if status == 429:
+                    rate_limit_counts['batch_items'] += 1
+
+        can_retry = attempt < max_retries
+        pending = [
+            message_id for message_id, error in failed.items()
+            if can_retry and error.status in RETRYABLE_STATUSES
+        ]
+        for message_id, error in failed.items():
+            if message_id not in pending:
+                results[message_id] = (None, error)
+
+        if pending:
+            await asyncio.sleep(backoff_seconds * (2 ** attempt))
+            attempt += 1
+
+    return results
+
+async def get_current_history_id(client: GmailClient) -> str:
+    """Return the mailbox's latest historyId, used as the next sync checkpoint"""
+    with stage_timer('gmail_list'):
+        profile = await client.get_profile()
+    return profile['historyId']
+
+async def list_added_message_ids(client: GmailClient, start_history_id: str) -> Optional[Tuple[List[str], str]]:
+    """List IDs of messages added since ``start_history_id``, under any label.
+
+    Filters may file mail away from the inbox as it arrives, so no label
+    is required; callers narrow the result down themselves.
+
+    Returns ``(message_ids, latest_history_id)``, or ``None`` when Gmail no
+    longer has history that far back and the caller must do a full scan.
+    """
+    message_ids = []
+    latest_history_id = start_history_id
+    page_token = None
+
+    while True:
+        try:
+            with stage_timer('gmail_list'):
+                response = await client.list_history(
+                    start_history_id,
+                    page_token=page_token,
+                    historyTypes='messageAdded'
+                )
+        except GmailApiError as e:
+            if e.status == 404:
+                return None
+            raise
+
+        for record in response.get('history', []):
+            for added in record.get('messagesAdded', []):
+                message_ids.append(added['message']['id'])
+
+        latest_history_id = response.get('historyId', latest_history_id)
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+
+    return list(dict.fromkeys(message_ids)), latest_history_id
+
+async def iter_message_pages(
+    client: GmailClient,
+    query: str,
+    page_token: Optional[str] = None,
+    page_size: int = 100
+) -> AsyncIterator[Tuple[List[str], Optional[str]]]:
+    """Walk every message matching ``query`` one list page at a time.
+
+    Yields ``(message_ids, next_page_token)``; the token is what a caller
+    should save to resume after that page, and is ``None`` on the last one.
+    Pages are only requested as the consumer asks for them.
+    """
+    while True:
+        with stage_timer('gmail_list'):
+            response = await client.list_messages(query, max_results=page_size, page_token=page_token)
+
+        page_token = response.get('nextPageToken')
+        yield [message['id'] for message in response.get('messages', [])], page_token
+
+        if not page_token:
+            return
@@ -0,0 +1,25 @@
+"""Google API service objects built from cached discovery documents.
+
+``googleapiclient.discovery.build`` reads and parses the API's discovery
+document on every call, and may fetch it over the network. Here the
+documents bundled with googleapiclient are parsed once per process. Each
+call then only binds the caller's credentials, and nothing is ever
+fetched, so building a service works offline.
+"""
+from functools import lru_cache
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+from typing import Dict
+import json
+
+@lru_cache(maxsize=None)
+def get_discovery_document(api: str, version: str) -> Dict:
+    """Return the parsed discovery document for ``api``/``version``"""
+    document = discovery_cache.get_static_doc(api, version)
+    if document is None:
+        raise ValueError(f"No bundled discovery document for {api} {version}")
+    return json.loads(document)
+
+def build_service(api: str, version: str, credentials=None, **kwargs):
+    """Drop-in for ``build(api, version, credentials=...)`` without the per-call parse"""
+    return build_from_document(get_discovery_document(api, version), credentials=credentials, **kwargs)
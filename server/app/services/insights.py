@@ -0,0 +1,247 @@
+"""Per-user application insights, kept up to date as jobs change.
+
+Aggregates live in the ``job_insights`` table:
+
+    user_id              text primary key references users(id)
+    status_counts        jsonb   -- status -> jobs currently in it
+    weekly_applications  jsonb   -- Monday of the week -> jobs first applied for that week
+    response_days        jsonb   -- outcome status -> whole days after applying -> jobs
+    revision             bigint  -- changes on every write
+    stale                boolean not null default false
+    updated_at           timestamptz
+
+Every write to ``jobs`` reports its ``(before, after)`` rows here, and the
+aggregates are adjusted instead of recomputed, so reading insights never
+scans the jobs table. Weeks come from a job's ``first_applied_date``,
+which later emails don't move (unlike ``applied_date``), so a rebuild
+from ``jobs`` files each job in the same week the updates did. Jobs saved
+before that column existed fall back to ``applied_date``. A user without a row yet gets one built from their
+jobs once. Response times can't be recovered from the jobs table, so only
+responses seen after that count towards them.
+
+Any worker may adjust a user's row, so updates are conditional on the
+``revision`` they read and are retried from a fresh read when another
+write got there first. A change that can't be applied marks the row
+``stale``, and the next read or update rebuilds the counts from ``jobs``.
+Reads aren't cached here; the response cache in front of the insights
+endpoint already is, and it is invalidated on every change.
+"""
+from app.db.supabase import supabase
+from app.models.insights import Insights, WeeklyCount
+from app.models.job import ApplicationStatus
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import secrets
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Conditional writes tried per update before giving up on it
+MAX_UPDATE_ATTEMPTS = 5
+
+JobChange = Tuple[Optional[Dict], Dict]
+
+class InsightsStore:
+    """Loads, adjusts and saves each user's insight aggregates"""
+
+    def __init__(self, client=supabase, max_attempts: int = MAX_UPDATE_ATTEMPTS):
+        self.client = client
+        self.max_attempts = max_attempts
+
+    def get(self, user_id: str) -> Insights:
+        """Return the user's insights"""
+        for _ in range(self.max_attempts):
+            row = self._read(user_id)
+            if row is not None and not row.get('stale'):
+                return summarize(_aggregates(row))
+            aggregates = self._rebuild(user_id, row)
+            if aggregates is not None:
+                return summarize(aggregates)
+        raise RuntimeError(f"Insights for user {user_id} kept changing while being rebuilt")
+
+    def record(self, user_id: str, changes: Iterable[JobChange]):
+        """Apply job changes that have already been written to ``jobs``.
+
+        Each change is ``(before, after)``, with ``before`` ``None`` for a
+        new job. A failure is logged rather than raised, because the jobs
+        themselves were saved; the row is marked stale so the next read
+        rebuilds it from them.
+        """
+        changes = list(changes)
+        if not changes:
+            return
+
+        try:
+            for _ in range(self.max_attempts):
+                row = self._read(user_id)
+                if row is None or row.get('stale'):
+                    # A rebuild reads the jobs after these changes were written
+                    if self._rebuild(user_id, row) is not None:
+                        return
+                    continue
+                aggregates = _aggregates(row)
+                for before, after in changes:
+                    apply_change(aggregates, before, after)
+                if self._write(user_id, aggregates, row['revision']):
+                    return
+            raise RuntimeError(f"Insights for user {user_id} kept changing under the update")
+        except Exception:
+            logger.exception("Could not update insights for user %s", user_id)
+            self._mark_stale(user_id)
+
+    def _read(self, user_id: str) -> Optional[Dict]:
+        response = self.client.table("job_insights").select("*").eq("user_id", user_id).execute()
+        return response.data[0] if response.data else None
+
+    def _rebuild(self, user_id: str, row: Optional[Dict]) -> Optional[Dict]:
+        """Recount from ``jobs`` and save; ``None`` if another write got there first"""
+        logger.info("Building insights for user %s from their jobs", user_id)
+        response = self.client.table("jobs").select("status,applied_date,first_applied_date").eq("user_id", user_id).execute()
+        aggregates = empty_aggregates()
+        for job in response.data or []:
+            apply_change(aggregates, None, job)
+
+        if row is None:
+            saved = self.client.table("job_insights").upsert({
+                "user_id": user_id,
+                **aggregates,
+                "revision": _new_revision(),
+                "updated_at": datetime.now().isoformat()
+            }, on_conflict="user_id", ignore_duplicates=True).execute()
+            return aggregates if saved.data else None
+
+        # Response times aren't in the jobs table; keep the ones counted so far
+        aggregates['response_days'] = row.get('response_days') or {}
+        return aggregates if self._write(user_id, aggregates, row['revision'], stale=False) else None
+
+    def _write(self, user_id: str, aggregates: Dict, revision: int, **columns) -> bool:
+        """Save ``aggregates`` if the row is still at ``revision``; whether it was"""
+        response = (
+            self.client.table("job_insights")
+            .update({
+                **aggregates,
+                **columns,
+                "revision": _new_revision(),
+                "updated_at": datetime.now().isoformat()
+            })
+            .eq("user_id", user_id)
+            .eq("revision", revision)
+            .execute()
+        )
+        return bool(response.data)
+
+    def _mark_stale(self, user_id: str):
+        try:
+            # A new revision also fails any write already working from the old one
+            (
+                self.client.table("job_insights")
+                .update({"stale": True, "revision": _new_revision()})
+                .eq("user_id", user_id)
+                .execute()
+            )
+        except Exception:
+            logger.exception("Could not mark insights for user %s for rebuilding", user_id)
+
+def _new_revision() -> int:
+    return secrets.randbits(62)
+
+def _aggregates(row: Dict) -> Dict:
+    return {
+        "status_counts": row.get('status_counts') or {},
+        "weekly_applications": row.get('weekly_applications') or {},
+        "response_days": row.get('response_days') or {}
+    }
+
+def empty_aggregates() -> Dict:
+    return {"status_counts": {}, "weekly_applications": {}, "response_days": {}}
+
+def apply_change(aggregates: Dict, before: Optional[Dict], after: Dict):
+    """Adjust ``aggregates`` for one job going from ``before`` to ``after``"""
+    status_counts = aggregates['status_counts']
+    new_status = _status(after)
+
+    if before is None:
+        week = week_start(after.get('first_applied_date') or after['applied_date'])
+        weekly = aggregates['weekly_applications']
+        weekly[week] = weekly.get(week, 0) + 1
+    else:
+        old_status = _status(before)
+        status_counts[old_status] = max(0, status_counts.get(old_status, 0) - 1)
+
+        # The first reply moves a job off "applied"; the job's date is then the reply's
+        if old_status == ApplicationStatus.APPLIED.value and new_status != old_status:
+            waited = parse_date(after['applied_date']) - parse_date(before['applied_date'])
+            days = str(max(0, waited.days))
+            histogram = aggregates['response_days'].setdefault(new_status, {})
+            histogram[days] = histogram.get(days, 0) + 1
+
+    status_counts[new_status] = status_counts.get(new_status, 0) + 1
+
+def summarize(aggregates: Dict) -> Insights:
+    """Turn stored aggregates into the figures the dashboard shows"""
+    status_counts = {status.value: 0 for status in ApplicationStatus}
+    status_counts.update({status: count for status, count in aggregates['status_counts'].items() if count})
+    total = sum(status_counts.values())
+
+    response_days = aggregates['response_days']
+    all_responses: Dict[str, int] = {}
+    for histogram in response_days.values():
+        for days, count in histogram.items():
+            all_responses[days] = all_responses.get(days, 0) + count
+
+    return Insights(
+        total=total,
+        status_counts=status_counts,
+        response_rate=(total - status_counts[ApplicationStatus.APPLIED.value]) / total if total else None,
+        weekly_applications=[
+            WeeklyCount(week=week, count=count)
+            for week, count in sorted(aggregates['weekly_applications'].items())
+        ],
+        median_days_to_response=histogram_median(all_responses),
+        median_days_to_rejection=histogram_median(response_days.get(ApplicationStatus.REJECTED.value, {}))
+    )
+
+def histogram_median(histogram: Dict[str, int]) -> Optional[float]:
+    """Median of the values counted in a ``{value: count}`` histogram"""
+    total = sum(histogram.values())
+    if not total:
+        return None
+
+    # The median is the mean of the values at these two ranks (equal for odd totals)
+    wanted = [(total - 1) // 2, total // 2]
+    found: List[int] = []
+    seen = 0
+    for value, count in sorted(((int(value), count) for value, count in histogram.items())):
+        seen += count
+        while wanted and wanted[0] < seen:
+            found.append(value)
+            wanted.pop(0)
+    return sum(found) / len(found)
+
+def week_start(value) -> str:
+    """The Monday of the week ``value`` falls in, as YYYY-MM-DD"""
+    date = parse_date(value)
+    return (date - timedelta(days=date.weekday())).date().isoformat()
+
+def parse_date(value) -> datetime:
+    """Parse a stored job date into a naive UTC datetime"""
+    date = value if isinstance(value, datetime) else datetime.fromisoformat(value)
+    if date.tzinfo is not None:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+def _status(job: Dict) -> str:
+    status = job['status']
+    return (status.value if isinstance(status, ApplicationStatus) else status).lower()
+
+insights_store = None
+_store_lock = threading.Lock()
+
+def get_insights_store() -> InsightsStore:
+    global insights_store
+    # Called from sync worker threads as well as request handlers
+    with _store_lock:
+        if insights_store is None:
+            insights_store = InsightsStore()
+        return insights_store
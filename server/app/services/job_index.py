@@ -0,0 +1,91 @@
+from app.db.supabase import supabase
+from app.services.metrics import stage_timer
+from typing import Dict, List, Optional, Tuple
+
+# How find() matched an existing job
+MATCH_EXACT = "exact"
+MATCH_COMPANY = "company"
+MATCH_SIMILAR_POSITION = "similar_position"
+
+def normalize_key(value: str) -> str:
+    """Case- and whitespace-insensitive key for company and position names"""
+    return ' '.join(value.split()).casefold()
+
+class JobIndex:
+    """A user's jobs, read once per sync and matched in memory.
+
+    Replaces the per-email Supabase lookups the sync used to run. The index
+    is kept current as the sync inserts and updates jobs, so later emails in
+    the same sync see earlier changes.
+    """
+
+    def __init__(self, jobs: List[Dict]):
+        self._by_company: Dict[str, List[Dict]] = {}
+        self._by_company_position: Dict[Tuple[str, str], Dict] = {}
+        for job in jobs:
+            self.add(job)
+
+    @classmethod
+    def load(cls, user_id: str) -> "JobIndex":
+        with stage_timer("db_read"):
+            response = supabase.table("jobs").select("*").eq("user_id", user_id).execute()
+        return cls(response.data or [])
+
+    def __len__(self) -> int:
+        return sum(len(jobs) for jobs in self._by_company.values())
+
+    def add(self, job: Dict):
+        company_key = normalize_key(job['company'])
+        self._by_company.setdefault(company_key, []).append(job)
+        self._by_company_position.setdefault((company_key, normalize_key(job['position'])), job)
+
+    def remove(self, job: Dict):
+        company_key = normalize_key(job['company'])
+        jobs = self._by_company.get(company_key, [])
+        jobs[:] = [existing for existing in jobs if existing is not job]
+        if not jobs:
+            self._by_company.pop(company_key, None)
+
+        position_key = (company_key, normalize_key(job['position']))
+        if self._by_company_position.get(position_key) is job:
+            del self._by_company_position[position_key]
+            # Another job with the same company and position takes its place
+            for existing in jobs:
+                if normalize_key(existing['position']) == position_key[1]:
+                    self._by_company_position[position_key] = existing
+                    break
+
+    def replace(self, old_job: Dict, new_job: Dict):
+        self.remove(old_job)
+        self.add(new_job)
+
+    def find(self, company: str, position: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """Find the job an email about ``company``/``position`` refers to.
+
+        Returns ``(job, match_kind)``, or ``(None, None)`` for a new job.
+        """
+        company_key = normalize_key(company)
+        position_key = normalize_key(position)
+
+        # Strategy 1: Exact match on company and position
+        exact_match = self._by_company_position.get((company_key, position_key))
+        if exact_match:
+            return exact_match, MATCH_EXACT
+
+        # Strategy 2: Match on company only (for cases where position might vary slightly)
+        company_jobs = self._by_company.get(company_key, [])
+
+        # If there's only one application at this company, update it
+        if len(company_jobs) == 1:
+            return company_jobs[0], MATCH_COMPANY
+
+        # Multiple applications at same company - look for similar positions
+        for job in company_jobs:
+            job_position = job['position'].lower()
+            new_position = position.lower()
+            if (job_position in new_position or
+                new_position in job_position or
+                'intern' in job_position and 'intern' in new_position):
+                return job, MATCH_SIMILAR_POSITION
+
+        return None, None
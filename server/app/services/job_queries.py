@@ -0,0 +1,107 @@
+"""Paged, filtered reads of a user's jobs.
+
+Pages are ordered newest first on ``(applied_date, id)`` and continued
+with a keyset cursor. The database never scans past the rows it returns,
+so the cost of a page stays flat however many jobs a user has.
+"""
+from app.db.supabase import supabase
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import base64
+import json
+import re
+
+MAX_PAGE_SIZE = 200
+
+# Columns a client may ask for with fields=
+JOB_FIELDS = ("id", "user_id", "company", "position", "status", "applied_date")
+
+# The cursor needs these from every row, whatever fields were asked for
+CURSOR_FIELDS = ("applied_date", "id")
+
+JOB_ID_PATTERN = re.compile(r'[\w-]+')
+
+def encode_cursor(row: Dict) -> str:
+    """Opaque cursor pointing just past ``row``"""
+    position = json.dumps([row['applied_date'], row['id']])
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Return the ``(applied_date, id)`` a cursor points past; ValueError if malformed"""
+    try:
+        applied_date, job_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        # Both end up inside a PostgREST filter, so only accept well-formed values
+        datetime.fromisoformat(applied_date)
+        if not JOB_ID_PATTERN.fullmatch(str(job_id)):
+            raise ValueError(job_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return applied_date, str(job_id)
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Validate a comma-separated ``fields=`` projection; None means every field"""
+    if not fields:
+        return None
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in JOB_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(requested))
+
+def list_jobs(
+    user_id: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    statuses: Optional[Iterable[str]] = None,
+    company_prefix: Optional[str] = None,
+    applied_after: Optional[datetime] = None,
+    applied_before: Optional[datetime] = None,
+    fields: Optional[Sequence[str]] = None,
+    client=supabase
+) -> Tuple[List[Dict], Optional[str]]:
+    """Return one page of the user's jobs and the cursor for the next page.
+
+    Without a ``limit`` every matching job is returned and the cursor is
+    ``None``. ``applied_after`` is inclusive and ``applied_before``
+    exclusive.
+    """
+    columns = list(fields or JOB_FIELDS)
+    select_columns = columns + [field for field in CURSOR_FIELDS if field not in columns]
+
+    query = client.table("jobs").select(",".join(select_columns)).eq("user_id", user_id)
+
+    if statuses:
+        query = query.in_("status", list(statuses))
+    if company_prefix:
+        query = query.ilike("company", f"{_escape_like(company_prefix)}%")
+    if applied_after:
+        query = query.gte("applied_date", applied_after.isoformat())
+    if applied_before:
+        query = query.lt("applied_date", applied_before.isoformat())
+    if cursor:
+        applied_date, job_id = decode_cursor(cursor)
+        # Rows strictly after the cursor in (applied_date desc, id desc) order
+        query = query.or_(
+            f'applied_date.lt."{applied_date}",'
+            f'and(applied_date.eq."{applied_date}",id.lt."{job_id}")'
+        )
+
+    query = query.order("applied_date", desc=True).order("id", desc=True)
+    if limit:
+        # One extra row tells us whether there is another page
+        query = query.limit(limit + 1)
+
+    rows = query.execute().data or []
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1])
+
+    if fields:
+        rows = [{field: row.get(field) for field in columns} for row in rows]
+    return rows, next_cursor
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
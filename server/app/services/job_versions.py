@@ -0,0 +1,53 @@
+"""Version numbers for each user's jobs list, used as ETags.
+
+Jobs only change through this server, either a manual create or a sync
+flushing its writes, and both bump the user's version once the write has
+committed. A version read before a query is therefore never newer than
+the rows the query returns, so a matching ``If-None-Match`` means the
+client already holds the current list and the database need not be asked.
+
+Versions are counters in the response cache's backend, so with
+``REDIS_URL`` set every worker sees every bump. Without it they live in
+this process and the server must run as a single worker. Counters start
+from the clock, so a restart or a lost Redis key can't bring back a
+version an old ETag still carries.
+"""
+from app.services.response_cache import get_response_cache
+from typing import Optional
+import hashlib
+import logging
+import secrets
+
+logger = logging.getLogger(__name__)
+
+def get_version(user_id: str) -> int:
+    """Return the current version of ``user_id``'s jobs"""
+    return get_response_cache().read_counter("version", user_id)
+
+def bump_version(user_id: str) -> Optional[int]:
+    """Record that ``user_id``'s jobs changed; call after the write commits"""
+    try:
+        return get_response_cache().bump_counter("version", user_id)
+    except Exception:
+        # The write has committed; failing here would only hide that
+        logger.warning("Could not bump the jobs version for user %s", user_id, exc_info=True)
+        return None
+
+def make_etag(user_id: str, query: str = "") -> str:
+    """Strong ETag for ``user_id``'s jobs as filtered by ``query``"""
+    digest = hashlib.sha1(f"{user_id}?{query}".encode()).hexdigest()[:16]
+    try:
+        version = str(get_version(user_id))
+    except Exception:
+        # Without a version nothing may match, so the list is always sent
+        logger.warning("Could not read the jobs version for user %s", user_id, exc_info=True)
+        version = "unversioned-" + secrets.token_hex(8)
+    return f'"{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header names ``etag``"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    return "*" in candidates or etag in (tag.removeprefix("W/") for tag in candidates)
@@ -0,0 +1,158 @@
+from app.db.supabase import supabase
+from app.services.insights import InsightsStore, get_insights_store
+from app.services.job_index import JobIndex, normalize_key
+from app.services.job_versions import bump_version
+from app.services.metrics import JOBS_WRITTEN, stage_timer
+from app.services.response_cache import get_response_cache
+from typing import Dict, List, Optional, Tuple
+
+# Define status priority and valid transitions
+STATUS_PRIORITY = {
+    'applied': 1,
+    'interviewing': 2,
+    'offered': 3,
+    'rejected': 2  # Rejection can happen from any stage
+}
+
+# Columns a sync writes; everything else on a job row is left to the database.
+# applied_date follows the latest email, first_applied_date keeps the first.
+JOB_COLUMNS = ("id", "user_id", "company", "position", "status", "applied_date", "first_applied_date")
+
+def should_update_status(existing_status: str, new_status: str) -> bool:
+    """Whether an email with ``new_status`` should move a job off ``existing_status``"""
+    existing_status = existing_status.lower()
+    new_status = new_status.lower()
+
+    current_priority = STATUS_PRIORITY.get(existing_status, 1)
+    new_priority = STATUS_PRIORITY.get(new_status, 1)
+
+    # Update if new status has higher priority OR if it's a meaningful change
+    return (
+        new_priority > current_priority or
+        (new_status == 'rejected' and existing_status != 'rejected') or
+        (new_status == 'interviewing' and existing_status == 'applied') or
+        (new_status == 'offered' and existing_status in ['applied', 'interviewing'])
+    )
+
+def publish_changes(user_id: str, changes: List[Tuple[Optional[Dict], Dict]], insights: InsightsStore):
+    """Make committed job changes visible to readers.
+
+    Cached responses are dropped before the version moves, so a request
+    that sees the new ETag never gets rows cached before the write. The
+    insights update makes database round trips, and an insights response
+    cached while it runs would be stale, so the cache is dropped again
+    once it finishes.
+    """
+    cache = get_response_cache()
+    cache.invalidate(user_id)
+    bump_version(user_id)
+    insights.record(user_id, changes)
+    cache.invalidate(user_id)
+
+class JobWriter:
+    """Write-behind buffer for the job changes a sync makes.
+
+    New jobs and status transitions are resolved against the in-memory
+    ``JobIndex`` as emails are classified, and only the final state of each
+    touched job is kept. ``flush`` sends everything in one bulk upsert, so a
+    sync makes one write per flush instead of one per changed job.
+    """
+
+    def __init__(self, user_id: str, job_index: JobIndex, client=supabase, insights: Optional[InsightsStore] = None):
+        self.user_id = user_id
+        self.job_index = job_index
+        self.client = client
+        self.insights = insights if insights is not None else get_insights_store()
+        # Rows waiting to be written, keyed by object identity so that a job
+        # staged as new and then updated in the same flush is written once
+        self._pending: Dict[int, Dict] = {}
+        # What each pending row looked like before this flush; None for new jobs
+        self._originals: Dict[int, Optional[Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def stage(self, job_info: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+        """Apply a classified email to the user's jobs without writing yet.
+
+        Returns ``(row, match_kind)``. ``row`` is the staged job, or ``None``
+        when the email doesn't change anything; ``match_kind`` says how an
+        existing job was matched, or is ``None`` for a new job.
+        """
+        existing_job, match_kind = self.job_index.find(job_info['company'], job_info['position'])
+
+        if existing_job is None:
+            row = {
+                "user_id": self.user_id,
+                "company": job_info['company'],
+                "position": job_info['position'],
+                "status": job_info['status'],
+                "applied_date": job_info['applied_date'],
+                "first_applied_date": job_info['applied_date']
+            }
+            self.job_index.add(row)
+            self._pending[id(row)] = row
+            self._originals[id(row)] = None
+            return row, None
+
+        if not should_update_status(existing_job['status'], job_info['status']):
+            return None, match_kind
+
+        # Update existing record with new status and latest email date
+        row = dict(existing_job)
+        row.update({
+            "status": job_info['status'],
+            "applied_date": job_info['applied_date'],  # Update to latest email date
+            "position": job_info['position']  # Update position if it was refined
+        })
+        # Jobs saved before first_applied_date existed get the oldest date still known
+        if not row.get('first_applied_date'):
+            row['first_applied_date'] = existing_job.get('applied_date')
+        self.job_index.replace(existing_job, row)
+        self._pending.pop(id(existing_job), None)
+        self._pending[id(row)] = row
+        self._originals[id(row)] = self._originals.pop(id(existing_job), existing_job)
+        return row, match_kind
+
+    def flush(self) -> List[Dict]:
+        """Write every staged change in one bulk upsert and return the saved rows"""
+        if not self._pending:
+            return []
+
+        staged = list(self._pending.values())
+        changes = [(self._originals.get(id(row)), row) for row in staged]
+        self._pending = {}
+        self._originals = {}
+
+        payload = [
+            {column: _serialize(row[column]) for column in JOB_COLUMNS if column in row}
+            for row in staged
+        ]
+        # Rows without an id are new; missing=default lets the database assign one
+        with stage_timer("db_write"):
+            response = self.client.table("jobs").upsert(
+                payload, on_conflict="id", default_to_null=False
+            ).execute()
+        saved = response.data or []
+        updated = sum(1 for row in payload if 'id' in row)
+        JOBS_WRITTEN.labels(action="updated").inc(updated)
+        JOBS_WRITTEN.labels(action="inserted").inc(len(payload) - updated)
+        publish_changes(self.user_id, changes, self.insights)
+
+        # Swap the staged rows in the index for the saved ones, so new jobs
+        # pick up their ids before anything else matches against them
+        staged_by_id = {row['id']: row for row in staged if row.get('id')}
+        staged_by_key = {_job_key(row): row for row in staged if not row.get('id')}
+        for saved_row in saved:
+            staged_row = staged_by_id.get(saved_row['id']) or staged_by_key.pop(_job_key(saved_row), None)
+            if staged_row is not None:
+                self.job_index.replace(staged_row, saved_row)
+
+        return saved
+
+def _job_key(row: Dict) -> Tuple[str, str]:
+    return normalize_key(row['company']), normalize_key(row['position'])
+
+def _serialize(value):
+    # ApplicationStatus is a str enum; send its plain value
+    return getattr(value, 'value', value)
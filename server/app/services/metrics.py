@@ -0,0 +1,86 @@
+"""Prometheus metrics for email syncs, served from ``/metrics``.
+
+Metrics are updated in memory as syncs run and only serialised when
+``/metrics`` is scraped. An update is a lock and an addition, so keeping
+them costs next to nothing when nobody is scraping. Without
+``prometheus_client`` installed every metric is a no-op and ``/metrics``
+answers 503.
+"""
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+import time
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+# Sync stages timed by stage_timer
+STAGES = (
+    "gmail_list",
+    "metadata_fetch",
+    "message_fetch",
+    "body_decode",
+    "classify_relevance",
+    "classify_company",
+    "classify_position",
+    "classify_status",
+    "db_read",
+    "db_write",
+)
+
+# Most stages take milliseconds; Gmail calls and DB writes can take seconds
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SYNC_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+class _NoopMetric:
+    """Stands in for every metric when prometheus_client is missing"""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1):
+        pass
+
+    def observe(self, amount: float):
+        pass
+
+def _metric(kind: str, name: str, documentation: str, labelnames=(), **kwargs):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return getattr(prometheus_client, kind)(name, documentation, labelnames, **kwargs)
+
+STAGE_SECONDS = _metric(
+    "Histogram", "maestro_sync_stage_seconds", "Time spent in each sync stage", ["stage"], buckets=STAGE_BUCKETS
+)
+SYNC_SECONDS = _metric(
+    "Histogram", "maestro_sync_duration_seconds", "Duration of one user's sync or backfill", ["kind"], buckets=SYNC_BUCKETS
+)
+MESSAGES_SEEN = _metric("Counter", "maestro_sync_messages_seen_total", "Emails checked by the prefilter or classifier", ["check"])
+MESSAGES_ACCEPTED = _metric("Counter", "maestro_sync_messages_accepted_total", "Emails classified as application responses")
+MESSAGES_REJECTED = _metric(
+    "Counter", "maestro_sync_messages_rejected_total", "Emails rejected, by check and reason", ["check", "reason"]
+)
+JOBS_WRITTEN = _metric("Counter", "maestro_sync_jobs_written_total", "Jobs written by syncs", ["action"])
+
+# Label children resolved once, so timing a stage skips the label lookup
+_stage_histograms = {stage: STAGE_SECONDS.labels(stage=stage) for stage in STAGES}
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the block as one run of sync stage ``stage``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage_histograms[stage].observe(time.perf_counter() - start)
+
+def record_rejection(check: str, reason: str):
+    """Count an email rejected by ``check`` ("prefilter" or "classifier")"""
+    MESSAGES_REJECTED.labels(check=check, reason=reason).inc()
+
+def render_metrics() -> Optional[Tuple[bytes, str]]:
+    """Return ``(body, content_type)`` for a scrape, or ``None`` if metrics are off"""
+    if prometheus_client is None:
+        return None
+    return prometheus_client.generate_latest(), prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,161 @@
+"""Plain-text bodies from Gmail ``format=full`` message payloads.
+
+The payload is a tree of MIME parts. It is walked iteratively, so deeply
+nested multiparts can't blow the stack. The first ``text/plain`` part wins,
+and the first ``text/html`` part is the fallback for HTML-only senders.
+Only as much of a part as the byte budget allows is ever decoded, because
+the classifier looks at the start of an email and a newsletter can be
+megabytes long.
+"""
+from html.parser import HTMLParser
+from typing import Dict
+import base64
+import codecs
+import math
+import os
+import re
+
+# Bytes of text decoded per email. Generous enough to reach the footer of
+# an ordinary email, small enough that huge messages cost the same as any other.
+MAX_BODY_BYTES = int(os.getenv("EMAIL_BODY_MAX_BYTES", "16384"))
+
+# HTML spends most of its bytes on markup, so it gets a bigger raw budget
+HTML_BUDGET_FACTOR = 4
+
+CHARSET_PATTERN = re.compile(r'charset\s*=\s*"?([^";\s]+)', re.IGNORECASE)
+BLANK_LINES_PATTERN = re.compile(r'\n\s*\n\s*(?:\n\s*)+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Tags whose content is never visible text
+SKIPPED_TAGS = frozenset({'script', 'style', 'head', 'title', 'template'})
+# Tags that start a new line in rendered text
+BLOCK_TAGS = frozenset({
+    'br', 'p', 'div', 'tr', 'li', 'ul', 'ol', 'table', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'blockquote', 'section', 'article', 'header', 'footer'
+})
+
+def extract_body(payload: Dict, max_bytes: int = MAX_BODY_BYTES) -> str:
+    """Return the readable text of a message payload, at most ``max_bytes`` long"""
+    plain_part, html_part = find_text_parts(payload)
+
+    if plain_part is not None:
+        return decode_part(plain_part, max_bytes)[:max_bytes]
+    if html_part is not None:
+        return html_to_text(decode_part(html_part, max_bytes * HTML_BUDGET_FACTOR), max_bytes)
+    return ""
+
+def find_text_parts(payload: Dict):
+    """Return ``(first text/plain part, first text/html part)`` in document order.
+
+    Attachments are skipped even when they are text. The walk stops at the
+    first plain text part since nothing after it can win.
+    """
+    html_part = None
+    # Parts are pushed in reverse so they pop in document order
+    stack = [payload]
+
+    while stack:
+        part = stack.pop()
+        # Some senders leave the type off; infer it from the shape of the part
+        mime_type = (part.get('mimeType') or ('multipart/mixed' if part.get('parts') else 'text/plain')).lower()
+
+        if mime_type.startswith('multipart/'):
+            stack.extend(reversed(part.get('parts', [])))
+            continue
+        if _is_attachment(part):
+            continue
+
+        if mime_type == 'text/plain':
+            return part, html_part
+        if mime_type == 'text/html' and html_part is None:
+            html_part = part
+
+    return None, html_part
+
+def decode_part(part: Dict, max_bytes: int) -> str:
+    """Decode at most ``max_bytes`` of a part's body into text using its charset"""
+    data = part.get('body', {}).get('data')
+    if not data:
+        return ""
+
+    # Every 4 base64 characters hold 3 bytes, so only a prefix is decoded
+    prefix = data[:math.ceil(max_bytes / 3) * 4]
+    raw = base64.urlsafe_b64decode(prefix + '=' * (-len(prefix) % 4))
+    complete = len(prefix) == len(data) and len(raw) <= max_bytes
+
+    # final=False drops a multi-byte character cut in half by the budget
+    try:
+        decoder = codecs.getincrementaldecoder(_charset(part))(errors='replace')
+        return decoder.decode(raw[:max_bytes], final=complete)
+    except (UnicodeError, AssertionError, TypeError):
+        # Some text codecs still choke on bytes that aren't theirs
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        return decoder.decode(raw[:max_bytes], final=complete)
+
+def html_to_text(markup: str, max_chars: int = MAX_BODY_BYTES) -> str:
+    """Strip tags from ``markup``, keeping roughly the text a reader would see"""
+    stripper = _TextExtractor(max_chars)
+    stripper.feed(markup)
+    stripper.close()
+    return BLANK_LINES_PATTERN.sub('\n\n', stripper.text())[:max_chars]
+
+def _charset(part: Dict) -> str:
+    for header in part.get('headers', []):
+        if header['name'].lower() == 'content-type':
+            match = CHARSET_PATTERN.search(header['value'])
+            if match:
+                return _text_encoding(match.group(1))
+    return 'utf-8'
+
+def _text_encoding(name: str) -> str:
+    """``name`` if it is a codec for text, else UTF-8.
+
+    The sender picks the charset, and codecs such as base64, zlib or rot13
+    would turn the body into bytes or fail outright.
+    """
+    try:
+        return name if codecs.lookup(name)._is_text_encoding else 'utf-8'
+    except LookupError:
+        return 'utf-8'
+
+def _is_attachment(part: Dict) -> bool:
+    if part.get('filename'):
+        return True
+    return any(
+        header['name'].lower() == 'content-disposition' and header['value'].lower().startswith('attachment')
+        for header in part.get('headers', [])
+    )
+
+class _TextExtractor(HTMLParser):
+    """Collects visible text, stopping once enough has been seen"""
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.chunks = []
+        self.length = 0
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._append('\n')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self._append(WHITESPACE_PATTERN.sub(' ', data))
+
+    def text(self) -> str:
+        return ''.join(self.chunks).strip()
+
+    def _append(self, text: str):
+        if self.length < self.max_chars:
+            self.chunks.append(text)
+            self.length += len(text)
@@ -0,0 +1,75 @@
+import re
+from typing import Dict, Iterable, Set
+
+# Trie key marking the end of a phrase; never collides with a character
+_END = None
+
+class PhraseMatcher:
+    """Find every phrase from several keyword lists in one pass over a text.
+
+    All phrases are folded into one trie, which is compiled into a single
+    prefix-factored regex. Scanning a text is then one regex search per
+    phrase occurrence instead of one substring scan per phrase, so the cost
+    grows with the length of the text rather than text length times the
+    number of phrases. Matching is plain substring matching, exactly like
+    ``phrase in text``, and overlapping phrases are all reported.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]]):
+        self.categories = tuple(categories)
+        self._trie = {}
+
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                node = self._trie
+                for char in phrase:
+                    node = node.setdefault(char, {})
+                node.setdefault(_END, set()).add(category)
+
+        self._pattern = re.compile(self._compile_node(self._trie))
+
+    def scan(self, text: str) -> Dict[str, Set[str]]:
+        """Return ``{category: {matched phrases}}`` for every category with a hit.
+
+        Phrases are matched case-sensitively, so callers should pass text
+        normalised the same way as the phrases (lowercase for the classifier).
+        """
+        hits = {}
+        search = self._pattern.search
+        position = 0
+
+        while True:
+            match = search(text, position)
+            if not match:
+                return hits
+
+            start = match.start()
+            # The regex only reports one phrase per start position; walk the
+            # trie from there to collect every phrase that starts at it.
+            node = self._trie
+            for end in range(start, len(text)):
+                node = node.get(text[end])
+                if node is None:
+                    break
+                if _END in node:
+                    phrase = text[start:end + 1]
+                    for category in node[_END]:
+                        hits.setdefault(category, set()).add(phrase)
+
+            position = start + 1
+
+    def _compile_node(self, node: Dict) -> str:
+        branches = [
+            re.escape(char) + self._compile_node(child)
+            for char, child in sorted(node.items(), key=lambda item: item[0] or '')
+            if char is not _END
+        ]
+        if not branches:
+            return ''
+
+        if len(branches) == 1 and _END not in node:
+            return branches[0]
+
+        group = '(?:' + '|'.join(branches) + ')'
+        # A phrase may end here, so everything below this node is optional
+        return group + '?' if _END in node else group
@@ -0,0 +1,170 @@
+"""Cache for API responses, in process or shared through Redis.
+
+Entries are namespaced per user. Invalidating a user doesn't delete
+anything; it moves the user to a new generation, which is part of every
+key, so their old entries stop being found and expire on their own.
+That makes invalidation a single operation on either backend.
+
+The backend also holds per-user counters: the generations, and the job
+versions behind the jobs list's ETags (see ``job_versions``).
+
+Set ``REDIS_URL`` to share the cache between processes; otherwise (or if
+the ``redis`` package isn't installed) entries and counters live in this
+process, and the server must run as a single worker: another worker
+would neither see this one's invalidations nor its version bumps, and
+would serve stale lists and 304s. Cache errors are logged and treated as
+misses, never as request failures.
+"""
+from app.utils.ttl_cache import TTLCache
+from typing import Any, Callable, Dict, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "10000"))
+KEY_PREFIX = "maestro"
+
+class InMemoryBackend:
+    """LRU cache local to this process"""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self._entries = TTLCache(maxsize=maxsize, ttl=RESPONSE_CACHE_TTL_SECONDS)
+        # Generations must outlive every entry made under them, so they never expire
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._counters:
+                return str(self._counters[key])
+        return self._entries.get(key)
+
+    def set(self, key: str, value: str, ttl: float):
+        self._entries.set(key, value, ttl=ttl)
+
+    def add(self, key: str, value: int):
+        with self._lock:
+            self._counters.setdefault(key, value)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+class RedisBackend:
+    """Cache shared by every process pointed at the same Redis"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        return cls(redis.Redis.from_url(url, decode_responses=True, socket_timeout=0.5))
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: str, ttl: float):
+        self.client.set(key, value, px=int(ttl * 1000))
+
+    def add(self, key: str, value: int):
+        self.client.set(key, value, nx=True)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+class ResponseCache:
+    """JSON values cached per user, with per-user invalidation"""
+
+    def __init__(self, backend, ttl: float = RESPONSE_CACHE_TTL_SECONDS, prefix: str = KEY_PREFIX):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get_or_load(self, namespace: str, user_id: str, key: str, load: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value, or ``load()`` it and cache the result.
+
+        The user's generation is read before loading, so a value loaded
+        while an invalidation lands is filed under the old generation and
+        never served.
+        """
+        try:
+            full_key = f"{self.prefix}:{namespace}:{user_id}:{self._generation(user_id)}:{key}"
+            cached = self.backend.get(full_key)
+        except Exception:
+            self._warn("read")
+            return load()
+
+        if cached is not None:
+            return json.loads(cached)
+
+        value = load()
+        try:
+            self.backend.set(full_key, json.dumps(value), self.ttl if ttl is None else ttl)
+        except Exception:
+            self._warn("write")
+        return value
+
+    def invalidate(self, user_id: str):
+        """Drop every cached value for ``user_id``; call after their data changes"""
+        try:
+            self.bump_counter("generation", user_id)
+        except Exception:
+            self._warn("invalidation")
+
+    def read_counter(self, name: str, user_id: str) -> int:
+        """Current value of the ``name`` counter for ``user_id``; raises if the backend fails"""
+        key = self._counter_key(name, user_id)
+        value = self.backend.get(key)
+        if value is None:
+            # Start from the clock rather than 0, so a counter lost from
+            # Redis can't come back with a number already handed out
+            self.backend.add(key, time.time_ns())
+            value = self.backend.get(key)
+        return int(value)
+
+    def bump_counter(self, name: str, user_id: str) -> int:
+        """Increment the ``name`` counter for ``user_id``; raises if the backend fails"""
+        key = self._counter_key(name, user_id)
+        self.backend.add(key, time.time_ns())
+        return self.backend.incr(key)
+
+    def _generation(self, user_id: str) -> int:
+        return self.read_counter("generation", user_id)
+
+    def _counter_key(self, name: str, user_id: str) -> str:
+        return f"{self.prefix}:{name}:{user_id}"
+
+    def _warn(self, operation: str):
+        logger.warning("Response cache %s failed", operation, exc_info=True)
+
+def create_backend():
+    """Redis when ``REDIS_URL`` is set and the client is installed, otherwise in process"""
+    url = os.getenv("REDIS_URL")
+    if url and redis is not None:
+        logger.info("Response cache: Redis")
+        return RedisBackend.from_url(url)
+    if url:
+        logger.warning("REDIS_URL is set but the redis package is not installed; caching in process")
+    return InMemoryBackend()
+
+response_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    global response_cache
+    # Called from sync worker threads as well as request handlers
+    with _cache_lock:
+        if response_cache is None:
+            response_cache = ResponseCache(create_backend())
+        return response_cache
@@ -0,0 +1,151 @@
+"""Background sync jobs.
+
+Syncs are slow, so request handlers never run them directly. They submit
+a job and return its ID straight away; the sync runs on a dedicated event
+loop thread shared by every sync in the process, and the job records
+progress for the status endpoint to report. Syncs are I/O bound on the
+async Gmail client, so one loop runs many of them at once without a thread
+per sync, and the server's own loop never waits on them.
+"""
+from app.models.sync_job import SyncJob, SyncJobStatus
+from app.services.email_parser import parse_and_classify_emails, backfill_emails, ProgressCallback
+from app.services.metrics import SYNC_SECONDS
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from google.oauth2.credentials import Credentials
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+import uuid
+
+# How many syncs run at once per process; the rest wait their turn
+MAX_CONCURRENT_SYNCS = int(os.getenv("MAX_CONCURRENT_SYNCS", "16"))
+
+# Finished jobs are kept around so clients can read their result, but only
+# the most recent ones
+MAX_FINISHED_JOBS = 1000
+
+logger = logging.getLogger(__name__)
+
+SyncWork = Callable[[ProgressCallback], Awaitable[Dict]]
+
+class SyncJobManager:
+    """Runs sync jobs on a background event loop and tracks their status.
+
+    A user has at most one queued or running job of each kind; submitting
+    another returns the one already in flight instead of queueing a
+    duplicate sync of the same mailbox. Jobs of different kinds for one
+    user run one after the other, since each works from its own snapshot
+    of the user's jobs and sync checkpoint and would overwrite the other's.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_SYNCS, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._loop = asyncio.new_event_loop()
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="sync-loop", daemon=True)
+        self._thread.start()
+        self._jobs: "OrderedDict[str, SyncJob]" = OrderedDict()
+        self._active: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        # user_id -> [lock, jobs holding or waiting for it]; only touched on the loop thread
+        self._user_locks: Dict[str, list] = {}
+
+    def submit(self, user_id: str, kind: str, work: SyncWork) -> SyncJob:
+        """Queue ``work`` for ``user_id`` and return a snapshot of its job"""
+        with self._lock:
+            active_id = self._active.get((user_id, kind))
+            if active_id is not None:
+                return self._jobs[active_id].model_copy()
+
+            job = SyncJob(id=uuid.uuid4().hex, user_id=user_id, kind=kind, created_at=datetime.now())
+            self._jobs[job.id] = job
+            self._active[(user_id, kind)] = job.id
+            snapshot = job.model_copy()
+
+        asyncio.run_coroutine_threadsafe(self._run(job, work), self._loop)
+        return snapshot
+
+    def submit_sync(self, credentials: Credentials, user_id: str, full_scan: bool = False) -> SyncJob:
+        async def work(progress: ProgressCallback) -> Dict:
+            jobs = await parse_and_classify_emails(credentials, user_id, full_scan=full_scan, progress=progress)
+            return {"jobs_processed": len(jobs)}
+
+        return self.submit(user_id, "sync", work)
+
+    def submit_backfill(self, credentials: Credentials, user_id: str, restart: bool = False) -> SyncJob:
+        async def work(progress: ProgressCallback) -> Dict:
+            return await backfill_emails(credentials, user_id, restart=restart, progress=progress)
+
+        return self.submit(user_id, "backfill", work)
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        """Return a snapshot of a job, or ``None`` if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.model_copy() if job else None
+
+    def shutdown(self):
+        """Stop the loop; syncs still running are abandoned and resume next time"""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _run(self, job: SyncJob, work: SyncWork):
+        def progress(processed: int, total: Optional[int] = None):
+            with self._lock:
+                job.messages_processed = processed
+                job.messages_total = total
+
+        # Wait for the user's other job before taking a slot from other users
+        async with self._user_turn(job.user_id), self._slots:
+            with self._lock:
+                job.status = SyncJobStatus.RUNNING
+                job.started_at = datetime.now()
+
+            try:
+                result = await work(progress)
+                status, error = SyncJobStatus.SUCCEEDED, None
+            except Exception as e:
+                logger.exception("Sync job %s for user %s failed", job.id, job.user_id)
+                result, status, error = None, SyncJobStatus.FAILED, str(e)
+            # Not labelled by user; one series per user would grow without bound
+            SYNC_SECONDS.labels(kind=job.kind).observe((datetime.now() - job.started_at).total_seconds())
+
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = datetime.now()
+            self._active.pop((job.user_id, job.kind), None)
+            self._prune()
+
+    @asynccontextmanager
+    async def _user_turn(self, user_id: str):
+        entry = self._user_locks.setdefault(user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._user_locks[user_id]
+
+    def _prune(self):
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in (SyncJobStatus.SUCCEEDED, SyncJobStatus.FAILED)
+        ]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+sync_job_manager = None
+
+def get_sync_job_manager() -> SyncJobManager:
+    global sync_job_manager
+    if sync_job_manager is None:
+        sync_job_manager = SyncJobManager()
+    return sync_job_manager
@@ -0,0 +1,216 @@
+"""Periodic background syncs for every connected user.
+
+Every user with a refresh token is synced incrementally on a fixed
+interval, so the dashboard is usually current before anyone opens it.
+A few rules keep the load smooth:
+
+- Each user's first sync lands at a point in the interval derived from a
+  hash of their ID, and every later one is jittered, so users are spread
+  out instead of all coming due together after a restart.
+- Users seen on the API recently are synced more often, and go first
+  when more users are due than there is room for.
+- At most ``max_in_flight`` scheduled syncs are queued or running at once,
+  leaving sync slots free for users who click Sync themselves.
+- Whenever Gmail answers 429, the number of scheduled syncs allowed in
+  flight is halved, then grows back by one per quiet tick.
+"""
+from app.db.supabase import supabase
+from app.models.sync_job import SyncJobStatus
+from app.services.credentials import get_credentials_manager
+from app.services.gmail_client import rate_limit_counts
+from app.services.sync_jobs import MAX_CONCURRENT_SYNCS, SyncJobManager, get_sync_job_manager
+from typing import Callable, Dict, List, Optional
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SYNC_SCHEDULER_ENABLED = os.getenv("SYNC_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# How often idle and recently active users are synced
+SYNC_INTERVAL_SECONDS = float(os.getenv("SYNC_INTERVAL_SECONDS", str(60 * 60)))
+ACTIVE_SYNC_INTERVAL_SECONDS = float(os.getenv("ACTIVE_SYNC_INTERVAL_SECONDS", str(15 * 60)))
+# A user counts as active for this long after their last API request
+ACTIVE_WINDOW_SECONDS = 60 * 60
+
+# Each interval is stretched or shrunk by up to this fraction
+JITTER_FRACTION = 0.1
+
+TICK_SECONDS = float(os.getenv("SYNC_SCHEDULER_TICK_SECONDS", "30"))
+# How often the list of connected users is re-read
+ROSTER_REFRESH_SECONDS = 10 * 60
+ROSTER_PAGE_SIZE = 1000
+
+# Half the sync slots by default, so manual syncs never queue behind a full schedule
+MAX_SCHEDULED_IN_FLIGHT = int(os.getenv("MAX_SCHEDULED_SYNCS", str(max(1, MAX_CONCURRENT_SYNCS // 2))))
+
+FINISHED_STATUSES = (SyncJobStatus.SUCCEEDED, SyncJobStatus.FAILED)
+
+def load_connected_users(client=supabase) -> List[Dict]:
+    """Return the token columns of every user who has connected Gmail"""
+    users = []
+    start = 0
+    while True:
+        response = (
+            client.table("users")
+            .select("id,access_token,refresh_token,token_expiry")
+            .not_.is_("refresh_token", "null")
+            .order("id")
+            .range(start, start + ROSTER_PAGE_SIZE - 1)
+            .execute()
+        )
+        page = response.data or []
+        users.extend(page)
+        if len(page) < ROSTER_PAGE_SIZE:
+            return users
+        start += ROSTER_PAGE_SIZE
+
+class SyncScheduler:
+    """Enqueues incremental syncs for every connected user on a schedule"""
+
+    def __init__(
+        self,
+        manager: Optional[SyncJobManager] = None,
+        load_users: Callable[[], List[Dict]] = load_connected_users,
+        interval: float = SYNC_INTERVAL_SECONDS,
+        active_interval: float = ACTIVE_SYNC_INTERVAL_SECONDS,
+        max_in_flight: int = MAX_SCHEDULED_IN_FLIGHT,
+        tick_seconds: float = TICK_SECONDS,
+        clock: Callable[[], float] = time.time
+    ):
+        self.manager = manager
+        self.load_users = load_users
+        self.interval = interval
+        self.active_interval = active_interval
+        self.max_in_flight = max_in_flight
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        # Scheduled syncs allowed in flight right now; shrinks when Gmail pushes back
+        self.budget = max_in_flight
+
+        self._users: Dict[str, Dict] = {}
+        self._next_due: Dict[str, float] = {}
+        self._last_active: Dict[str, float] = {}
+        self._in_flight: Dict[str, str] = {}
+        self._roster_loaded_at: Optional[float] = None
+        self._rate_limits_seen = sum(rate_limit_counts.values())
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def mark_active(self, user_id: str):
+        """Note that the user just used the API, moving them up the schedule"""
+        # Plain dict writes are atomic, so request handlers don't need the lock
+        self._last_active[user_id] = self.clock()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sync-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Sync scheduler started (every %.0fs, %.0fs for active users)", self.interval, self.active_interval)
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def tick(self) -> List[str]:
+        """Run one scheduling pass and return the IDs of the users queued"""
+        with self._lock:
+            now = self.clock()
+            if self._roster_loaded_at is None or now - self._roster_loaded_at >= ROSTER_REFRESH_SECONDS:
+                self._refresh_roster(now)
+
+            self._forget_finished()
+            if self._throttled():
+                return []
+
+            room = self.budget - len(self._in_flight)
+            if room <= 0:
+                return []
+
+            due = [
+                user_id for user_id, due_at in self._next_due.items()
+                if due_at <= now and user_id not in self._in_flight
+            ]
+            # Active users first, then whoever has waited longest
+            due.sort(key=lambda user_id: (not self._is_active(user_id, now), self._next_due[user_id]))
+
+            queued = []
+            for user_id in due[:room]:
+                self._next_due[user_id] = now + self._jittered(self._interval_for(user_id, now))
+                try:
+                    credentials = get_credentials_manager().get(self._users[user_id])
+                    job = self._manager().submit_sync(credentials, user_id)
+                except Exception:
+                    logger.warning("Could not schedule sync for user %s", user_id, exc_info=True)
+                    continue
+                self._in_flight[user_id] = job.id
+                queued.append(user_id)
+
+            if queued:
+                logger.info("Scheduled %d syncs (%d due users waiting)", len(queued), len(due) - len(queued))
+            return queued
+
+    def _run(self):
+        while not self._stopped.wait(self.tick_seconds):
+            try:
+                self.tick()
+            except Exception:
+                logger.exception("Sync scheduler tick failed")
+
+    def _refresh_roster(self, now: float):
+        users = {user['id']: user for user in self.load_users()}
+        for user_id in users.keys() - self._next_due.keys():
+            # A stable offset spreads first syncs evenly over the interval
+            self._next_due[user_id] = now + _spread(user_id) * self.interval
+        for user_id in self._next_due.keys() - users.keys():
+            del self._next_due[user_id]
+        self._users = users
+        self._roster_loaded_at = now
+
+    def _forget_finished(self):
+        for user_id, job_id in list(self._in_flight.items()):
+            job = self._manager().get(job_id)
+            if job is None or job.status in FINISHED_STATUSES:
+                del self._in_flight[user_id]
+
+    def _throttled(self) -> bool:
+        """Adjust the budget to Gmail's pushback; True means skip this tick"""
+        rate_limits = sum(rate_limit_counts.values())
+        if rate_limits > self._rate_limits_seen:
+            self._rate_limits_seen = rate_limits
+            self.budget = max(1, self.budget // 2)
+            logger.warning("Gmail is rate limiting; scheduled syncs capped at %d", self.budget)
+            return True
+        self.budget = min(self.max_in_flight, self.budget + 1)
+        return False
+
+    def _is_active(self, user_id: str, now: float) -> bool:
+        last_active = self._last_active.get(user_id)
+        return last_active is not None and now - last_active < ACTIVE_WINDOW_SECONDS
+
+    def _interval_for(self, user_id: str, now: float) -> float:
+        return self.active_interval if self._is_active(user_id, now) else self.interval
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - JITTER_FRACTION, 1 + JITTER_FRACTION)
+
+    def _manager(self) -> SyncJobManager:
+        return self.manager if self.manager is not None else get_sync_job_manager()
+
+def _spread(user_id: str) -> float:
+    """A fraction in [0, 1) fixed for each user"""
+    digest = hashlib.sha1(user_id.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+sync_scheduler = None
+
+def get_sync_scheduler() -> SyncScheduler:
+    global sync_scheduler
+    if sync_scheduler is None:
+        sync_scheduler = SyncScheduler()
+    return sync_scheduler
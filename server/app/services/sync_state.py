@@ -0,0 +1,81 @@
+"""Per-user Gmail sync checkpoints.
+
+Checkpoints live in the ``sync_state`` table:
+
+    user_id                text primary key references users(id)
+    history_id             text
+    synced_at              timestamptz  -- when history_id was taken
+    processed_message_ids  jsonb   -- most recent last
+    failed_message_ids     jsonb   -- fetches that failed, retried by the next sync
+    backfill_page_token    text    -- where an interrupted backfill resumes
+    backfill_complete      boolean default false
+    updated_at             timestamptz
+"""
+from app.db.supabase import supabase
+from app.models.sync_state import SyncCheckpoint
+from app.services.metrics import stage_timer
+from datetime import datetime
+from typing import Iterable
+
+# Only the most recent IDs are kept - anything older has long since been
+# covered by the history checkpoint.
+MAX_PROCESSED_IDS = 2000
+# Past this many, the oldest failures are given up on
+MAX_FAILED_IDS = 500
+
+def load_checkpoint(user_id: str) -> SyncCheckpoint:
+    """Load the user's sync checkpoint, or an empty one if they never synced"""
+    with stage_timer("db_read"):
+        response = supabase.table("sync_state").select("*").eq("user_id", user_id).execute()
+
+    if not response.data:
+        return SyncCheckpoint(user_id=user_id)
+
+    row = response.data[0]
+    return SyncCheckpoint(
+        user_id=user_id,
+        history_id=row.get('history_id'),
+        synced_at=row.get('synced_at'),
+        processed_message_ids=row.get('processed_message_ids') or [],
+        failed_message_ids=row.get('failed_message_ids') or [],
+        backfill_page_token=row.get('backfill_page_token'),
+        backfill_complete=bool(row.get('backfill_complete'))
+    )
+
+def save_checkpoint(checkpoint: SyncCheckpoint):
+    """Persist the checkpoint, replacing any previous one for the user"""
+    with stage_timer("db_write"):
+        supabase.table("sync_state").upsert({
+            "user_id": checkpoint.user_id,
+            "history_id": checkpoint.history_id,
+            "synced_at": checkpoint.synced_at.isoformat() if checkpoint.synced_at else None,
+            "processed_message_ids": checkpoint.processed_message_ids[-MAX_PROCESSED_IDS:],
+            "failed_message_ids": checkpoint.failed_message_ids[-MAX_FAILED_IDS:],
+            "backfill_page_token": checkpoint.backfill_page_token,
+            "backfill_complete": checkpoint.backfill_complete,
+            "updated_at": datetime.now().isoformat()
+        }, on_conflict="user_id").execute()
+
+def record_processed(checkpoint: SyncCheckpoint, message_ids: Iterable[str]):
+    """Append newly processed message IDs, keeping the list bounded and unique"""
+    seen = set(checkpoint.processed_message_ids)
+    for message_id in message_ids:
+        if message_id not in seen:
+            seen.add(message_id)
+            checkpoint.processed_message_ids.append(message_id)
+
+    overflow = len(checkpoint.processed_message_ids) - MAX_PROCESSED_IDS
+    if overflow > 0:
+        del checkpoint.processed_message_ids[:overflow]
+
+def record_failed(checkpoint: SyncCheckpoint, message_ids: Iterable[str]):
+    """Remember messages that couldn't be fetched, so the next sync retries them"""
+    seen = set(checkpoint.failed_message_ids)
+    for message_id in message_ids:
+        if message_id not in seen:
+            seen.add(message_id)
+            checkpoint.failed_message_ids.append(message_id)
+
+    overflow = len(checkpoint.failed_message_ids) - MAX_FAILED_IDS
+    if overflow > 0:
+        del checkpoint.failed_message_ids[:overflow]
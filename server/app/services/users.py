@@ -0,0 +1,35 @@
+"""User lookups shared by the API routes.
+
+Every API request identifies its user by email, so the email -> user row
+lookup is cached in process. The OAuth callback invalidates a user's entry
+whenever it writes new tokens, and the TTL bounds how long any other
+out-of-band change can go unseen.
+"""
+from app.db.supabase import supabase
+from app.utils.ttl_cache import TTLCache
+from typing import Dict, Optional
+import os
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+def get_user_by_email(email: str) -> Optional[Dict]:
+    """Return the user row for ``email``, or ``None`` if there is no such user"""
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+
+    response = supabase.table("users").select("*").eq("email", email).execute()
+    if not response.data:
+        # Not cached, so a user who signs up is visible straight away
+        return None
+
+    user = response.data[0]
+    user_cache.set(email, user)
+    return user
+
+def invalidate_user(email: str):
+    """Forget the cached row for ``email`` after changing it"""
+    user_cache.pop(email)
@@ -0,0 +1,39 @@
+"""Logging setup for the server.
+
+``LOG_LEVEL`` picks the level (INFO by default; DEBUG adds a trace of
+every email a sync looks at). ``LOG_FORMAT=json`` writes one JSON object
+per record, including any ``extra={...}`` fields, for log processors;
+the default is plain text.
+"""
+from datetime import datetime, timezone
+import json
+import logging
+import os
+
+# Attributes every LogRecord has; anything else came from extra={...}
+STANDARD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in STANDARD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def configure_logging():
+    """Send the app's log records to stderr at ``LOG_LEVEL``"""
+    handler = logging.StreamHandler()
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    logger = logging.getLogger("app")
+    logger.handlers[:] = [handler]
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the email classifier on a seeded synthetic corpus.
+
+Run from the server directory:
+
+    python benchmarks/bench_classifier.py [--emails N] [--seed S] [--output results.json]
+
+Each public classifier method is timed call by call at several body sizes,
+and the throughput and p50/p99 latency are written as JSON. To catch
+regressions, save the results of the current release and compare a new
+version against them; the exit status is 1 if any p50 got slower by more
+than the threshold:
+
+    python benchmarks/bench_classifier.py --output baseline.json
+    python benchmarks/bench_classifier.py --compare baseline.json [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.email_classifier import EmailClassifier
+from corpus import BODY_SIZES, generate_corpus
+
+# Bump when the JSON layout changes, so old baselines aren't compared blindly
+RESULTS_VERSION = 1
+
+def methods(classifier: EmailClassifier) -> Dict[str, Callable[[Dict], object]]:
+    return {
+        "is_actual_application": lambda email: classifier.is_actual_application(email['subject'], email['body'], email['sender']),
+        "classify_application_status": lambda email: classifier.classify_application_status(email['subject'], email['body']),
+        "extract_company_from_content": lambda email: classifier.extract_company_from_content(email['subject'], email['body']),
+        "extract_position_from_content": lambda email: classifier.extract_position_from_content(email['subject'], email['body']),
+    }
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def measure(method: Callable[[Dict], object], emails: List[Dict], rounds: int) -> Dict[str, float]:
+    # One untimed pass, so regex and phrase caches are warm for every version
+    for email in emails:
+        method(email)
+
+    latencies = []
+    for _ in range(rounds):
+        for email in emails:
+            start = time.perf_counter_ns()
+            method(email)
+            latencies.append(time.perf_counter_ns() - start)
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "emails_per_second": round(len(latencies) / (sum(latencies) / 1e9), 1),
+        "p50_us": round(percentile(latencies, 0.50) / 1e3, 2),
+        "p99_us": round(percentile(latencies, 0.99) / 1e3, 2),
+    }
+
+def run(emails: int, seed: int, rounds: int, sizes: List[str]) -> Dict:
+    classifier = EmailClassifier()
+    results = {}
+    for size in sizes:
+        corpus = generate_corpus(emails, seed=seed, body_size=BODY_SIZES[size])
+        results[size] = {
+            "body_chars": BODY_SIZES[size],
+            "methods": {name: measure(method, corpus, rounds) for name, method in methods(classifier).items()},
+        }
+
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "emails": emails,
+        "rounds": rounds,
+        "results": results,
+    }
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Describe every method whose p50 grew by more than ``threshold``"""
+    if baseline.get("version") != current["version"]:
+        raise SystemExit(f"Baseline has results version {baseline.get('version')}, expected {current['version']}")
+    if (baseline["seed"], baseline["emails"]) != (current["seed"], current["emails"]):
+        print("warning: baseline was measured on a different corpus", file=sys.stderr)
+
+    regressions = []
+    for size, result in current["results"].items():
+        for name, stats in result["methods"].items():
+            before = baseline["results"].get(size, {}).get("methods", {}).get(name)
+            if before is None:
+                continue
+            change = stats["p50_us"] / before["p50_us"] - 1 if before["p50_us"] else 0
+            line = f"{size:>6} {name:<30} p50 {before['p50_us']:>9.2f} -> {stats['p50_us']:>9.2f} us ({change:+.0%})"
+            print(line, file=sys.stderr)
+            if change > threshold:
+                regressions.append(line)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--emails", type=int, default=200, help="emails per body size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--sizes", nargs="+", choices=sorted(BODY_SIZES), default=list(BODY_SIZES))
+    parser.add_argument("--output", help="write results here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to check for regressions against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed p50 slowdown, as a fraction")
+    args = parser.parse_args()
+
+    current = run(args.emails, args.seed, args.rounds, args.sizes)
+
+    output = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} classifier regressions over {args.threshold:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(line, file=sys.stderr)
+            sys.exit(1)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for company and position extraction on a fixed email corpus.
+
+Run from the server directory:
+
+    python benchmarks/bench_extraction.py [--rounds N]
+
+To compare two versions, run it on each checkout (e.g. via `git worktree`)
+and compare the reported per-email cost.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.email_classifier import EmailClassifier
+
+# (subject, body) pairs covering each extraction path: "at Company",
+# signatures, subject lines, body context, and the keyword fallbacks.
+CORPUS = [
+    (
+        "Re: Your Application",
+        "Dear Isaac,\n\nThank you for taking the time to apply for the Software Engineering "
+        "Internship at Amazon and for sharing your background with us.\n\nAfter careful "
+        "consideration, we regret to inform you that we will not be moving forward with your "
+        "application at this time.\n\nSincerely,\nAmazon Recruiting Team"
+    ),
+    (
+        "Stripe Software Engineering Internship - Offer",
+        "Dear Isaac,\n\nWe are excited to offer you the Software Engineering Internship position "
+        "at Stripe for Summer 2024!\n\nBest regards,\nStripe Recruiting Team"
+    ),
+    (
+        "Interview invitation",
+        "Hi there,\n\nWe would like to schedule an interview for the Backend Developer position. "
+        "Please pick a time that works for you.\n\nThanks,\nThe Datadog talent team"
+    ),
+    (
+        "Application received",
+        "Hello,\n\nThank you for applying to Figma! We received your application for the "
+        "Product Designer role and our team will review it shortly.\n\nKind regards,\nRecruiting"
+    ),
+    (
+        "Update on your candidacy",
+        "Hi,\n\nWe appreciate your interest in joining the Ramp team. Unfortunately we have "
+        "decided to pursue other candidates whose experience more closely matches the role. "
+        "We wish you the best in your search.\n\n" + "Ramp is an equal opportunity employer. " * 20
+    ),
+    (
+        "Next steps",
+        "Hello,\n\nCongratulations on moving forward in the recruitment process for our "
+        "internship program. You will receive an online assessment shortly.\n\nOn behalf of Notion,\nHR"
+    ),
+    (
+        "Quick question",
+        "Hey, hope you're doing well. Just wanted to follow up on the notes from yesterday's call "
+        "and the documents we discussed.\n\n" + "Lorem ipsum dolor sit amet, consectetur adipiscing. " * 40
+    ),
+    (
+        "Databricks - Machine Learning Intern",
+        "Thanks for your application for the Machine Learning Intern role. We are reviewing "
+        "applications and will get back to you within two weeks.\n\nThe Databricks Team"
+    ),
+]
+
+def run(rounds: int) -> float:
+    # The classifier prints progress; keep that out of the benchmark's output
+    with contextlib.redirect_stdout(io.StringIO()):
+        classifier = EmailClassifier()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for subject, body in CORPUS:
+                classifier.extract_company_from_content(subject, body)
+                classifier.extract_position_from_content(subject, body)
+        elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(CORPUS))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    # Warm up the regex cache so both versions are measured in steady state
+    run(5)
+    per_email = run(args.rounds)
+    print(f"{len(CORPUS)} emails x {args.rounds} rounds: {per_email * 1e6:.1f} us per email")
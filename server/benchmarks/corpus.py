@@ -0,0 +1,156 @@
+"""
+Seeded generator of synthetic emails for classifier benchmarks.
+
+The same seed always gives the same emails, so two versions of the
+classifier measured on one seed see identical input. Each email is a dict
+with ``kind``, ``subject``, ``body`` and ``sender``; ``kind`` is what the
+email really is, which the classifier never sees.
+"""
+
+import random
+from typing import Dict, List, Optional
+
+KINDS = (
+    "rejection",
+    "assessment",
+    "interview",
+    "offer",
+    "received",
+    "newsletter",
+    "outreach",
+    "thread",
+)
+
+# Body sizes benchmarked by default, in characters
+BODY_SIZES = {
+    "short": 600,
+    "medium": 4000,
+    "long": 30000,
+}
+
+COMPANIES = (
+    "Amazon", "Stripe", "Datadog", "Figma", "Ramp", "Notion", "Databricks", "Palantir",
+    "Airbnb", "Shopify", "Cloudflare", "Snowflake", "Robinhood", "Plaid", "Coinbase", "Atlassian",
+)
+POSITIONS = (
+    "Software Engineering Intern", "Software Engineer Intern", "Backend Developer Intern",
+    "Machine Learning Intern", "Data Science Intern", "Product Design Intern",
+    "Frontend Engineer", "Site Reliability Engineer", "Data Analyst Intern",
+)
+NAMES = ("Isaac", "Maya", "Jordan", "Priya", "Sam", "Wei", "Alex", "Fatima")
+ATS_SENDERS = ("no-reply@{domain}.com", "careers@{domain}.com", "talent@{domain}.com", "noreply@myworkday.com")
+
+SUBJECTS = {
+    "rejection": ("Re: Your Application", "Update on your application to {company}", "{company} - {position}"),
+    "assessment": ("{company} Online Assessment", "Next steps for your {company} application", "Complete your coding challenge"),
+    "interview": ("Interview invitation - {company}", "Schedule your interview with {company}", "{company}: next round"),
+    "offer": ("{company} {position} - Offer", "Congratulations from {company}!", "Your offer from {company}"),
+    "received": ("Application received", "Thank you for applying to {company}", "We received your application"),
+    "newsletter": ("This week in tech", "{company} product update", "Your weekly digest"),
+    "outreach": ("Opportunity at {company}", "Quick chat about a role?", "Exciting {position} opening"),
+    "thread": ("Re: Re: notes from yesterday", "Re: Fwd: project plan", "Re: lunch on Friday?"),
+}
+
+OPENINGS = {
+    "rejection": (
+        "Thank you for taking the time to apply for the {position} position at {company} and for sharing your background with us.",
+        "Thank you for your application for the {position} role. We appreciate your interest in joining the {company} team.",
+    ),
+    "assessment": (
+        "Thank you for applying to the {position} position. As a next step, please complete the online assessment on HackerRank within 7 days.",
+        "Congratulations on moving forward in the recruitment process for the {position} role at {company}. You will receive a coding challenge shortly.",
+    ),
+    "interview": (
+        "Thank you for applying to {company}! We would like to schedule an interview for the {position} position.",
+        "Your application for the {position} role stood out and we would like to invite you to a technical interview with our engineering team.",
+    ),
+    "offer": (
+        "We are excited to offer you the {position} position at {company} for Summer 2025!",
+        "Congratulations! Following your interviews, we are delighted to extend an offer for the {position} role.",
+    ),
+    "received": (
+        "Thank you for applying to {company}! We received your application for the {position} role and our team will review it shortly.",
+        "Your application for the {position} position at {company} has been submitted successfully.",
+    ),
+    "newsletter": (
+        "Here is what happened in software engineering this week, from new frameworks to the latest funding rounds.",
+        "{company} shipped several new features this month. Read on for the highlights and what is coming next.",
+    ),
+    "outreach": (
+        "I came across your profile and think you would be a great fit for a {position} opening we are hiring for at {company}.",
+        "I'm a recruiter at {company} and wanted to reach out about an exciting opportunity on our engineering team.",
+    ),
+    "thread": (
+        "Sounds good, I'll bring the slides. Can you send over the spreadsheet before then?",
+        "Thanks for the notes. I think we should move the deadline to next week given everything else going on.",
+    ),
+}
+
+CLOSINGS = {
+    "rejection": (
+        "After careful consideration, we regret to inform you that we will not be moving forward with your application at this time.",
+        "Unfortunately, we have decided to pursue other candidates whose experience more closely matches the role.",
+    ),
+    "assessment": ("Please complete the assessment by the deadline.", "Good luck with the challenge!"),
+    "interview": ("Please use the link below to pick a time that works for you.", "We look forward to speaking with you."),
+    "offer": ("Please review the attached offer letter and let us know by Friday.", "Welcome to the team!"),
+    "received": ("We will be in touch if your qualifications match our needs.", "Thanks again for your interest."),
+    "newsletter": ("Unsubscribe at any time from your preferences page.", "See you next week."),
+    "outreach": ("Would you be open to a quick call this week?", "Let me know if you're interested and I can share more details."),
+    "thread": ("Talk soon.", "Let me know what you think."),
+}
+
+FILLER = (
+    "We are committed to building a diverse team and are an equal opportunity employer. "
+    "Our team reviews every application carefully and considers a wide range of backgrounds. "
+    "If you have questions about your candidacy, please reply to this email or visit our careers page. "
+    "This message and any attachments are confidential and intended only for the named recipient. "
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore. "
+    "The quarterly planning meeting has moved to Thursday; please update your calendars accordingly. "
+)
+
+def generate_email(rng: random.Random, kind: str, body_size: int) -> Dict[str, str]:
+    """One synthetic email of ``kind``, padded to about ``body_size`` characters"""
+    company = rng.choice(COMPANIES)
+    fields = {"company": company, "position": rng.choice(POSITIONS)}
+    name = rng.choice(NAMES)
+
+    subject = rng.choice(SUBJECTS[kind]).format(**fields)
+    opening = rng.choice(OPENINGS[kind]).format(**fields)
+    closing = rng.choice(CLOSINGS[kind]).format(**fields)
+    signature = f"Best regards,\n{company} Recruiting Team" if kind not in ("thread", "newsletter") else rng.choice(NAMES)
+    body = f"Dear {name},\n\n{opening}\n\n{closing}\n\n{signature}"
+
+    if kind in ("thread", "newsletter", "outreach"):
+        sender = f"{rng.choice(NAMES).lower()}@{rng.choice(('gmail.com', 'substack.com', 'linkedin.com'))}"
+    else:
+        sender = rng.choice(ATS_SENDERS).format(domain=company.lower())
+
+    return {"kind": kind, "subject": subject, "body": _pad(rng, kind, body, body_size), "sender": sender}
+
+def generate_corpus(count: int, seed: int = 0, body_size: int = BODY_SIZES["short"], kinds: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    """``count`` emails cycling through ``kinds``, in a shuffled but seeded order"""
+    rng = random.Random(seed)
+    kinds = list(kinds or KINDS)
+    emails = [generate_email(rng, kinds[i % len(kinds)], body_size) for i in range(count)]
+    rng.shuffle(emails)
+    return emails
+
+def _pad(rng: random.Random, kind: str, body: str, body_size: int) -> str:
+    """Grow ``body`` to about ``body_size`` characters the way real emails grow"""
+    if len(body) >= body_size:
+        return body
+
+    if kind == "thread":
+        # Long threads are mostly quoted earlier messages
+        parts = [body]
+        depth = 1
+        while sum(len(part) for part in parts) < body_size:
+            quoted = "\n".join(("> " * depth) + line for line in rng.choice(OPENINGS["thread"] + CLOSINGS["thread"]).split("\n"))
+            parts.append(f"\n\nOn Mon, 6 May 2024 at 10:{depth % 60:02d}, {rng.choice(NAMES)} wrote:\n{quoted}")
+            depth = depth % 8 + 1
+        return "".join(parts)[:body_size]
+
+    # Everything else gets legal footers, newsletter copy or pasted job descriptions
+    repeats = (body_size - len(body)) // len(FILLER) + 1
+    return (body + "\n\n" + FILLER * repeats)[:body_size]
@@ -0,0 +1,229 @@
+"""
+Stand-in for the Gmail REST API, for load tests.
+
+Serves the endpoints ``GmailClient`` calls: profile, messages list and get,
+history and the batch endpoint. Every user gets a mailbox of synthetic
+emails from ``corpus.py``, generated on first use from their ID, so the
+same user always sees the same mail. The user is whoever the bearer token
+names: a token of ``token-<user_id>`` reads ``<user_id>``'s mailbox.
+
+Point the server at it with ``GMAIL_API_URL``. Search queries are not
+evaluated; every list returns the whole mailbox, newest first. History
+never has new messages, so incremental syncs after the first find nothing.
+``GET /_counts`` reports the requests served so far.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from corpus import generate_corpus
+
+TOKEN_PREFIX = "token-"
+HISTORY_ID = "100000"
+# Mail is spread evenly over this many days before now
+MAILBOX_DAYS = 180
+
+class FakeMailboxes:
+    """Each user's synthetic mailbox, built the first time it is read"""
+
+    def __init__(self, size: int = 500, body_size: int = 2000):
+        self.size = size
+        self.body_size = body_size
+        self._mailboxes: Dict[str, List[Dict]] = {}
+        self._by_id: Dict[str, Dict[str, Dict]] = {}
+        self._lock = threading.Lock()
+
+    def messages(self, user_id: str) -> List[Dict]:
+        """The user's messages, newest first"""
+        with self._lock:
+            if user_id not in self._mailboxes:
+                self._mailboxes[user_id] = self._generate(user_id)
+                self._by_id[user_id] = {message['id']: message for message in self._mailboxes[user_id]}
+            return self._mailboxes[user_id]
+
+    def get(self, user_id: str, message_id: str) -> Optional[Dict]:
+        self.messages(user_id)
+        return self._by_id[user_id].get(message_id)
+
+    def _generate(self, user_id: str) -> List[Dict]:
+        seed = int.from_bytes(hashlib.sha1(user_id.encode()).digest()[:8], "big")
+        now = datetime.now(timezone.utc)
+        step = timedelta(days=MAILBOX_DAYS) / max(1, self.size)
+        messages = []
+        for index, email in enumerate(generate_corpus(self.size, seed=seed, body_size=self.body_size)):
+            message_id = hashlib.sha1(f"{user_id}:{index}".encode()).hexdigest()[:16]
+            sent_at = now - step * index
+            data = base64.urlsafe_b64encode(email['body'].encode("utf-8")).decode("ascii")
+            messages.append({
+                "id": message_id,
+                "threadId": message_id,
+                "labelIds": ["INBOX", "CATEGORY_UPDATES"],
+                "snippet": email['body'][:150],
+                "historyId": HISTORY_ID,
+                "internalDate": str(int(sent_at.timestamp() * 1000)),
+                "payload": {
+                    "mimeType": "text/plain",
+                    "headers": [
+                        {"name": "Subject", "value": email['subject']},
+                        {"name": "From", "value": email['sender']},
+                        {"name": "To", "value": f"{user_id}@example.com"},
+                        {"name": "Date", "value": format_datetime(sent_at)},
+                    ],
+                    "body": {"size": len(email['body']), "data": data},
+                },
+            })
+        return messages
+
+def render_message(message: Dict, format: str, metadata_headers: List[str]) -> Dict:
+    """The message as Gmail returns it in ``format``"""
+    if format == "full":
+        return message
+    rendered = {key: value for key, value in message.items() if key != "payload"}
+    if format == "metadata":
+        headers = message['payload']['headers']
+        if metadata_headers:
+            wanted = {name.lower() for name in metadata_headers}
+            headers = [header for header in headers if header['name'].lower() in wanted]
+        rendered["payload"] = {"mimeType": message['payload']['mimeType'], "headers": headers}
+    return rendered
+
+def create_app(
+    mailboxes: FakeMailboxes,
+    latency: float = 0.05,
+    jitter: float = 0.02,
+    rate_limit_fraction: float = 0.0,
+    seed: int = 0
+) -> FastAPI:
+    """Build the fake API.
+
+    Every response waits ``latency`` seconds, give or take up to
+    ``jitter``. ``rate_limit_fraction`` of requests, and of items within a
+    batch, are answered 429 as Gmail does under load.
+    """
+    app = FastAPI()
+    rng = random.Random(seed)
+    # Requests served, by endpoint; read by the load test's report
+    app.state.counts = Counter()
+
+    async def delay():
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+
+    def rate_limited() -> bool:
+        return rate_limit_fraction > 0 and rng.random() < rate_limit_fraction
+
+    def user_of(request: Request) -> Optional[str]:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        return token[len(TOKEN_PREFIX):] if token.startswith(TOKEN_PREFIX) else None
+
+    def error(status: int, message: str) -> JSONResponse:
+        headers = {"Retry-After": "1"} if status == 429 else None
+        return JSONResponse({"error": {"code": status, "message": message}}, status_code=status, headers=headers)
+
+    @app.middleware("http")
+    async def gate(request: Request, call_next):
+        if request.url.path == "/_counts":
+            return await call_next(request)
+        await delay()
+        if user_of(request) is None:
+            return error(401, "Invalid Credentials")
+        if not request.url.path.startswith("/batch") and rate_limited():
+            app.state.counts["rate_limited"] += 1
+            return error(429, "Rate Limit Exceeded")
+        return await call_next(request)
+
+    @app.get("/_counts")
+    async def counts():
+        return app.state.counts
+
+    @app.get("/gmail/v1/users/me/profile")
+    async def profile(request: Request):
+        app.state.counts["profile"] += 1
+        user_id = user_of(request)
+        return {
+            "emailAddress": f"{user_id}@example.com",
+            "messagesTotal": len(mailboxes.messages(user_id)),
+            "historyId": HISTORY_ID,
+        }
+
+    @app.get("/gmail/v1/users/me/history")
+    async def history(request: Request, startHistoryId: str):
+        app.state.counts["history"] += 1
+        return {"history": [], "historyId": HISTORY_ID}
+
+    @app.get("/gmail/v1/users/me/messages")
+    async def list_messages(request: Request, maxResults: int = 100, pageToken: Optional[str] = None):
+        app.state.counts["list"] += 1
+        messages = mailboxes.messages(user_of(request))
+        start = int(pageToken or 0)
+        end = start + min(maxResults, 500)
+        response = {
+            "messages": [{"id": message['id'], "threadId": message['threadId']} for message in messages[start:end]],
+            "resultSizeEstimate": len(messages),
+        }
+        if end < len(messages):
+            response["nextPageToken"] = str(end)
+        return response
+
+    @app.get("/gmail/v1/users/me/messages/{message_id}")
+    async def get_message(request: Request, message_id: str, format: str = "full"):
+        app.state.counts["get"] += 1
+        message = mailboxes.get(user_of(request), message_id)
+        if message is None:
+            return error(404, "Requested entity was not found.")
+        return render_message(message, format, request.query_params.getlist("metadataHeaders"))
+
+    @app.post("/batch/gmail/v1")
+    async def batch(request: Request):
+        app.state.counts["batch"] += 1
+        user_id = user_of(request)
+        boundary = request.headers["content-type"].split("boundary=", 1)[1]
+        body = (await request.body()).decode("utf-8")
+
+        parts = []
+        for part in body.split(f"--{boundary}")[1:-1]:
+            headers, request_line = part.strip().split("\r\n\r\n", 1)
+            content_id = next(
+                line.split(":", 1)[1].strip() for line in headers.split("\r\n")
+                if line.lower().startswith("content-id")
+            )
+            path = request_line.split(" ")[1]
+            status, payload = _batch_item(mailboxes, user_id, path, rate_limited())
+            if status == 429:
+                app.state.counts["rate_limited"] += 1
+            app.state.counts["batch_items"] += 1
+            parts.append(
+                f"--batch_response\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id.strip('<>')}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(payload)}\r\n"
+            )
+        parts.append("--batch_response--")
+        return Response("".join(parts), media_type="multipart/mixed; boundary=batch_response")
+
+    return app
+
+def _batch_item(mailboxes: FakeMailboxes, user_id: str, path: str, rate_limited: bool):
+    """``(status, payload)`` for one ``GET /gmail/v1/users/me/messages/<id>?...`` in a batch"""
+    if rate_limited:
+        return 429, {"error": {"code": 429, "message": "Rate Limit Exceeded"}}
+    url = urlsplit(path)
+    message_id = unquote(url.path.rsplit("/", 1)[1])
+    params = parse_qs(url.query)
+    message = mailboxes.get(user_id, message_id)
+    if message is None:
+        return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+    return 200, render_message(message, params.get("format", ["full"])[0], params.get("metadataHeaders", []))
@@ -0,0 +1,260 @@
+"""
+Stand-in for Supabase's PostgREST API, for load tests.
+
+Tables live in memory and are created on first write. It understands the
+subset of PostgREST the server uses: ``select`` of columns, the ``eq``,
+``neq``, ``gt``, ``gte``, ``lt``, ``lte``, ``in``, ``is`` and ``ilike``
+filters (each optionally negated with ``not.``), ``or=(...)`` with nested
+``and(...)``, ``order``, ``limit`` and ``offset``, inserts, upserts with
+``on_conflict`` (one column or several, merging or ignoring duplicates), updates and deletes. Point the server at it with ``SUPABASE_URL``.
+
+Rows without an ``id`` get the next integer for their table, as a serial
+primary key would. ``GET /_counts`` reports the requests served so far.
+"""
+
+import asyncio
+import itertools
+import random
+import re
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+Row = Dict
+Predicate = Callable[[Row], bool]
+
+OPERATORS = {
+    "eq": lambda value, operand: value == operand,
+    "neq": lambda value, operand: value != operand,
+    "gt": lambda value, operand: value is not None and value > operand,
+    "gte": lambda value, operand: value is not None and value >= operand,
+    "lt": lambda value, operand: value is not None and value < operand,
+    "lte": lambda value, operand: value is not None and value <= operand,
+}
+
+# Query parameters that aren't column filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns", "or", "and"}
+
+class FakeDatabase:
+    """In-memory tables with a serial ``id`` per table"""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Row]] = defaultdict(list)
+        self._ids = defaultdict(lambda: itertools.count(1))
+
+    def insert(self, table: str, rows: List[Row], on_conflict: Optional[str] = None, merge: bool = False, ignore: bool = False) -> List[Row]:
+        saved = []
+        for row in rows:
+            row = dict(row)
+            existing = None
+            keys = on_conflict.split(",") if on_conflict else []
+            if keys and all(row.get(key) is not None for key in keys):
+                existing = next(
+                    (old for old in self.tables[table] if all(old.get(key) == row[key] for key in keys)), None
+                )
+            if existing is not None and merge:
+                existing.update(row)
+                saved.append(existing)
+                continue
+            if existing is not None and ignore:
+                continue
+            if existing is not None:
+                raise ValueError(f"duplicate key value violates unique constraint on {table}.{on_conflict}")
+            if on_conflict in (None, "id") and "id" not in row:
+                row["id"] = next(self._ids[table])
+            self.tables[table].append(row)
+            saved.append(row)
+        return saved
+
+def parse_filter(column: str, expression: str) -> Predicate:
+    """Predicate for one PostgREST filter, e.g. ``user_id`` and ``eq.abc``"""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[len("not."):]
+    operator, _, operand = expression.partition(".")
+
+    if operator == "in":
+        options = {_unquote(option) for option in _split(operand.strip("()"))}
+        test = lambda value: _text(value) in options
+    elif operator == "is":
+        expected = {"null": None, "true": True, "false": False}[operand]
+        test = lambda value: value is expected
+    elif operator == "ilike":
+        pattern = _like_pattern(_unquote(operand))
+        test = lambda value: value is not None and pattern.fullmatch(str(value)) is not None
+    else:
+        compare = OPERATORS[operator]
+        operand = _unquote(operand)
+        test = lambda value: compare(value, _coerce(operand, value))
+
+    if negate:
+        return lambda row: not test(row.get(column))
+    return lambda row: test(row.get(column))
+
+def parse_logic(expression: str, combine=any) -> Predicate:
+    """Predicate for the inside of ``or=(...)`` or ``and(...)``"""
+    predicates = []
+    for term in _split(expression):
+        if term.startswith(("and(", "or(")):
+            name, _, inner = term.partition("(")
+            predicates.append(parse_logic(inner[:-1], all if name == "and" else any))
+        else:
+            column, _, filter_expression = term.partition(".")
+            predicates.append(parse_filter(column, filter_expression))
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+def row_filter(params) -> Predicate:
+    predicates = [
+        parse_filter(column, expression)
+        for column, expression in params.multi_items()
+        if column not in RESERVED_PARAMS
+    ]
+    if "or" in params:
+        predicates.append(parse_logic(params["or"][1:-1], any))
+    return lambda row: all(predicate(row) for predicate in predicates)
+
+def project(rows: List[Row], select: Optional[str]) -> List[Row]:
+    if not select or select == "*":
+        return rows
+    columns = [column.strip() for column in select.split(",")]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+def order(rows: List[Row], spec: Optional[str]) -> List[Row]:
+    if not spec:
+        return rows
+    # Sort by the last key first; Python's sort is stable
+    for term in reversed(spec.split(",")):
+        column, _, direction = term.partition(".")
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=direction.startswith("desc"))
+        # PostgreSQL puts nulls last ascending and first descending
+        rows = missing + present if direction.startswith("desc") else present + missing
+    return rows
+
+def create_app(db: FakeDatabase, latency: float = 0.005, jitter: float = 0.002, seed: int = 0) -> FastAPI:
+    """Build the fake API; every response waits ``latency`` seconds, give or take ``jitter``"""
+    app = FastAPI()
+    rng = random.Random(seed)
+    # Requests served, by method and table; read by the load test's report
+    app.state.counts = Counter()
+
+    @app.middleware("http")
+    async def delay(request: Request, call_next):
+        if request.url.path == "/_counts":
+            return await call_next(request)
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+        return await call_next(request)
+
+    @app.get("/_counts")
+    async def counts():
+        return app.state.counts
+
+    @app.get("/rest/v1/{table}")
+    async def select(table: str, request: Request):
+        app.state.counts[f"GET {table}"] += 1
+        params = request.query_params
+        matches = row_filter(params)
+        rows = [row for row in db.tables[table] if matches(row)]
+        rows = order(rows, params.get("order"))
+        offset = int(params.get("offset", 0))
+        limit = params.get("limit")
+        rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+        return project(rows, params.get("select"))
+
+    @app.post("/rest/v1/{table}")
+    async def insert(table: str, request: Request):
+        app.state.counts[f"POST {table}"] += 1
+        payload = await request.json()
+        rows = payload if isinstance(payload, list) else [payload]
+        prefer = request.headers.get("prefer", "")
+        try:
+            saved = db.insert(
+                table, rows,
+                on_conflict=request.query_params.get("on_conflict"),
+                merge="resolution=merge-duplicates" in prefer,
+                ignore="resolution=ignore-duplicates" in prefer
+            )
+        except ValueError as e:
+            return JSONResponse({"code": "23505", "message": str(e)}, status_code=409)
+        return _respond(saved, prefer, status=201)
+
+    @app.patch("/rest/v1/{table}")
+    async def update(table: str, request: Request):
+        app.state.counts[f"PATCH {table}"] += 1
+        changes = await request.json()
+        matches = row_filter(request.query_params)
+        updated = [row for row in db.tables[table] if matches(row)]
+        for row in updated:
+            row.update(changes)
+        return _respond(updated, request.headers.get("prefer", ""), status=200)
+
+    @app.delete("/rest/v1/{table}")
+    async def delete(table: str, request: Request):
+        app.state.counts[f"DELETE {table}"] += 1
+        matches = row_filter(request.query_params)
+        deleted = [row for row in db.tables[table] if matches(row)]
+        db.tables[table] = [row for row in db.tables[table] if not matches(row)]
+        return _respond(deleted, request.headers.get("prefer", ""), status=200)
+
+    return app
+
+def _respond(rows: List[Row], prefer: str, status: int) -> Response:
+    if "return=representation" in prefer:
+        return JSONResponse(rows, status_code=status)
+    return Response(status_code=204 if status == 200 else status)
+
+def _split(expression: str) -> List[str]:
+    """Split on commas outside parentheses and double quotes"""
+    terms, depth, quoted, current = [], 0, False, []
+    for char in expression:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            terms.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        terms.append("".join(current))
+    return terms
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+def _text(value) -> str:
+    return value if isinstance(value, str) else str(value)
+
+def _coerce(operand: str, like):
+    """Parse the operand to the type of the column value it is compared with"""
+    if isinstance(like, bool):
+        return operand == "true"
+    if isinstance(like, (int, float)):
+        try:
+            return int(operand)
+        except ValueError:
+            return float(operand)
+    return operand
+
+def _like_pattern(pattern: str) -> "re.Pattern":
+    regex = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            regex.append(re.escape(char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "%":
+            regex.append(".*")
+        elif char == "_":
+            regex.append(".")
+        else:
+            regex.append(re.escape(char))
+    return re.compile("".join(regex), re.IGNORECASE | re.DOTALL)
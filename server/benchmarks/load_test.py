@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the API against local fakes of Gmail and Supabase.
+
+Run from the server directory:
+
+    python benchmarks/load_test.py [--users N] [--mailbox-size M] [--output results.json]
+
+Fake Gmail (``fake_gmail.py``) and PostgREST (``fake_postgrest.py``)
+servers run on localhost in a child process, so their work doesn't compete
+with the API for this process's GIL. The FastAPI app from ``main.py`` runs
+in this process and is driven in memory through httpx's ASGI transport, so
+every request is handled on the event loop the load test measures.
+
+Each simulated user is seeded into the fake ``users`` table with tokens,
+as the OAuth callback would store them, then logs in by loading their
+dashboard, starts a sync and polls it to completion, and loads the
+dashboard again ``--dashboard-loads`` times. The Google OAuth exchange
+itself isn't simulated.
+
+Results are written as JSON: latency and status codes per route, overall
+throughput, sync durations, how late the API and sync event loops woke up
+from short sleeps (time they were stalled by blocking work), and what the
+fakes served.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import socket
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bench_classifier import percentile
+
+# Bump when the JSON layout changes
+RESULTS_VERSION = 1
+
+# Loop monitors sleep this long and record how late they wake
+MONITOR_INTERVAL_SECONDS = 0.005
+# A wake-up later than this counts towards stalled time
+STALL_THRESHOLD_SECONDS = 0.01
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+def serve_fakes(gmail_port: int, postgrest_port: int, options: Dict):
+    """Run both fakes until the process is terminated; the child process entry point"""
+    import uvicorn
+
+    import fake_gmail
+    import fake_postgrest
+
+    gmail = fake_gmail.create_app(
+        fake_gmail.FakeMailboxes(size=options["mailbox_size"], body_size=options["body_size"]),
+        latency=options["gmail_latency"],
+        jitter=options["gmail_latency"] / 2,
+        rate_limit_fraction=options["rate_limit_fraction"]
+    )
+    postgrest = fake_postgrest.create_app(
+        fake_postgrest.FakeDatabase(),
+        latency=options["db_latency"],
+        jitter=options["db_latency"] / 2
+    )
+    servers = [
+        uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+        for app, port in ((gmail, gmail_port), (postgrest, postgrest_port))
+    ]
+
+    async def serve():
+        await asyncio.gather(*(server.serve() for server in servers))
+
+    asyncio.run(serve())
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(url: str, timeout: float = 15):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            httpx.get(url).raise_for_status()
+            return
+        except httpx.HTTPError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+def seed_users(postgrest_url: str, count: int) -> List[Dict]:
+    """Store ``count`` connected users the way the OAuth callback does"""
+    expiry = (datetime.now(timezone.utc) + timedelta(days=1)).isoformat()
+    users = [
+        {
+            "id": f"user-{index:05d}",
+            "email": f"user-{index:05d}@example.com",
+            "name": f"Load Test User {index}",
+            "google_id": str(10 ** 12 + index),
+            "access_token": f"token-user-{index:05d}",
+            "refresh_token": f"refresh-user-{index:05d}",
+            "token_expiry": expiry,
+        }
+        for index in range(count)
+    ]
+    httpx.post(f"{postgrest_url}/rest/v1/users", json=users).raise_for_status()
+    return users
+
+class LoopMonitor:
+    """Measures how late an event loop wakes from short sleeps"""
+
+    def __init__(self):
+        self.lags: List[float] = []
+        self._stopped = False
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while not self._stopped:
+            expected = loop.time() + MONITOR_INTERVAL_SECONDS
+            await asyncio.sleep(MONITOR_INTERVAL_SECONDS)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    def stop(self):
+        self._stopped = True
+
+    def report(self) -> Dict:
+        lags = sorted(self.lags) or [0.0]
+        return {
+            "samples": len(self.lags),
+            "lag_p50_ms": round(percentile(lags, 0.50) * 1e3, 2),
+            "lag_p99_ms": round(percentile(lags, 0.99) * 1e3, 2),
+            "lag_max_ms": round(lags[-1] * 1e3, 2),
+            "stalled_seconds": round(sum(lag for lag in lags if lag > STALL_THRESHOLD_SECONDS), 3),
+        }
+
+class Recorder:
+    """Latency and status codes of every request, by route"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.sync_seconds: List[float] = []
+        self.sync_outcomes = Counter()
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            self.statuses[route][response.status_code] += 1
+            return response
+        except Exception as e:
+            self.statuses[route][type(e).__name__] += 1
+            return None
+        finally:
+            self.latencies[route].append(time.perf_counter() - start)
+
+    def report(self, elapsed: float) -> Dict:
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            routes[route] = {
+                "requests": len(latencies),
+                "statuses": {str(status): count for status, count in self.statuses[route].items()},
+                "p50_ms": round(percentile(latencies, 0.50) * 1e3, 2),
+                "p95_ms": round(percentile(latencies, 0.95) * 1e3, 2),
+                "p99_ms": round(percentile(latencies, 0.99) * 1e3, 2),
+                "max_ms": round(latencies[-1] * 1e3, 2),
+            }
+        total = sum(len(latencies) for latencies in self.latencies.values())
+        syncs = sorted(self.sync_seconds) or [0.0]
+        return {
+            "requests": total,
+            "requests_per_second": round(total / elapsed, 1) if elapsed else None,
+            "routes": routes,
+            "syncs": {
+                "outcomes": dict(self.sync_outcomes),
+                "p50_seconds": round(percentile(syncs, 0.50), 3),
+                "p99_seconds": round(percentile(syncs, 0.99), 3),
+                "max_seconds": round(syncs[-1], 3),
+            },
+        }
+
+async def simulate_user(client: httpx.AsyncClient, recorder: Recorder, user: Dict, args, start_delay: float):
+    await asyncio.sleep(start_delay)
+    params = {"user_email": user['email']}
+    etag = None
+
+    async def load_dashboard():
+        nonlocal etag
+        headers = {"If-None-Match": etag} if etag else {}
+        jobs, _ = await asyncio.gather(
+            recorder.request(client, "GET /api/jobs", "GET", "/api/jobs", params=params, headers=headers),
+            recorder.request(client, "GET /api/insights", "GET", "/api/insights", params=params),
+        )
+        if jobs is not None and jobs.status_code == 200:
+            etag = jobs.headers.get("ETag")
+
+    # Logging in lands on the dashboard with every cache cold
+    await load_dashboard()
+
+    path = "/api/backfill-emails" if args.backfill else "/api/sync-emails"
+    started = time.perf_counter()
+    response = await recorder.request(client, f"POST {path}", "POST", path, params=params)
+    if response is None or response.status_code != 202:
+        recorder.sync_outcomes["not_started"] += 1
+    else:
+        job_id = response.json()["job_id"]
+        while True:
+            await asyncio.sleep(args.poll_interval)
+            poll = await recorder.request(client, "GET /api/sync-jobs/{id}", "GET", f"/api/sync-jobs/{job_id}", params=params)
+            if poll is not None and poll.status_code == 200 and poll.json()["status"] in FINISHED_STATUSES:
+                recorder.sync_outcomes[poll.json()["status"]] += 1
+                recorder.sync_seconds.append(time.perf_counter() - started)
+                break
+
+    for _ in range(args.dashboard_loads):
+        await asyncio.sleep(args.think_time)
+        await load_dashboard()
+
+async def drive(app, users: List[Dict], args) -> Dict:
+    from app.services.sync_jobs import get_sync_job_manager
+
+    api_monitor = LoopMonitor()
+    sync_monitor = LoopMonitor()
+    api_task = asyncio.create_task(api_monitor.run())
+    sync_future = asyncio.run_coroutine_threadsafe(sync_monitor.run(), get_sync_job_manager()._loop)
+
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            simulate_user(client, recorder, user, args, start_delay=args.ramp_up * index / max(1, len(users)))
+            for index, user in enumerate(users)
+        ))
+        elapsed = time.perf_counter() - started
+
+    api_monitor.stop()
+    sync_monitor.stop()
+    await api_task
+    await asyncio.wrap_future(sync_future)
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        **recorder.report(elapsed),
+        "event_loop": {"api": api_monitor.report(), "sync": sync_monitor.report()},
+    }
+
+def main(args) -> Dict:
+    gmail_port, postgrest_port = free_port(), free_port()
+    gmail_url = f"http://127.0.0.1:{gmail_port}"
+    postgrest_url = f"http://127.0.0.1:{postgrest_port}"
+    options = {
+        "mailbox_size": args.mailbox_size,
+        "body_size": args.body_size,
+        "gmail_latency": args.gmail_latency,
+        "db_latency": args.db_latency,
+        "rate_limit_fraction": args.rate_limit_fraction,
+    }
+
+    fakes = multiprocessing.get_context("spawn").Process(
+        target=serve_fakes, args=(gmail_port, postgrest_port, options), daemon=True
+    )
+    fakes.start()
+    try:
+        wait_until_up(f"{gmail_url}/_counts")
+        wait_until_up(f"{postgrest_url}/_counts")
+        users = seed_users(postgrest_url, args.users)
+
+        # The app reads these at import time
+        os.environ.update({
+            "SUPABASE_URL": postgrest_url,
+            "SUPABASE_KEY": "load-test-service-role-key-not-a-real-secret",
+            "GMAIL_API_URL": gmail_url,
+            "GOOGLE_CLIENT_ID": "load-test",
+            "GOOGLE_CLIENT_SECRET": "load-test",
+            "SYNC_SCHEDULER_ENABLED": "false",
+            "LOG_LEVEL": args.log_level,
+        })
+        os.environ.pop("REDIS_URL", None)
+        from main import app
+
+        results = asyncio.run(drive(app, users, args))
+        results["fakes"] = {
+            "gmail": httpx.get(f"{gmail_url}/_counts").json(),
+            "postgrest": httpx.get(f"{postgrest_url}/_counts").json(),
+        }
+    finally:
+        fakes.terminate()
+        fakes.join()
+
+    return {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        **results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="simulated users")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users arrive")
+    parser.add_argument("--dashboard-loads", type=int, default=5, help="dashboard loads per user after the sync")
+    parser.add_argument("--think-time", type=float, default=0.5, help="seconds between a user's dashboard loads")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="seconds between sync status polls")
+    parser.add_argument("--backfill", action="store_true", help="backfill each whole mailbox instead of a normal sync")
+    parser.add_argument("--mailbox-size", type=int, default=200, help="emails in each fake mailbox")
+    parser.add_argument("--body-size", type=int, default=2000, help="characters in each fake email body")
+    parser.add_argument("--gmail-latency", type=float, default=0.05, help="seconds per fake Gmail response")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds per fake PostgREST response")
+    parser.add_argument("--rate-limit-fraction", type=float, default=0.0, help="fraction of Gmail requests answered 429")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    args = parser.parse_args()
+
+    output = json.dumps(main(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.services.response_cache as response_cache
+from app.services.response_cache import InMemoryBackend, ResponseCache
+
+@pytest.fixture(autouse=True)
+def fresh_response_cache(monkeypatch):
+    """Give every test an empty in-process response cache"""
+    monkeypatch.setattr(response_cache, "response_cache", ResponseCache(InMemoryBackend()))
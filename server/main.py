@@ -1,12 +1,27 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from app.utils.logs import configure_logging
 import os
 
 load_dotenv()
+configure_logging()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Imported late for the same reason as the routers below
+    from app.services.sync_scheduler import SYNC_SCHEDULER_ENABLED, get_sync_scheduler
+    
+    scheduler = get_sync_scheduler() if SYNC_SCHEDULER_ENABLED else None
+    if scheduler:
+        scheduler.start()
+    yield
+    if scheduler:
+        scheduler.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -15,6 +30,7 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Supabase client initialization
@@ -25,6 +41,7 @@ supabase: Client = create_client(
 
 # Import routers after initializing app and database
 from app.routes import auth, jobs
+from app.services.metrics import render_metrics
 
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
 app.include_router(jobs.router, prefix="/api", tags=["jobs"])
@@ -41,4 +58,13 @@ def health_check():
         supabase.table("users").select("id").limit(1).execute()
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
\ No newline at end of file
+        return {"status": "unhealthy", "error": str(e)}
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint for sync metrics"""
+    rendered = render_metrics()
+    if rendered is None:
+        raise HTTPException(status_code=503, detail="prometheus_client is not installed")
+    body, content_type = rendered
+    return Response(content=body, media_type=content_type)
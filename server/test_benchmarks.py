@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark corpus, regression check and load-test fakes
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+from fastapi.testclient import TestClient
+from google.oauth2.credentials import Credentials
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+from app.services.gmail_client import GmailClient, GmailPool
+from bench_classifier import compare, run
+from corpus import KINDS, generate_corpus
+from fake_gmail import FakeMailboxes, create_app as create_gmail_app
+from fake_postgrest import FakeDatabase, create_app as create_postgrest_app
+
+def test_corpus_is_reproducible_and_sized():
+    first = generate_corpus(40, seed=7, body_size=5000)
+    assert first == generate_corpus(40, seed=7, body_size=5000)
+    assert first != generate_corpus(40, seed=8, body_size=5000)
+
+    assert {email['kind'] for email in first} == set(KINDS)
+    assert all(len(email['body']) == 5000 for email in first)
+
+def test_compare_reports_slower_methods_only():
+    baseline = run(emails=8, seed=0, rounds=1, sizes=["short"])
+    current = run(emails=8, seed=0, rounds=1, sizes=["short"])
+    methods = current["results"]["short"]["methods"]
+    for name, stats in methods.items():
+        stats["p50_us"] = baseline["results"]["short"]["methods"][name]["p50_us"]
+    methods["classify_application_status"]["p50_us"] *= 2
+
+    regressions = compare(baseline, current, threshold=0.2)
+
+    assert len(regressions) == 1
+    assert "classify_application_status" in regressions[0]
+
+def test_fake_gmail_serves_the_gmail_client():
+    async def main():
+        app = create_gmail_app(FakeMailboxes(size=30), latency=0, jitter=0)
+        pool = GmailPool(transport=httpx.ASGITransport(app=app))
+        try:
+            client = GmailClient(Credentials(token="token-user-1"), "user-1", pool=pool)
+            page = await client.list_messages("anything", max_results=20)
+            message_ids = [message['id'] for message in page['messages']]
+            messages = await client.batch_get_messages(message_ids[:3], format="metadata", metadata_headers=["Subject"])
+            return page, messages
+        finally:
+            await pool.aclose()
+
+    page, messages = asyncio.run(main())
+
+    assert len(page['messages']) == 20 and page['nextPageToken'] == "20"
+    assert [status for status, _ in messages.values()] == [200, 200, 200]
+    assert all([header['name'] for header in payload['payload']['headers']] == ["Subject"] for _, payload in messages.values())
+
+def test_fake_postgrest_answers_the_queries_the_server_sends():
+    db = FakeDatabase()
+    db.insert("jobs", [
+        {"user_id": "u1", "company": "Amazon", "status": "applied", "applied_date": "2024-05-01"},
+        {"user_id": "u1", "company": "Stripe", "status": "rejected", "applied_date": "2024-05-03"},
+        {"user_id": "u1", "company": "Amplitude", "status": "offered", "applied_date": "2024-05-03"},
+        {"user_id": "u2", "company": "Amazon", "status": "applied", "applied_date": "2024-05-02"},
+    ])
+    client = TestClient(create_postgrest_app(db, latency=0, jitter=0))
+
+    # As sent by list_jobs for the page after a cursor
+    rows = client.get("/rest/v1/jobs", params={
+        "select": "id,company",
+        "user_id": "eq.u1",
+        "company": "ilike.Am%",
+        "or": '(applied_date.lt."2024-05-03",and(applied_date.eq."2024-05-03",id.lt."3"))',
+        "order": "applied_date.desc,id.desc",
+    }).json()
+    assert rows == [{"id": 1, "company": "Amazon"}]
+
+    # As sent by JobWriter.flush
+    client.post(
+        "/rest/v1/jobs", params={"on_conflict": "id"},
+        json=[{"id": 2, "status": "offered"}, {"user_id": "u2", "company": "Figma"}],
+        headers={"Prefer": "return=representation,resolution=merge-duplicates,missing=default"}
+    )
+    statuses = client.get("/rest/v1/jobs", params={"select": "id,status", "status": "in.(offered)", "order": "id.asc"}).json()
+    assert statuses == [{"id": 2, "status": "offered"}, {"id": 3, "status": "offered"}]
+    assert len(db.tables["jobs"]) == 5
+    assert client.get("/rest/v1/jobs", params={"company": "not.is.null", "limit": "2", "offset": "3"}).json()[-1]['company'] == "Figma"
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for cached classifier verdicts
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.job import ApplicationStatus
+from app.services.classification_cache import ClassificationCache
+from app.services.email_parser import apply_cached_verdicts
+from app.services.insights import InsightsStore
+from app.services.job_index import JobIndex
+from app.services.job_writer import JobWriter
+from test_job_writer import FakeSupabase, email
+
+def test_verdicts_round_trip_for_the_same_classifier_version():
+    db = FakeSupabase()
+    cache = ClassificationCache(client=db, version="1")
+
+    cache.store("u", {"m1": email("Amazon", "SDE Intern", ApplicationStatus.REJECTED), "m2": None})
+
+    assert cache.lookup("u", ["m1", "m2", "m3"]) == {
+        "m1": email("Amazon", "SDE Intern", "rejected"),
+        "m2": None,
+    }
+    assert cache.lookup("someone-else", ["m1"]) == {}
+    # A new classifier ignores the old verdicts, then replaces them
+    bumped = ClassificationCache(client=db, version="2")
+    assert bumped.lookup("u", ["m1", "m2"]) == {}
+    bumped.store("u", {"m1": None})
+    assert bumped.lookup("u", ["m1"]) == {"m1": None}
+    assert len(db.tables["email_classifications"]) == 2
+
+def test_evict_drops_old_versions_and_the_oldest_beyond_the_bound():
+    db = FakeSupabase()
+    ClassificationCache(client=db, version="1").store("u", {"stale": None})
+    cache = ClassificationCache(client=db, version="2", max_per_user=2)
+    for index in range(4):
+        cache.store("u", {f"m{index}": None})
+        db.tables["email_classifications"][-1]["classified_at"] = f"2024-05-0{index + 1}T00:00:00"
+    cache.store("other", {"m0": None})
+
+    cache.evict("u")
+
+    remaining = sorted((row["user_id"], row["message_id"]) for row in db.tables["email_classifications"])
+    assert remaining == [("other", "m0"), ("u", "m2"), ("u", "m3")]
+
+def test_cached_verdicts_are_staged_without_fetching():
+    db = FakeSupabase()
+    cache = ClassificationCache(client=db, version="1")
+    cache.store("u", {"m1": email("Stripe", "Software Engineer", "offered"), "m2": None})
+    writer = JobWriter("u", JobIndex([]), client=db, insights=InsightsStore(client=db))
+
+    uncached, cached = asyncio.run(apply_cached_verdicts(cache, "u", ["m1", "m2", "m3"], writer))
+
+    assert uncached == ["m3"]
+    assert sorted(cached) == ["m1", "m2"]
+    saved = writer.flush()
+    assert [(job["company"], job["status"]) for job in saved] == [("Stripe", "offered")]
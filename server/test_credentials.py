@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for sharing and refreshing Google credentials across syncs
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+from google.oauth2.credentials import Credentials
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.credentials import CredentialsManager, parse_expiry
+
+class RecordingClient:
+    """Records users.update(...).eq(...) calls"""
+
+    def __init__(self):
+        self.updates = []
+
+    def table(self, name):
+        assert name == "users"
+        return self
+
+    def update(self, values):
+        self.pending = values
+        return self
+
+    def eq(self, column, value):
+        self.updates.append((value, self.pending))
+        return self
+
+    def execute(self):
+        return None
+
+class CountingCredentials(Credentials):
+    refreshes = 0
+
+    def refresh(self, request):
+        # Slow enough that concurrent callers pile up on the lock
+        time.sleep(0.05)
+        type(self).refreshes += 1
+        self.token = f"fresh-{type(self).refreshes}"
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+def user_row(**overrides):
+    row = {
+        "id": "u1",
+        "access_token": "stored",
+        "refresh_token": "refresh-1",
+        "token_expiry": (datetime.utcnow() + timedelta(hours=1)).isoformat()
+    }
+    row.update(overrides)
+    return row
+
+def test_credentials_keep_their_expiry_and_are_reused():
+    manager = CredentialsManager(client=RecordingClient())
+
+    first = manager.get(user_row())
+    second = manager.get(user_row(access_token="older copy from the cache"))
+
+    assert first is second
+    assert first.expiry is not None and first.valid
+
+    # A new refresh token means the user reconnected
+    reconnected = manager.get(user_row(refresh_token="refresh-2", access_token="new"))
+    assert reconnected is not first
+    assert reconnected.token == "new"
+
+def test_concurrent_refreshes_hit_the_token_endpoint_once():
+    client = RecordingClient()
+    manager = CredentialsManager(client=client)
+    credentials = CountingCredentials(token="stale", refresh_token="refresh-1")
+    manager.remember("u1", credentials)
+
+    threads = [
+        threading.Thread(target=manager.refresh, args=("u1", credentials, "stale"))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manager.close()
+
+    assert CountingCredentials.refreshes == 1
+    assert credentials.token == "fresh-1"
+    assert client.updates == [("u1", {"access_token": "fresh-1", "token_expiry": credentials.expiry.isoformat()})]
+
+def test_stored_expiry_is_parsed_to_naive_utc():
+    assert parse_expiry("2024-05-01T12:00:00+02:00") == datetime(2024, 5, 1, 10, 0)
+    assert parse_expiry("2024-05-01T12:00:00") == datetime(2024, 5, 1, 12, 0)
+    assert parse_expiry(None) is None
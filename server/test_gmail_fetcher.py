@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Tests for the async Gmail client and batched message fetching against a
+local fake Gmail transport
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+import os
+import sys
+from email import message_from_string
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+from google.oauth2.credentials import Credentials
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.gmail_client import GmailApiError, GmailClient, GmailPool
+from app.services.gmail_fetcher import fetch_messages, iter_message_pages, list_added_message_ids
+from app.models.sync_state import SyncCheckpoint
+from app.services.email_parser import list_candidate_message_ids, prefilter_messages
+
+class FakeGmail:
+    """httpx transport handler that answers Gmail REST and batch requests locally"""
+
+    def __init__(self, messages, failures=None, history_pages=None, request_failures=None, delay=0):
+        self.messages = messages
+        # message id -> list of HTTP statuses to return before succeeding
+        self.failures = failures or {}
+        # history.list pages; None means the start historyId has expired
+        self.history_pages = history_pages
+        # HTTP statuses to answer whole requests with before serving them
+        self.request_failures = list(request_failures or [])
+        self.delay = delay
+        self.batch_calls = 0
+        # Query parameters of every history and messages.list request
+        self.history_requests = []
+        self.list_requests = []
+        # (message id, format) for every message a batch asked for
+        self.fetched = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return self._handle(request)
+        finally:
+            self.in_flight -= 1
+
+    def _handle(self, request):
+        assert request.headers["authorization"] == "Bearer token"
+        if self.request_failures:
+            return httpx.Response(self.request_failures.pop(0), json={"error": {"message": "fake failure"}})
+
+        path = request.url.path
+        params = parse_qs(request.url.query.decode())
+        if path == "/batch/gmail/v1":
+            return self._batch(request)
+        if path.endswith("/history"):
+            return self._history(params)
+        if path.endswith("/messages"):
+            return self._list(params)
+        raise AssertionError(f"Unexpected request: {request.method} {request.url}")
+
+    def _batch(self, request):
+        self.batch_calls += 1
+        envelope = message_from_string(
+            f"Content-Type: {request.headers['content-type']}\r\n\r\n{request.content.decode()}"
+        )
+
+        boundary = "fake_batch_boundary"
+        chunks = []
+        for part in envelope.get_payload():
+            request_line = part.get_payload().split("\n", 1)[0]
+            url = urlparse(request_line.split(" ")[1])
+            message_id = url.path.rsplit("/", 1)[-1]
+            query = parse_qs(url.query)
+            self.fetched.append((message_id, query["format"][0]))
+            status, payload = self._respond(message_id)
+            if status == 200 and query["format"][0] == "metadata":
+                payload = self._metadata(payload, query)
+            content_id = part["Content-ID"].replace("<", "<response-", 1)
+            chunks.append(
+                f"--{boundary}\r\n"
+                f"Content-Type: application/http\r\n"
+                f"Content-ID: {content_id}\r\n\r\n"
+                f"HTTP/1.1 {status} STATUS\r\n"
+                f"Content-Type: application/json\r\n\r\n"
+                f"{json.dumps(payload)}\r\n"
+            )
+        chunks.append(f"--{boundary}--")
+
+        return httpx.Response(
+            200,
+            headers={"content-type": f"multipart/mixed; boundary={boundary}"},
+            content="".join(chunks).encode("utf-8")
+        )
+
+    def _list(self, params):
+        self.list_requests.append(params)
+        start = int(params.get("pageToken", ["0"])[0])
+        end = start + int(params["maxResults"][0])
+        ids = list(self.messages)
+        payload = {"messages": [{"id": message_id} for message_id in ids[start:end]]}
+        if end < len(ids):
+            payload["nextPageToken"] = str(end)
+        return httpx.Response(200, json=payload)
+
+    def _history(self, params):
+        self.history_requests.append(params)
+        if self.history_pages is None:
+            return httpx.Response(404, json={"error": {"code": 404, "message": "Not Found"}})
+        page = int(params.get("pageToken", ["0"])[0])
+        payload = dict(self.history_pages[page], historyId=str(100 + page))
+        if page + 1 < len(self.history_pages):
+            payload["nextPageToken"] = str(page + 1)
+        return httpx.Response(200, json=payload)
+
+    def _metadata(self, message, query):
+        assert query["fields"] == ["id,labelIds,snippet,payload/headers"]
+        wanted = set(query["metadataHeaders"])
+        headers = [header for header in message["payload"]["headers"] if header["name"] in wanted]
+        return {
+            "id": message["id"],
+            "labelIds": message.get("labelIds", []),
+            "snippet": message.get("snippet", ""),
+            "payload": {"headers": headers}
+        }
+
+    def _respond(self, message_id):
+        pending_failures = self.failures.get(message_id)
+        if pending_failures:
+            return pending_failures.pop(0), {"error": {"code": 0, "message": "fake failure"}}
+        if message_id not in self.messages:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        return 200, self.messages[message_id]
+
+def run_with_client(fake, body, user_id="user", **pool_options):
+    """Run ``body(client)`` on a fresh event loop against ``fake``"""
+    async def main():
+        pool = GmailPool(transport=httpx.MockTransport(fake), **pool_options)
+        try:
+            client = GmailClient(Credentials(token="token"), user_id, pool=pool, backoff_seconds=0)
+            return await body(client)
+        finally:
+            await pool.aclose()
+
+    return asyncio.run(main())
+
+async def collect(async_iterator):
+    return [item async for item in async_iterator]
+
+def make_messages(count):
+    return {f"m{i}": {"id": f"m{i}", "payload": {"headers": []}} for i in range(count)}
+
+def test_groups_ids_into_batches():
+    fake = FakeGmail(make_messages(7))
+
+    results = run_with_client(fake, lambda client: collect(
+        fetch_messages(client, [f"m{i}" for i in range(7)], batch_size=3)
+    ))
+
+    assert fake.batch_calls == 3
+    assert [message_id for message_id, _, _ in results] == [f"m{i}" for i in range(7)]
+    assert all(message["id"] == message_id for message_id, message, _ in results)
+    assert all(error is None for _, _, error in results)
+
+def test_missing_message_does_not_abort_batch():
+    fake = FakeGmail(make_messages(3))
+
+    results = {
+        message_id: (message, error)
+        for message_id, message, error in run_with_client(fake, lambda client: collect(
+            fetch_messages(client, ["m0", "gone", "m2"])
+        ))
+    }
+
+    assert results["m0"][0]["id"] == "m0"
+    assert results["m2"][0]["id"] == "m2"
+    assert results["gone"][0] is None
+    assert results["gone"][1].status == 404
+
+def test_rate_limited_items_are_retried():
+    fake = FakeGmail(make_messages(2), failures={"m1": [429]})
+
+    results = run_with_client(fake, lambda client: collect(
+        fetch_messages(client, ["m0", "m1"], backoff_seconds=0)
+    ))
+
+    assert fake.batch_calls == 2
+    assert all(error is None for _, _, error in results)
+
+def test_rate_limited_requests_are_retried():
+    fake = FakeGmail(make_messages(3), request_failures=[429, 503])
+
+    pages = run_with_client(fake, lambda client: collect(iter_message_pages(client, "job", page_size=5)))
+
+    assert pages == [(["m0", "m1", "m2"], None)]
+
+def test_client_errors_are_not_retried():
+    fake = FakeGmail({}, request_failures=[403])
+
+    async def body(client):
+        try:
+            await client.list_messages("job")
+        except GmailApiError as e:
+            return e.status
+
+    assert run_with_client(fake, body) == 403
+    assert fake.request_failures == []
+
+def test_per_user_concurrency_is_capped():
+    fake = FakeGmail(make_messages(1), delay=0.01)
+
+    async def body(client):
+        await asyncio.gather(*(client.list_messages("job") for _ in range(8)))
+
+    run_with_client(fake, body, max_concurrency_per_user=2)
+    assert fake.max_in_flight == 2
+
+def test_history_lists_added_messages_across_pages():
+    added = lambda *ids: {"messagesAdded": [{"message": {"id": i}} for i in ids]}
+    fake = FakeGmail({}, history_pages=[
+        {"history": [added("m1", "m2")]},
+        {"history": [added("m2"), added("m3")]},
+    ])
+
+    message_ids, history_id = run_with_client(fake, lambda client: list_added_message_ids(client, "42"))
+
+    assert message_ids == ["m1", "m2", "m3"]
+    assert history_id == "101"
+    # Mail that filters keep out of the inbox is still seen
+    assert all("labelId" not in params for params in fake.history_requests)
+
+def test_expired_history_requests_full_scan():
+    fake = FakeGmail({}, history_pages=None)
+
+    assert run_with_client(fake, lambda client: list_added_message_ids(client, "42")) is None
+
+def test_message_pages_follow_and_resume_from_token():
+    fake = FakeGmail(make_messages(5))
+
+    pages = run_with_client(fake, lambda client: collect(iter_message_pages(client, "job", page_size=2)))
+    assert pages == [(["m0", "m1"], "2"), (["m2", "m3"], "4"), (["m4"], None)]
+
+    resumed = run_with_client(fake, lambda client: collect(
+        iter_message_pages(client, "job", page_token="4", page_size=2)
+    ))
+    assert resumed == [(["m4"], None)]
+
+def make_email(message_id, subject, snippet, labels=("INBOX",)):
+    return {
+        "id": message_id,
+        "labelIds": list(labels),
+        "snippet": snippet,
+        "payload": {
+            "headers": [
+                {"name": "Subject", "value": subject},
+                {"name": "From", "value": "Careers <careers@example.com>"},
+                {"name": "X-Mailer", "value": "fake"}
+            ],
+            "body": {"data": ""}
+        }
+    }
+
+def test_prefilter_downloads_only_metadata_and_keeps_survivors_in_order():
+    fake = FakeGmail({
+        "m0": make_email("m0", "Your application to Stripe", "Thank you for applying to the Software Engineer Intern role"),
+        "m1": make_email("m1", "Weekly digest", "Top stories this week"),
+        "m2": make_email("m2", "Job alert: 20 new roles", "Featured jobs picked for you"),
+        "m3": make_email("m3", "Update on your candidacy", "Unfortunately we won&#39;t be moving forward"),
+        "m4": make_email("m4", "Your application", "Thank you for applying", labels=("CATEGORY_PROMOTIONS",)),
+        "m5": make_email("m5", "Your application", "Thank you for applying", labels=("SPAM",)),
+    })
+
+    survivors, rejected = run_with_client(fake, lambda client: prefilter_messages(
+        client, ["m0", "m1", "m2", "m3", "m4", "m5", "gone"], batch_size=10
+    ))
+
+    # Only metadata that settles the classifier's answer rejects
+    assert survivors == ["m0", "m1", "m3", "m4", "gone"]
+    assert rejected == ["m2", "m5"]
+    assert {message_format for _, message_format in fake.fetched} == {"metadata"}
+
+def test_incremental_candidates_are_new_messages_the_job_search_finds():
+    added = lambda *ids: {"messagesAdded": [{"message": {"id": i}} for i in ids]}
+    # The fake's search finds m0-m3; m9 arrived but isn't job-related
+    fake = FakeGmail(make_messages(4), history_pages=[{"history": [added("m9", "m2", "m3")]}])
+    checkpoint = SyncCheckpoint(user_id="user", history_id="42", synced_at=datetime(2024, 5, 2, tzinfo=timezone.utc))
+
+    message_ids, history_id = run_with_client(fake, lambda client: list_candidate_message_ids(client, checkpoint))
+
+    assert (message_ids, history_id) == (["m2", "m3"], "100")
+    assert fake.list_requests[0]["q"][0].endswith(" after:1714521600")
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Tests for building Google API services from cached discovery documents
+"""
+
+import os
+import socket
+import sys
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.google_services import build_service, get_discovery_document
+
+def test_services_build_offline_from_one_parsed_document(monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError("building a service must not touch the network")
+    monkeypatch.setattr(socket, "create_connection", no_network)
+
+    first = build_service("oauth2", "v2", credentials=Credentials(token="a"))
+    second = build_service("oauth2", "v2", credentials=Credentials(token="b"))
+
+    assert hasattr(first, "userinfo") and hasattr(second, "userinfo")
+    assert get_discovery_document("oauth2", "v2") is get_discovery_document("oauth2", "v2")
+    assert first._http.credentials.token == "a"
+    assert second._http.credentials.token == "b"
+
+def test_unknown_api_is_rejected():
+    with pytest.raises(ValueError):
+        get_discovery_document("not-an-api", "v0")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for incrementally maintained application insights
+"""
+
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.routes.jobs as jobs_routes
+from app.services.insights import InsightsStore, histogram_median, week_start
+from app.services.job_index import JobIndex
+from app.services.job_writer import JobWriter
+from main import app
+from test_job_writer import email
+from test_user_cache import CountingSupabase
+
+def test_histogram_median():
+    assert histogram_median({}) is None
+    assert histogram_median({"3": 1}) == 3
+    assert histogram_median({"1": 1, "10": 1}) == 5.5
+    assert histogram_median({"2": 2, "9": 1}) == 2
+
+def test_week_start_is_the_monday():
+    assert week_start("2024-05-02T15:00:00") == "2024-04-29"
+    assert week_start("2024-05-05T23:30:00-04:00") == "2024-05-06"
+
+def test_first_read_builds_insights_from_existing_jobs_once():
+    db = CountingSupabase([], jobs=[
+        {"id": "1", "user_id": "u", "company": "Stripe", "position": "Intern",
+         "status": "applied", "applied_date": "2024-04-29T09:00:00"},
+        {"id": "2", "user_id": "u", "company": "Plaid", "position": "Intern",
+         "status": "rejected", "applied_date": "2024-05-08T09:00:00"},
+    ])
+    store = InsightsStore(client=db)
+
+    insights = store.get("u")
+    store.get("u")
+
+    assert insights.total == 2
+    assert insights.status_counts == {"applied": 1, "rejected": 1, "interviewing": 0, "offered": 0}
+    assert insights.response_rate == 0.5
+    assert [(week.week, week.count) for week in insights.weekly_applications] == [("2024-04-29", 1), ("2024-05-06", 1)]
+    assert db.queries == ["job_insights", "jobs", "job_insights", "job_insights"]
+
+    # A fresh store reads the saved aggregates without scanning jobs
+    db.queries.clear()
+    assert InsightsStore(client=db).get("u") == insights
+    assert db.queries == ["job_insights"]
+
+def test_sync_transitions_update_counts_and_response_times():
+    db = CountingSupabase([])
+    store = InsightsStore(client=db)
+    store.get("u")
+    writer = JobWriter("u", JobIndex([]), client=db, insights=store)
+
+    writer.stage(email("Stripe", "Software Engineer Intern", "applied", "2024-05-01T00:00:00"))
+    writer.stage(email("Plaid", "Data Intern", "applied", "2024-05-02T00:00:00"))
+    writer.flush()
+    writer.stage(email("Stripe", "Software Engineer Intern", "rejected", "2024-05-11T00:00:00"))
+    # Applied and answered within one flush still counts as one job
+    writer.stage(email("Ramp", "Intern", "applied", "2024-05-03T00:00:00"))
+    writer.stage(email("Ramp", "Intern", "interviewing", "2024-05-07T00:00:00"))
+    writer.flush()
+
+    insights = InsightsStore(client=db).get("u")
+    assert insights.status_counts == {"applied": 1, "rejected": 1, "interviewing": 1, "offered": 0}
+    assert insights.median_days_to_rejection == 10
+    assert insights.median_days_to_response == 10
+    assert sum(week.count for week in insights.weekly_applications) == 3
+
+def test_insights_endpoint_counts_manually_created_jobs(monkeypatch):
+    db = CountingSupabase([])
+    store = InsightsStore(client=db)
+    monkeypatch.setattr(jobs_routes, "supabase", db)
+    monkeypatch.setattr(jobs_routes, "get_insights_store", lambda: store)
+    monkeypatch.setattr(jobs_routes, "get_user_by_email", lambda address: {"id": "u", "email": address})
+    client = TestClient(app)
+    params = {"user_email": "ada@example.com"}
+
+    assert client.get("/api/insights", params=params).json()["total"] == 0
+    client.post("/api/jobs", params=params, json={"company": "Plaid", "position": "Intern", "status": "offered"})
+
+    insights = client.get("/api/insights", params=params).json()
+    assert insights["status_counts"]["offered"] == 1
+    assert insights["response_rate"] == 1.0
+
+def test_workers_sharing_a_user_do_not_lose_updates():
+    db = CountingSupabase([])
+    first, second = InsightsStore(client=db), InsightsStore(client=db)
+    first.get("u")
+    second.get("u")
+
+    class Interrupted(InsightsStore):
+        def _read(self, user_id):
+            row = super()._read(user_id)
+            # Another worker writes between this read and the write back
+            if not getattr(self, "interrupted", False):
+                self.interrupted = True
+                second.record(user_id, [(None, email("Ramp", "Intern", "applied"))])
+            return row
+
+    first.record("u", [(None, email("Stripe", "Intern", "applied"))])
+    Interrupted(client=db).record("u", [(None, email("Plaid", "Intern", "offered"))])
+
+    assert first.get("u").status_counts == {"applied": 2, "offered": 1, "interviewing": 0, "rejected": 0}
+
+def test_failed_update_is_rebuilt_from_jobs():
+    db = CountingSupabase([])
+    store = InsightsStore(client=db)
+    store.get("u")
+    job = {"id": "1", "user_id": "u", "status": "applied", "applied_date": "2024-04-29T09:00:00"}
+    db.tables["jobs"].append(job)
+
+    # The change is missing its date, so it can't be applied
+    store.record("u", [(None, {"status": "applied"})])
+
+    assert db.tables["job_insights"][0]["stale"] is True
+    assert InsightsStore(client=db).get("u").total == 1
+    assert db.tables["job_insights"][0]["stale"] is False
+
+def test_rebuild_files_jobs_in_the_same_weeks_as_the_updates():
+    db = CountingSupabase([])
+    store = InsightsStore(client=db)
+    store.get("u")
+    writer = JobWriter("u", JobIndex([]), client=db, insights=store)
+    writer.stage(email("Stripe", "Software Engineer Intern", "applied", "2024-04-29T00:00:00"))
+    writer.flush()
+    # The reply, two weeks later, moves applied_date but not the job's week
+    writer.stage(email("Stripe", "Software Engineer Intern", "interviewing", "2024-05-13T00:00:00"))
+    writer.flush()
+    incremental = store.get("u")
+
+    db.tables["job_insights"][0]["stale"] = True
+    rebuilt = store.get("u")
+
+    assert [(week.week, week.count) for week in incremental.weekly_applications] == [("2024-04-29", 1)]
+    assert rebuilt == incremental
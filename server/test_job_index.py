@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for in-memory job matching used to dedup jobs during a sync
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.job_index import JobIndex, MATCH_EXACT, MATCH_COMPANY, MATCH_SIMILAR_POSITION
+
+def job(job_id, company, position, status="applied"):
+    return {"id": job_id, "company": company, "position": position, "status": status}
+
+def test_exact_match_ignores_case_and_spacing():
+    index = JobIndex([job("1", "Stripe", "Software Engineering Internship")])
+
+    found, kind = index.find("stripe", "software  engineering internship")
+
+    assert found["id"] == "1"
+    assert kind == MATCH_EXACT
+
+def test_single_job_at_company_matches_any_position():
+    index = JobIndex([job("1", "Amazon", "Internship")])
+
+    found, kind = index.find("Amazon", "Software Engineer")
+
+    assert found["id"] == "1"
+    assert kind == MATCH_COMPANY
+
+def test_similar_position_among_several_jobs():
+    index = JobIndex([
+        job("1", "Google", "Product Manager"),
+        job("2", "Google", "Software Engineering Intern"),
+    ])
+
+    found, kind = index.find("Google", "Data Science Internship")
+
+    assert found["id"] == "2"
+    assert kind == MATCH_SIMILAR_POSITION
+
+def test_unrelated_position_is_a_new_job():
+    index = JobIndex([job("1", "Google", "Product Manager"), job("2", "Google", "Data Analyst")])
+
+    assert index.find("Google", "Software Engineer") == (None, None)
+    assert index.find("Meta", "Software Engineer") == (None, None)
+
+def test_changes_are_visible_to_later_lookups():
+    index = JobIndex([])
+    original = job("1", "Figma", "Internship")
+    index.add(original)
+    index.replace(original, job("1", "Figma", "Software Engineering Intern", "interviewing"))
+
+    found, kind = index.find("Figma", "Software Engineering Intern")
+
+    assert found["status"] == "interviewing"
+    assert kind == MATCH_EXACT
+    assert len(index) == 1
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for paged, filtered and projected job listings
+"""
+
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.routes.jobs as jobs_routes
+from app.services.job_queries import decode_cursor, encode_cursor, list_jobs, parse_fields
+from main import app
+
+class RecordingQuery:
+    """Records the PostgREST builder calls made and answers with canned rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def table(self, name):
+        self.calls.append(("table", name))
+        return self
+
+    def __getattr__(self, method):
+        def record(*args, **kwargs):
+            self.calls.append((method, *args, *kwargs.values()))
+            return self
+        return record
+
+    def execute(self):
+        limit = next((call[1] for call in self.calls if call[0] == "limit"), None)
+        return SimpleNamespace(data=self.rows[:limit])
+
+def make_jobs(count):
+    return [
+        {"id": str(count - i), "user_id": "u1", "company": f"Company {i}", "position": "Intern",
+         "status": "applied", "applied_date": f"2024-05-{30 - i:02d}T00:00:00+00:00"}
+        for i in range(count)
+    ]
+
+def test_page_fetches_one_extra_row_and_returns_cursor():
+    client = RecordingQuery(make_jobs(5))
+
+    rows, next_cursor = list_jobs("u1", limit=2, client=client)
+
+    assert [row["id"] for row in rows] == ["5", "4"]
+    assert decode_cursor(next_cursor) == ("2024-05-29T00:00:00+00:00", "4")
+    assert ("limit", 3) in client.calls
+    assert ("order", "applied_date", True) in client.calls
+    assert ("order", "id", True) in client.calls
+
+def test_last_page_has_no_cursor():
+    rows, next_cursor = list_jobs("u1", limit=10, client=RecordingQuery(make_jobs(3)))
+
+    assert len(rows) == 3
+    assert next_cursor is None
+
+def test_cursor_and_filters_become_keyset_and_column_filters():
+    client = RecordingQuery([])
+    cursor = encode_cursor({"applied_date": "2024-05-01T00:00:00+00:00", "id": "17"})
+
+    list_jobs(
+        "u1", limit=10, cursor=cursor, statuses=["rejected"], company_prefix="100%_Go",
+        applied_after=datetime(2024, 1, 1), applied_before=datetime(2024, 6, 1), client=client
+    )
+
+    assert ("or", 'applied_date.lt."2024-05-01T00:00:00+00:00",'
+                  'and(applied_date.eq."2024-05-01T00:00:00+00:00",id.lt."17")') in [
+        ("or", call[1]) for call in client.calls if call[0] == "or_"
+    ]
+    assert ("in_", "status", ["rejected"]) in client.calls
+    assert ("ilike", "company", "100\\%\\_Go%") in client.calls
+    assert ("gte", "applied_date", "2024-01-01T00:00:00") in client.calls
+    assert ("lt", "applied_date", "2024-06-01T00:00:00") in client.calls
+
+def test_projection_keeps_cursor_columns_out_of_the_response():
+    client = RecordingQuery(make_jobs(3))
+
+    rows, next_cursor = list_jobs("u1", limit=2, fields=["company"], client=client)
+
+    assert ("select", "company,applied_date,id") in client.calls
+    assert rows == [{"company": "Company 0"}, {"company": "Company 1"}]
+    assert next_cursor is not None
+
+def test_bad_fields_and_cursors_are_rejected():
+    assert parse_fields("company, status") == ["company", "status"]
+    with pytest.raises(ValueError):
+        parse_fields("company,access_token")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor({"applied_date": "2024-05-01", "id": '1",id.gt."0'}))
+
+def test_jobs_endpoint_pages_with_a_header_cursor(monkeypatch):
+    db = RecordingQuery(make_jobs(3))
+    monkeypatch.setattr(jobs_routes, "supabase", db)
+    monkeypatch.setattr(jobs_routes, "get_user_by_email", lambda email: {"id": "u1", "email": email})
+    client = TestClient(app)
+
+    response = client.get("/api/jobs", params={"user_email": "ada@example.com", "limit": 2, "fields": "id,company"})
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": "3", "company": "Company 0"}, {"id": "2", "company": "Company 1"}]
+    assert decode_cursor(response.headers["x-next-cursor"])[1] == "2"
+
+    bad = client.get("/api/jobs", params={"user_email": "ada@example.com", "fields": "password"})
+    assert bad.status_code == 400
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for per-user job versions and conditional GETs of the jobs list
+"""
+
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.routes.jobs as jobs_routes
+from app.services.insights import InsightsStore
+from app.services.job_index import JobIndex
+from app.services.job_versions import bump_version, etag_matches, get_version, make_etag
+from app.services.job_writer import JobWriter
+import app.services.response_cache as response_cache
+from app.services.response_cache import InMemoryBackend, ResponseCache, get_response_cache
+from main import app
+from test_job_writer import email
+from test_user_cache import CountingSupabase
+
+def make_client(monkeypatch):
+    db = CountingSupabase([], jobs=[
+        {"id": "1", "user_id": "etag-user", "company": "Stripe", "position": "Intern",
+         "status": "applied", "applied_date": "2024-04-01T00:00:00"}
+    ])
+    monkeypatch.setattr(jobs_routes, "supabase", db)
+    monkeypatch.setattr(jobs_routes, "get_insights_store", lambda: InsightsStore(client=db))
+    monkeypatch.setattr(jobs_routes, "get_user_by_email", lambda address: {"id": "etag-user", "email": address})
+    return db, TestClient(app)
+
+def test_unchanged_jobs_are_answered_with_304_without_a_query(monkeypatch):
+    db, client = make_client(monkeypatch)
+    params = {"user_email": "ada@example.com"}
+
+    first = client.get("/api/jobs", params=params)
+    etag = first.headers["etag"]
+    repeat = client.get("/api/jobs", params=params, headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert repeat.status_code == 304
+    assert repeat.headers["etag"] == etag
+    assert db.queries == ["jobs"]
+
+def test_etag_changes_with_the_query_and_after_a_create(monkeypatch):
+    db, client = make_client(monkeypatch)
+    params = {"user_email": "ada@example.com"}
+    etag = client.get("/api/jobs", params=params).headers["etag"]
+
+    filtered = client.get("/api/jobs", params={**params, "status": "applied"}, headers={"If-None-Match": etag})
+    assert filtered.status_code == 200
+    assert filtered.headers["etag"] != etag
+
+    created = client.post("/api/jobs", params=params, json={"company": "Plaid", "position": "Intern"})
+    assert created.status_code == 200
+
+    refreshed = client.get("/api/jobs", params=params, headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert "Plaid" in [job["company"] for job in refreshed.json()]
+
+def test_flushing_a_sync_bumps_the_version():
+    db = CountingSupabase([])
+    writer = JobWriter("flush-user", JobIndex([]), client=db, insights=InsightsStore(client=db))
+    before = get_version("flush-user")
+
+    writer.flush()
+    assert get_version("flush-user") == before
+
+    writer.stage(email("Stripe", "Software Engineer Intern", "applied"))
+    writer.flush()
+    assert get_version("flush-user") == before + 1
+
+def test_new_etag_is_never_served_with_rows_cached_before_the_write():
+    db = CountingSupabase([])
+    cache = get_response_cache()
+    seen = {}
+
+    class SlowInsights(InsightsStore):
+        def record(self, user_id, changes):
+            # A request arriving while the insights update runs
+            seen["etag"] = make_etag(user_id)
+            seen["jobs"] = cache.get_or_load("jobs", user_id, "", lambda: "fresh")
+            cache.get_or_load("insights", user_id, "", lambda: "before the update")
+            super().record(user_id, changes)
+
+    writer = JobWriter("order-user", JobIndex([]), client=db, insights=SlowInsights(client=db))
+    etag = make_etag("order-user")
+    cache.get_or_load("jobs", "order-user", "", lambda: "stale")
+
+    writer.stage(email("Stripe", "Software Engineer Intern", "applied"))
+    writer.flush()
+
+    assert seen == {"etag": make_etag("order-user"), "jobs": "fresh"}
+    assert seen["etag"] != etag
+    assert cache.get_or_load("insights", "order-user", "", lambda: "after the update") == "after the update"
+
+def test_versions_are_shared_by_workers_on_the_same_backend():
+    shared = InMemoryBackend()
+    response_cache.response_cache = ResponseCache(shared)
+    etag = make_etag("shared-user")
+
+    # Another worker, and a restart with a fresh backend
+    response_cache.response_cache = ResponseCache(shared)
+    assert make_etag("shared-user") == etag
+    bump_version("shared-user")
+    response_cache.response_cache = ResponseCache(shared)
+    bumped = make_etag("shared-user")
+    assert bumped != etag
+    response_cache.response_cache = ResponseCache(InMemoryBackend())
+    assert make_etag("shared-user") not in (etag, bumped)
+
+def test_if_none_match_parsing():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
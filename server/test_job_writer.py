@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk job writer against an in-memory PostgREST stand-in
+"""
+
+import copy
+import itertools
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.insights import InsightsStore
+from app.services.job_index import JobIndex
+from app.services.job_writer import JobWriter, should_update_status
+
+class FakeTable:
+    """Implements the slice of the postgrest query builder the writer and readers use"""
+
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.rows = db.tables.setdefault(name, [])
+        self.filters = []
+        self.pending_upsert = None
+        self.conflict_key = "id"
+        self.ordering = []
+        self.row_offset = 0
+        self.row_limit = None
+        self.deleting = False
+        self.pending_update = None
+        self.ignore_duplicates = False
+
+    def select(self, columns="*"):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, lambda actual: actual == value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append((column, lambda actual: actual != value))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append((column, lambda actual: actual in values))
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def range(self, start, end):
+        self.row_offset = start
+        self.row_limit = end - start + 1
+        return self
+
+    def delete(self):
+        self.deleting = True
+        return self
+
+    def insert(self, row):
+        self.pending_upsert = [row]
+        return self
+
+    def upsert(self, rows, on_conflict="", default_to_null=True, ignore_duplicates=False):
+        assert on_conflict and (self.name != "jobs" or not default_to_null)
+        self.pending_upsert = rows if isinstance(rows, list) else [rows]
+        self.conflict_key = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, changes):
+        self.pending_update = changes
+        return self
+
+    def execute(self):
+        matches = lambda row: all(test(row.get(c)) for c, test in self.filters)
+        if self.deleting:
+            deleted = [row for row in self.rows if matches(row)]
+            self.rows[:] = [row for row in self.rows if not matches(row)]
+            return SimpleNamespace(data=deleted)
+
+        if self.pending_update is not None:
+            updated = [row for row in self.rows if matches(row)]
+            for row in updated:
+                row.update(copy.deepcopy(self.pending_update))
+            return SimpleNamespace(data=copy.deepcopy(updated))
+
+        if self.pending_upsert is None:
+            data = [row for row in self.rows if matches(row)]
+            for column, desc in reversed(self.ordering):
+                data.sort(key=lambda row: row.get(column), reverse=desc)
+            end = None if self.row_limit is None else self.row_offset + self.row_limit
+            data = data[self.row_offset:end]
+            # Rows come back as fresh JSON, sharing nothing with the table
+            return SimpleNamespace(data=copy.deepcopy(data))
+
+        if self.name == "jobs":
+            self.db.upserts += 1
+        keys = self.conflict_key.split(",")
+        saved = []
+        for payload in self.pending_upsert:
+            existing = next(
+                (row for row in self.rows if all(key in payload and row.get(key) == payload[key] for key in keys)), None
+            )
+            if existing is not None and self.ignore_duplicates:
+                continue
+            if existing is None:
+                existing = {key: payload[key] if key in payload else str(next(self.db.ids)) for key in keys}
+                self.rows.append(existing)
+            existing.update({k: v for k, v in payload.items() if k not in keys})
+            saved.append(dict(existing))
+        return SimpleNamespace(data=saved)
+
+class FakeSupabase:
+    def __init__(self, jobs=()):
+        self.ids = itertools.count(100)
+        self.tables = {"jobs": [dict(job) for job in jobs]}
+        self.upserts = 0
+
+    def table(self, name):
+        return FakeTable(self, name)
+
+def email(company, position, status, date="2024-05-01T00:00:00"):
+    return {"company": company, "position": position, "status": status, "applied_date": date}
+
+def test_status_priority_rules():
+    assert should_update_status("applied", "interviewing")
+    assert should_update_status("interviewing", "rejected")
+    assert should_update_status("interviewing", "offered")
+    assert not should_update_status("offered", "interviewing")
+    assert not should_update_status("rejected", "applied")
+
+def test_flush_writes_all_changes_in_one_upsert():
+    db = FakeSupabase([
+        {"id": "1", "user_id": "u", "company": "Amazon", "position": "Software Engineering Intern", "status": "applied"},
+        {"id": "2", "user_id": "u", "company": "Stripe", "position": "Software Engineer", "status": "offered"},
+    ])
+    index = JobIndex(db.table("jobs").select("*").eq("user_id", "u").execute().data)
+    writer = JobWriter("u", index, client=db, insights=InsightsStore(client=db))
+
+    writer.stage(email("Figma", "Product Manager", "applied"))
+    writer.stage(email("Figma", "Product Manager", "interviewing"))
+    writer.stage(email("Amazon", "Software Engineering Intern", "rejected"))
+    row, _ = writer.stage(email("Stripe", "Software Engineer", "interviewing"))
+    assert row is None
+    assert len(writer) == 2
+
+    saved = writer.flush()
+
+    assert db.upserts == 1
+    assert len(saved) == 2
+    jobs = {job["company"]: job for job in db.tables["jobs"]}
+    assert jobs["Figma"]["status"] == "interviewing"
+    assert jobs["Amazon"]["status"] == "rejected"
+    assert jobs["Stripe"]["status"] == "offered"
+    assert len(db.tables["jobs"]) == 3
+
+    # The new job got its id back into the index, so the next flush updates it
+    writer.stage(email("Figma", "Product Manager", "offered"))
+    writer.flush()
+    assert db.upserts == 2
+    assert len(db.tables["jobs"]) == 3
+    assert {job["company"]: job for job in db.tables["jobs"]}["Figma"]["status"] == "offered"
+
+def test_flush_without_changes_skips_the_database():
+    db = FakeSupabase()
+    writer = JobWriter("u", JobIndex([]), client=db, insights=InsightsStore(client=db))
+
+    assert writer.flush() == []
+    assert db.upserts == 0
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Tests for log levels and the JSON log format
+"""
+
+import json
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.email_parser import classify_email
+from app.utils.logs import JsonFormatter
+
+APPLICATION = {
+    "subject": "Your application to Amazon",
+    "body": "Thank you for applying to the Software Development Engineer Intern position. "
+            "Unfortunately, we have decided not to move forward with your application.",
+    "sender": "noreply@amazon.com",
+    "date": "Mon, 6 May 2024 10:00:00 +0000",
+}
+
+def test_per_email_logging_is_debug_only(caplog):
+    caplog.set_level(logging.INFO, logger="app")
+    classify_email(APPLICATION)
+    assert caplog.records == []
+
+    caplog.set_level(logging.DEBUG, logger="app")
+    classify_email(APPLICATION)
+    assert caplog.records
+    assert all(record.levelno == logging.DEBUG for record in caplog.records)
+    # Email bodies never reach the logs, even at DEBUG
+    assert not any("Unfortunately" in record.getMessage() for record in caplog.records)
+
+def test_json_formatter_includes_extra_fields():
+    logger = logging.getLogger("app.test")
+    record = logger.makeRecord(
+        logger.name, logging.INFO, __file__, 1, "Sync finished for user %s", ("user-1",), None,
+        extra={"emails_processed": 12, "duration_seconds": 1.5}
+    )
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Sync finished for user user-1"
+    assert entry["level"] == "INFO"
+    assert entry["emails_processed"] == 12
+    assert entry["duration_seconds"] == 1.5
+    assert "args" not in entry
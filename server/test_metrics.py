@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tests for sync metrics and the /metrics endpoint
+"""
+
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.services.metrics as metrics
+from app.services.email_parser import classify_email
+from main import app
+
+APPLICATION = {
+    "subject": "Your application to Amazon",
+    "body": "Thank you for applying to the Software Development Engineer Intern position. "
+            "Unfortunately, we have decided not to move forward with your application.",
+    "sender": "noreply@amazon.com",
+    "date": "Mon, 6 May 2024 10:00:00 +0000",
+}
+
+def sample(name, **labels):
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_stage_timer_works_with_or_without_prometheus():
+    with metrics.stage_timer("body_decode"):
+        pass
+    with pytest.raises(KeyError):
+        with metrics.stage_timer("not_a_stage"):
+            pass
+
+def test_classification_records_stage_latency_and_outcomes():
+    pytest.importorskip("prometheus_client")
+    timed_before = sample("maestro_sync_stage_seconds_count", stage="classify_status")
+    accepted_before = sample("maestro_sync_messages_accepted_total")
+    rejected_before = sample("maestro_sync_messages_rejected_total", check="classifier", reason="no_application_indicators")
+
+    assert classify_email(APPLICATION)
+    assert not classify_email(dict(APPLICATION, subject="Weekly digest", body="Top stories this week"))
+
+    assert sample("maestro_sync_stage_seconds_count", stage="classify_status") == timed_before + 1
+    assert sample("maestro_sync_messages_accepted_total") == accepted_before + 1
+    assert sample(
+        "maestro_sync_messages_rejected_total", check="classifier", reason="no_application_indicators"
+    ) == rejected_before + 1
+
+def test_metrics_endpoint():
+    response = TestClient(app).get("/metrics")
+
+    if metrics.prometheus_client is None:
+        assert response.status_code == 503
+    else:
+        assert response.status_code == 200
+        assert "maestro_sync_stage_seconds_bucket" in response.text
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for extracting plain-text bodies from Gmail message payloads
+"""
+
+import base64
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.mime import extract_body, html_to_text
+
+def part(mime_type, text="", charset=None, filename="", encoding="utf-8", **extra):
+    headers = []
+    if charset:
+        headers.append({"name": "Content-Type", "value": f'{mime_type}; charset="{charset}"'})
+    data = base64.urlsafe_b64encode(text.encode(encoding)).decode().rstrip("=")
+    return {"mimeType": mime_type, "filename": filename, "headers": headers, "body": {"data": data}, **extra}
+
+def multipart(mime_type, *parts):
+    return {"mimeType": mime_type, "headers": [], "body": {"size": 0}, "parts": list(parts)}
+
+def test_single_part_message():
+    assert extract_body(part("text/plain", "Thank you for applying")) == "Thank you for applying"
+
+def test_nested_alternative_prefers_plain_text():
+    payload = multipart(
+        "multipart/mixed",
+        multipart(
+            "multipart/related",
+            multipart(
+                "multipart/alternative",
+                part("text/html", "<p>HTML version</p>"),
+                part("text/plain", "Plain version")
+            )
+        ),
+        part("text/plain", "notes.txt contents", filename="notes.txt")
+    )
+
+    assert extract_body(payload) == "Plain version"
+
+def test_html_only_message_is_stripped():
+    html = (
+        "<html><head><style>p { color: red }</style></head><body>"
+        "<p>Hi Ada,</p><p>We&#39;ve reviewed your application for the "
+        "<b>Software Engineer Intern</b> role.</p><script>track()</script></body></html>"
+    )
+    payload = multipart("multipart/mixed", part("text/html", html))
+
+    body = extract_body(payload)
+
+    assert "We've reviewed your application for the Software Engineer Intern role." in body
+    assert "color" not in body and "track" not in body
+
+def test_attachments_are_skipped():
+    payload = multipart(
+        "multipart/mixed",
+        part("text/plain", "resume text", filename="resume.txt"),
+        part("text/html", "<p>Body</p>")
+    )
+
+    assert extract_body(payload) == "Body"
+
+def test_declared_charset_is_used():
+    payload = part("text/plain", "Café Müller GmbH", charset="iso-8859-1", encoding="latin-1")
+
+    assert extract_body(payload) == "Café Müller GmbH"
+
+def test_unknown_charset_falls_back_to_utf8():
+    payload = part("text/plain", "Zürich", charset="x-made-up")
+
+    assert extract_body(payload) == "Zürich"
+
+def test_charsets_that_are_not_text_encodings_fall_back_to_utf8():
+    for charset in ("base64", "hex", "zlib", "uu", "quopri", "bz2", "rot13", "idna"):
+        payload = part("text/plain", "Thank you for applying to Zürich", charset=charset)
+
+        assert extract_body(payload) == "Thank you for applying to Zürich"
+
+def test_body_is_cut_at_byte_budget_without_splitting_characters():
+    payload = part("text/plain", "é" * 10_000)
+
+    body = extract_body(payload, max_bytes=101)
+
+    assert body == "é" * 50
+
+def test_html_text_is_capped():
+    markup = "<p>" + "word " * 10_000 + "</p>"
+
+    assert len(html_to_text(markup, max_chars=200)) <= 200
+
+def test_message_without_text_parts():
+    payload = multipart("multipart/mixed", part("image/png", "not text", filename="logo.png"))
+
+    assert extract_body(payload) == ""
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests that the single-pass phrase matcher agrees with plain substring checks
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.email_classifier import PHRASE_MATCHER
+from app.services.phrase_matcher import PhraseMatcher
+
+def test_reports_overlapping_and_shared_prefix_phrases():
+    matcher = PhraseMatcher({
+        "short": ["regret to inform", "intern"],
+        "long": ["regret to inform you that we will not", "internship"],
+        "inner": ["we will not"]
+    })
+
+    hits = matcher.scan("we regret to inform you that we will not offer an internship")
+
+    assert hits == {
+        "short": {"regret to inform", "intern"},
+        "long": {"regret to inform you that we will not", "internship"},
+        "inner": {"we will not"}
+    }
+
+def test_same_phrase_in_several_categories():
+    matcher = PhraseMatcher({"application": ["unfortunately"], "rejection": ["unfortunately"]})
+
+    assert matcher.scan("unfortunately, no") == {
+        "application": {"unfortunately"},
+        "rejection": {"unfortunately"}
+    }
+
+def test_classifier_matcher_agrees_with_substring_checks():
+    from app.services.email_classifier import (
+        APPLICATION_INDICATORS, TECHNICAL_INDICATORS, OUTREACH_INDICATORS,
+        INTERVIEW_KEYWORDS, REJECTION_KEYWORDS, OFFER_KEYWORDS
+    )
+    lists = {
+        "application": APPLICATION_INDICATORS,
+        "technical": TECHNICAL_INDICATORS,
+        "outreach": OUTREACH_INDICATORS,
+        "interview": INTERVIEW_KEYWORDS,
+        "rejection": REJECTION_KEYWORDS,
+        "offer": OFFER_KEYWORDS
+    }
+    text = (
+        "re: your application for the software engineering internship at stripe. "
+        "unfortunately, after careful consideration, we will not be moving forward. "
+        "we'd love to schedule an interview... congratulations! unsubscribe"
+    )
+
+    hits = PHRASE_MATCHER.scan(text)
+
+    for category, phrases in lists.items():
+        expected = {phrase for phrase in phrases if phrase in text}
+        assert hits.get(category, set()) == expected, category
@@ -7,6 +7,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from app.models.job import ApplicationStatus
 from app.services.email_classifier import get_email_classifier
 
 def test_amazon_rejection():
@@ -111,6 +112,50 @@ Stripe Recruiting Team"""
     else:
         print("❌ FAIL: Offer email not recognized")
 
+def test_analyze_matches_individual_methods():
+    """analyze() must agree with the individual classifier methods"""
+    
+    subject = "Re: Your Application"
+    body = """Thank you for taking the time to apply for the Software Engineering Internship at Amazon.
+After careful consideration, we regret to inform you that we will not be moving forward with your application.
+
+Sincerely,
+Amazon Recruiting Team"""
+    sender = "noreply@amazon.com"
+    
+    classifier = get_email_classifier()
+    analysis = classifier.analyze(subject, body, sender)
+    
+    assert analysis.is_application == classifier.is_actual_application(subject, body, sender)
+    assert analysis.company == classifier.extract_company_from_content(subject, body)
+    assert analysis.position == classifier.extract_position_from_content(subject, body)
+    assert analysis.status == classifier.classify_application_status(subject, body)
+    assert "regret to inform" in analysis.evidence["rejection"]
+    
+    newsletter = classifier.analyze("Weekly digest", "New openings for python developers! Unsubscribe", "news@jobs.example")
+    assert not newsletter.is_application
+    assert newsletter.rejection_reason is not None
+    assert newsletter.company is None and newsletter.status is None
+
 if __name__ == "__main__":
     test_amazon_rejection()
-    test_stripe_offer() 
\ No newline at end of file
+    test_stripe_offer() 
+
+def test_prefilter_keeps_responses_whose_preview_has_no_hints():
+    classifier = get_email_classifier()
+    subject = "Following up"
+    snippet = "Hi Ada, thanks again for the time you spent with us over the last few weeks. We wanted to get back to you"
+    body = snippet + """ with an update.
+
+Unfortunately, we will not be moving forward with your candidacy for the Software Engineer Intern position at Stripe.
+
+Best,
+The Stripe Team"""
+
+    assert classifier.prefilter(subject, snippet, ["INBOX"]) is None
+    assert classifier.prefilter("Thank you for applying to Stripe", snippet, ["CATEGORY_PROMOTIONS"]) is None
+    analysis = classifier.analyze(subject, body, "Stripe <no-reply@stripe.com>")
+    assert (analysis.company, analysis.status) == ("Stripe", ApplicationStatus.REJECTED)
+
+    assert classifier.prefilter("Job alert: new roles for you", snippet, ["INBOX"]) == "outreach"
+    assert classifier.prefilter(subject, snippet, ["SPAM"]) == "skipped_label"
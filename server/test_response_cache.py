@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-user response cache and its use by the jobs routes
+"""
+
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.routes.jobs as jobs_routes
+from app.services.insights import InsightsStore
+from app.services.response_cache import InMemoryBackend, RedisBackend, ResponseCache
+from main import app
+from test_user_cache import Clock, CountingSupabase
+
+def exercise(cache):
+    loads = []
+
+    def load(value):
+        loads.append(value)
+        return {"value": value}
+
+    assert cache.get_or_load("jobs", "u1", "q", lambda: load(1)) == {"value": 1}
+    assert cache.get_or_load("jobs", "u1", "q", lambda: load(2)) == {"value": 1}
+    assert cache.get_or_load("jobs", "u2", "q", lambda: load(3)) == {"value": 3}
+
+    cache.invalidate("u1")
+    assert cache.get_or_load("jobs", "u1", "q", lambda: load(4)) == {"value": 4}
+    assert cache.get_or_load("jobs", "u2", "q", lambda: load(5)) == {"value": 3}
+    assert loads == [1, 3, 4]
+
+def test_in_memory_backend_namespaces_and_invalidates_per_user():
+    exercise(ResponseCache(InMemoryBackend()))
+
+def test_redis_backend_namespaces_and_invalidates_per_user():
+    fakeredis = pytest.importorskip("fakeredis")
+    exercise(ResponseCache(RedisBackend(fakeredis.FakeRedis(decode_responses=True))))
+
+def test_entries_expire_after_their_ttl():
+    clock = Clock()
+    backend = InMemoryBackend()
+    backend._entries.clock = clock
+    cache = ResponseCache(backend, ttl=10)
+
+    cache.get_or_load("jobs", "u1", "q", lambda: 1)
+    clock.now = 11
+    assert cache.get_or_load("jobs", "u1", "q", lambda: 2) == 2
+
+def test_backend_failures_fall_back_to_loading():
+    class BrokenBackend:
+        def get(self, key):
+            raise ConnectionError("cache is down")
+
+    assert ResponseCache(BrokenBackend()).get_or_load("jobs", "u1", "q", lambda: [1]) == [1]
+
+def test_creating_a_job_invalidates_cached_listings_and_insights(monkeypatch):
+    db = CountingSupabase([], jobs=[
+        {"id": "1", "user_id": "u1", "company": "Stripe", "position": "Intern",
+         "status": "applied", "applied_date": "2024-04-01T00:00:00"}
+    ])
+    store = InsightsStore(client=db)
+    monkeypatch.setattr(jobs_routes, "supabase", db)
+    monkeypatch.setattr(jobs_routes, "get_insights_store", lambda: store)
+    monkeypatch.setattr(jobs_routes, "get_user_by_email", lambda address: {"id": "u1", "email": address})
+    client = TestClient(app)
+    params = {"user_email": "ada@example.com"}
+
+    for _ in range(2):
+        assert len(client.get("/api/jobs", params=params).json()) == 1
+        assert client.get("/api/insights", params=params).json()["total"] == 1
+    assert db.queries.count("jobs") == 2  # one listing, one insights rebuild
+
+    client.post("/api/jobs", params=params, json={"company": "Plaid", "position": "Intern"})
+
+    assert len(client.get("/api/jobs", params=params).json()) == 2
+    assert client.get("/api/insights", params=params).json()["total"] == 2
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the background sync job manager
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from google.oauth2.credentials import Credentials
+
+import app.services.email_parser as email_parser
+from app.models.sync_job import SyncJobStatus
+from app.services.sync_jobs import SyncJobManager
+
+def wait_for(manager, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job.status in (SyncJobStatus.SUCCEEDED, SyncJobStatus.FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+def test_submit_returns_before_the_sync_runs():
+    manager = SyncJobManager(max_concurrent=1)
+    release = threading.Event()
+
+    async def work(progress):
+        await asyncio.to_thread(release.wait, 5)
+        progress(3, 3)
+        return {"jobs_processed": 2}
+
+    job = manager.submit("user-1", "sync", work)
+    assert job.status in (SyncJobStatus.QUEUED, SyncJobStatus.RUNNING)
+
+    # A second request while the first is in flight joins it
+    assert manager.submit("user-1", "sync", work).id == job.id
+
+    release.set()
+    done = wait_for(manager, job.id)
+    assert done.status == SyncJobStatus.SUCCEEDED
+    assert done.result == {"jobs_processed": 2}
+    assert (done.messages_processed, done.messages_total) == (3, 3)
+
+    # Once finished, the user can start a new one
+    next_job = manager.submit("user-1", "sync", work)
+    assert next_job.id != job.id
+    wait_for(manager, next_job.id)
+    manager.shutdown()
+
+def test_failed_sync_is_reported():
+    manager = SyncJobManager(max_concurrent=1)
+
+    async def work(progress):
+        raise RuntimeError("token revoked")
+
+    job = wait_for(manager, manager.submit("user-1", "sync", work).id)
+    assert job.status == SyncJobStatus.FAILED
+    assert job.error == "token revoked"
+    manager.shutdown()
+
+def test_a_users_jobs_of_different_kinds_run_one_at_a_time():
+    manager = SyncJobManager(max_concurrent=4)
+    running = set()
+    overlaps = []
+
+    def work_for(user_id):
+        async def work(progress):
+            overlaps.append(user_id in running)
+            running.add(user_id)
+            await asyncio.sleep(0.05)
+            running.discard(user_id)
+            return {}
+        return work
+
+    job_ids = [
+        manager.submit("user-1", "sync", work_for("user-1")).id,
+        manager.submit("user-1", "backfill", work_for("user-1")).id,
+        manager.submit("user-2", "sync", work_for("user-2")).id,
+    ]
+    jobs = [wait_for(manager, job_id) for job_id in job_ids]
+    manager.shutdown()
+
+    assert overlaps == [False, False, False]
+    assert all(job.status == SyncJobStatus.SUCCEEDED for job in jobs)
+    # Another user's job didn't wait for user-1's
+    assert jobs[2].started_at < jobs[1].started_at
+
+def test_parser_failures_fail_the_job(monkeypatch):
+    def unavailable(user_id):
+        raise ConnectionError("sync_state is unavailable")
+
+    monkeypatch.setattr(email_parser, "load_checkpoint", unavailable)
+    manager = SyncJobManager(max_concurrent=2)
+    credentials = Credentials(token="token")
+
+    sync = wait_for(manager, manager.submit_sync(credentials, "user-1").id)
+    backfill = wait_for(manager, manager.submit_backfill(credentials, "user-1").id)
+    manager.shutdown()
+
+    for job in (sync, backfill):
+        assert job.status == SyncJobStatus.FAILED
+        assert job.error == "sync_state is unavailable"
+        assert job.result is None
+
+def test_only_recent_finished_jobs_are_kept():
+    manager = SyncJobManager(max_concurrent=1, max_finished=2)
+
+    async def work(progress):
+        return {}
+
+    job_ids = [manager.submit(f"user-{i}", "sync", work).id for i in range(4)]
+    for job_id in job_ids[2:]:
+        wait_for(manager, job_id)
+    manager.shutdown()
+
+    assert manager.get(job_ids[0]) is None
+    assert manager.get(job_ids[3]) is not None
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the periodic sync scheduler
+"""
+
+import os
+import sys
+import uuid
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.services.sync_scheduler as sync_scheduler
+from app.models.sync_job import SyncJob, SyncJobStatus
+from app.services.gmail_client import rate_limit_counts
+from app.services.sync_scheduler import SyncScheduler
+from datetime import datetime
+from test_user_cache import Clock
+
+class FakeManager:
+    def __init__(self):
+        self.jobs = {}
+        self.submitted = []
+
+    def submit_sync(self, credentials, user_id, full_scan=False):
+        job = SyncJob(id=uuid.uuid4().hex, user_id=user_id, created_at=datetime.now())
+        self.jobs[job.id] = job
+        self.submitted.append(user_id)
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def finish_all(self):
+        for job in self.jobs.values():
+            job.status = SyncJobStatus.SUCCEEDED
+
+class FakeCredentialsManager:
+    def get(self, user):
+        return user["refresh_token"]
+
+def make_scheduler(monkeypatch, user_count, **options):
+    monkeypatch.setattr(sync_scheduler, "get_credentials_manager", lambda: FakeCredentialsManager())
+    users = [{"id": f"user-{i}", "refresh_token": f"token-{i}"} for i in range(user_count)]
+    clock = Clock()
+    manager = FakeManager()
+    scheduler = SyncScheduler(manager=manager, load_users=lambda: users, clock=clock, **options)
+    return scheduler, manager, clock
+
+def test_first_syncs_are_spread_over_the_interval(monkeypatch):
+    scheduler, manager, clock = make_scheduler(monkeypatch, 100, interval=100, max_in_flight=100)
+
+    per_quarter = []
+    for quarter in range(5):
+        clock.now = 25 * quarter
+        per_quarter.append(len(scheduler.tick()))
+        manager.finish_all()
+
+    # Nobody is due when the roster is first read, then a steady trickle
+    assert per_quarter[0] == 0
+    assert sum(per_quarter) == 100
+    assert all(10 <= count <= 40 for count in per_quarter[1:])
+
+def test_in_flight_cap_and_active_users_go_first(monkeypatch):
+    scheduler, manager, clock = make_scheduler(monkeypatch, 10, interval=100, max_in_flight=3)
+    scheduler.tick()
+    clock.now = 100
+    scheduler.mark_active("user-7")
+
+    assert scheduler.tick()[0] == "user-7"
+    # Nothing finished, so there is no room for more
+    assert scheduler.tick() == []
+
+    manager.finish_all()
+    assert len(scheduler.tick()) == 3
+    assert len(set(manager.submitted)) == 6
+
+def test_active_users_are_synced_more_often(monkeypatch):
+    scheduler, manager, clock = make_scheduler(monkeypatch, 2, interval=1000, active_interval=100, max_in_flight=5)
+    scheduler.tick()
+    scheduler.mark_active("user-1")
+    clock.now = 1000
+    assert sorted(scheduler.tick()) == ["user-0", "user-1"]
+    manager.finish_all()
+
+    clock.now = 1000 + 100 * 1.1
+    assert scheduler.tick() == ["user-1"]
+
+def test_rate_limits_halve_the_budget_until_gmail_recovers(monkeypatch):
+    scheduler, manager, clock = make_scheduler(monkeypatch, 20, interval=10, max_in_flight=8)
+    scheduler.tick()
+    clock.now = 10
+
+    rate_limit_counts["requests"] += 1
+    assert scheduler.tick() == []
+    assert scheduler.budget == 4
+
+    # Each quiet tick grows the budget by one before scheduling
+    assert len(scheduler.tick()) == 5
+    manager.finish_all()
+    assert len(scheduler.tick()) == 6
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Tests for per-user Gmail sync checkpoints
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.services.sync_state as sync_state
+from app.models.sync_state import SyncCheckpoint
+from app.services.sync_state import load_checkpoint, record_failed, save_checkpoint
+from test_job_writer import FakeSupabase
+
+def test_checkpoint_round_trips_failed_messages_and_sync_time(monkeypatch):
+    db = FakeSupabase()
+    monkeypatch.setattr(sync_state, "supabase", db)
+    synced_at = datetime(2024, 5, 2, 9, 30, tzinfo=timezone.utc)
+
+    save_checkpoint(SyncCheckpoint(user_id="u", history_id="42", synced_at=synced_at, failed_message_ids=["m1"]))
+    checkpoint = load_checkpoint("u")
+
+    assert checkpoint.history_id == "42"
+    assert checkpoint.synced_at == synced_at
+    assert checkpoint.failed_message_ids == ["m1"]
+    assert load_checkpoint("someone-else").synced_at is None
+
+def test_failed_messages_are_unique_and_bounded(monkeypatch):
+    monkeypatch.setattr(sync_state, "MAX_FAILED_IDS", 3)
+    checkpoint = SyncCheckpoint(user_id="u", failed_message_ids=["m1"])
+
+    record_failed(checkpoint, ["m1", "m2", "m3", "m4"])
+
+    assert checkpoint.failed_message_ids == ["m2", "m3", "m4"]
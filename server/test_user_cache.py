@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for the TTL/LRU cache and the cached email -> user lookup
+"""
+
+import os
+import sys
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app.routes.jobs as jobs_routes
+import app.services.users as users
+from app.utils.ttl_cache import TTLCache
+from main import app
+from test_job_writer import FakeSupabase
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class CountingSupabase(FakeSupabase):
+    def __init__(self, users, jobs=()):
+        super().__init__(jobs)
+        self.tables["users"] = [dict(user) for user in users]
+        self.queries = []
+
+    def table(self, name):
+        self.queries.append(name)
+        return super().table(name)
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+def test_user_lookups_hit_the_database_once_until_invalidated(monkeypatch):
+    db = CountingSupabase([{"id": "u1", "email": "ada@example.com"}])
+    monkeypatch.setattr(users, "supabase", db)
+    monkeypatch.setattr(users, "user_cache", TTLCache(maxsize=10, ttl=60))
+
+    assert users.get_user_by_email("ada@example.com")["id"] == "u1"
+    assert users.get_user_by_email("ada@example.com")["id"] == "u1"
+    assert db.queries == ["users"]
+
+    users.invalidate_user("ada@example.com")
+    users.get_user_by_email("ada@example.com")
+    assert db.queries == ["users", "users"]
+
+    # Unknown users are not cached, so a new signup is seen immediately
+    assert users.get_user_by_email("new@example.com") is None
+    db.tables["users"].append({"id": "u2", "email": "new@example.com"})
+    assert users.get_user_by_email("new@example.com")["id"] == "u2"
+
+def test_repeated_api_requests_reuse_the_cached_user(monkeypatch):
+    db = CountingSupabase(
+        [{"id": "u1", "email": "ada@example.com"}],
+        jobs=[{"id": "1", "user_id": "u1", "company": "Stripe", "position": "Intern",
+               "status": "applied", "applied_date": "2024-04-01T00:00:00"}]
+    )
+    monkeypatch.setattr(users, "supabase", db)
+    monkeypatch.setattr(jobs_routes, "supabase", db)
+    monkeypatch.setattr(users, "user_cache", TTLCache(maxsize=10, ttl=60))
+    client = TestClient(app)
+
+    for _ in range(3):
+        response = client.get("/api/jobs", params={"user_email": "ada@example.com"})
+        assert response.status_code == 200
+        assert [job["company"] for job in response.json()] == ["Stripe"]
+
+    # Later requests are served from the response cache as well
+    assert db.queries == ["users", "jobs"]